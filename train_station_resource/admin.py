@@ -9,6 +9,7 @@ from .models import (
     Order,
     Ticket,
     Trip,
+    SeatHold,
 )
 
 
@@ -21,6 +22,7 @@ class StationAdmin(admin.ModelAdmin):
 @admin.register(Route)
 class RouteAdmin(admin.ModelAdmin):
     search_fields = ["source__name"]
+    list_select_related = ["source", "destination"]
     list_display = ["id", "source", "destination", "distance"]
 
 
@@ -33,6 +35,7 @@ class TrainTypeAdmin(admin.ModelAdmin):
 class TrainAdmin(admin.ModelAdmin):
     search_fields = ["name", "train_type__name"]
     list_filter = ["cargo_num", "seats_in_cargo"]
+    list_select_related = ["train_type"]
     list_display = [
         "name",
         "cargo_num",
@@ -50,6 +53,7 @@ class CrewAdmin(admin.ModelAdmin):
 class TripAdmin(admin.ModelAdmin):
     search_fields = ["route__source__name"]
     list_filter = ["train__train_type"]
+    list_select_related = ["route__source", "route__destination", "train"]
     list_display = [
         "display_route_string_repr",
         "train",
@@ -74,6 +78,7 @@ class TicketInline(admin.TabularInline):
 class OrderAdmin(admin.ModelAdmin):
     inlines = [TicketInline]
     search_fields = ["user__email"]
+    list_select_related = ["user"]
     list_display = [
         "user", "created_at"
     ]
@@ -88,4 +93,12 @@ class OrderAdmin(admin.ModelAdmin):
             )
 
 
-admin.site.register(Ticket)
+@admin.register(Ticket)
+class TicketAdmin(admin.ModelAdmin):
+    list_select_related = ["trip__route__source", "trip__route__destination"]
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_select_related = ["user"]
+    list_display = ["trip_id", "cargo", "seat", "user", "expires_at"]
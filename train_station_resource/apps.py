@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TrainStationResourceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'train_station_resource'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,333 @@
+"""Latency, query and memory measurements of API endpoints.
+
+Every endpoint has a budget of queries per request and of the 95th
+percentile of latency. Query budgets do not depend on the size of
+the data, an endpoint that needs more queries for more rows has an
+N+1 problem. Latency budgets are generous limits for a development
+machine, meant to catch endpoints that got many times slower.
+
+Trip search is measured separately, its plan has to use the
+(route, departure_time) index however many past trips there are
+"""
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from .filters import TripFilter
+from .models import Station, Route, TrainType, Train, Trip, Order, Ticket
+from .signals import invalidate_all
+
+BENCHMARK_EMAIL = "benchmark@example.com"
+BENCHMARK_PASSWORD = "benchmark-password"
+
+
+@dataclass
+class BenchmarkData:
+    """Objects endpoints of a benchmark run are called with"""
+
+    user: object
+    trip: Trip
+    booking_trip: Trip
+    next_seat: int = 0
+
+    def book_seat(self) -> dict:
+        """Return request body ordering the next free seat
+        of the booking trip"""
+        cargo, seat = divmod(
+            self.next_seat, self.booking_trip.train.seats_in_cargo
+        )
+        self.next_seat += 1
+
+        return {"tickets": [{
+            "cargo": cargo + 1,
+            "seat": seat + 1,
+            "trip": self.booking_trip.id,
+        }]}
+
+
+@dataclass
+class Endpoint:
+    name: str
+    url: Callable[[BenchmarkData], str]
+    max_queries: int
+    max_p95_ms: float
+    method: str = "get"
+    body: Callable[[BenchmarkData], dict] | None = None
+    authenticated: bool = True
+
+
+def url(name: str, **kwargs) -> Callable[[BenchmarkData], str]:
+    def build(data: BenchmarkData) -> str:
+        return reverse(name, kwargs={
+            key: value(data) for key, value in kwargs.items()
+        })
+
+    return build
+
+
+ENDPOINTS = [
+    Endpoint("stations-list", url("train_station:station-list"), 3, 100),
+    Endpoint("routes-list", url("train_station:route-list"), 3, 100),
+    Endpoint("trains-list", url("train_station:train-list"), 3, 100),
+    Endpoint("trips-list", url("train_station:trip-list"), 3, 150),
+    Endpoint(
+        "trips-detail",
+        url("train_station:trip-detail", pk=lambda data: data.trip.id),
+        4,
+        100,
+    ),
+    Endpoint("orders-list", url("train_station:order-list"), 5, 200),
+    Endpoint(
+        "orders-create",
+        url("train_station:order-list"),
+        12,
+        200,
+        method="post",
+        body=BenchmarkData.book_seat,
+    ),
+    Endpoint(
+        "user-token",
+        url("user:token_obtain_pair"),
+        2,
+        2000,
+        method="post",
+        body=lambda data: {
+            "email": BENCHMARK_EMAIL, "password": BENCHMARK_PASSWORD
+        },
+        authenticated=False,
+    ),
+    Endpoint("user-me", url("user:manage"), 1, 100),
+]
+
+
+@contextmanager
+def benchmark_database():
+    """Run the block against a new test database"""
+    setup_test_environment()
+    database_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(database_name, verbosity=0)
+        teardown_test_environment()
+        # cached pages of the test database must not be served
+        invalidate_all()
+
+
+@contextmanager
+def throttling_disabled():
+    """Let every benchmark request reach its view"""
+    get_throttles = APIView.get_throttles
+    APIView.get_throttles = lambda view: []
+    try:
+        yield
+    finally:
+        APIView.get_throttles = get_throttles
+
+
+def prepare_data() -> BenchmarkData:
+    """Create benchmark user with some orders of existing tickets
+    and a large trip to order seats of"""
+    user = get_user_model().objects.create_user(
+        email=BENCHMARK_EMAIL, password=BENCHMARK_PASSWORD
+    )
+    Order.objects.filter(
+        id__in=Order.objects.order_by("id").values("id")[:50]
+    ).update(user=user)
+
+    trip = (
+        Trip.objects.filter(tickets__order__user=user).first()
+        or Trip.objects.first()
+    )
+    train = Train.objects.create(
+        name="Benchmark train",
+        cargo_num=100,
+        seats_in_cargo=100,
+        train_type=TrainType.objects.first(),
+    )
+    departure = timezone.now() + timedelta(days=30)
+    booking_trip = Trip.objects.create(
+        route=Route.objects.first(),
+        train=train,
+        departure_time=departure,
+        arrival_time=departure + timedelta(hours=2),
+    )
+
+    return BenchmarkData(
+        user=user,
+        trip=trip,
+        booking_trip=booking_trip,
+    )
+
+
+def dataset_size() -> dict[str, int]:
+    return {
+        model._meta.model_name: model.objects.count()
+        for model in (Station, Route, Train, Trip, Order, Ticket)
+    }
+
+
+def percentile(values: list[float], share: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def authenticated_client() -> APIClient:
+    client = APIClient()
+    response = client.post(
+        reverse("user:token_obtain_pair"),
+        {"email": BENCHMARK_EMAIL, "password": BENCHMARK_PASSWORD},
+    )
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    return client
+
+
+def measure(
+    endpoint: Endpoint, data: BenchmarkData, repeat: int
+) -> dict:
+    """Call endpoint repeat times after one warm up call, return
+    latency percentiles in ms, most queries of a call and peak
+    memory in KiB allocated by a separate traced call"""
+    client = authenticated_client() if endpoint.authenticated else (
+        APIClient()
+    )
+
+    def call():
+        kwargs = {"format": "json"}
+        if endpoint.body is not None:
+            kwargs["data"] = endpoint.body(data)
+        return getattr(client, endpoint.method)(endpoint.url(data), **kwargs)
+
+    # queries of the first call count too, later calls of
+    # cached endpoints may not query at all
+    with CaptureQueriesContext(connection) as captured:
+        call()
+    timings, queries, statuses = [], len(captured), set()
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = call()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = max(queries, len(captured))
+        statuses.add(response.status_code)
+
+    tracemalloc.start()
+    try:
+        call()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    p95 = percentile(timings, 0.95)
+    return {
+        "status": sorted(statuses),
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(p95, 2),
+        "queries": queries,
+        "peak_memory_kb": round(peak_memory / 1024, 1),
+        "budget": {
+            "queries": endpoint.max_queries,
+            "p95_ms": endpoint.max_p95_ms,
+        },
+        "within_budget": (
+            queries <= endpoint.max_queries
+            and p95 <= endpoint.max_p95_ms
+            and all(200 <= status < 300 for status in statuses)
+        ),
+    }
+
+
+def run(repeat: int, endpoints=ENDPOINTS) -> dict:
+    """Measure endpoints on data already in the database"""
+    data = prepare_data()
+
+    with throttling_disabled():
+        return {
+            "dataset": dataset_size(),
+            "endpoints": {
+                endpoint.name: measure(endpoint, data, repeat)
+                for endpoint in endpoints
+            },
+        }
+
+
+def route_departure_index() -> str:
+    return next(
+        index.name for index in Trip._meta.indexes
+        if index.fields == ["route", "departure_time"]
+    )
+
+
+def trip_search(source: int, destination: int, day):
+    """Trips from source to destination departing on day,
+    filtered as the trip list filters them"""
+    return TripFilter(
+        {
+            "route__source": source,
+            "destination": destination,
+            "date": day.isoformat(),
+        },
+        queryset=Trip.objects.all(),
+    ).qs
+
+
+def measure_trip_search(repeat: int, trips: int = 5) -> dict:
+    """Add trips departing tomorrow to a route of trips already
+    in the database, return latency of searching them in ms and
+    whether the query plan uses the (route, departure_time) index"""
+    route = Route.objects.order_by("id").first()
+    train = Train.objects.order_by("id").first()
+    tomorrow = timezone.now() + timedelta(days=1)
+    for hour in range(trips):
+        departure = tomorrow.replace(hour=6 + hour, minute=0)
+        Trip.objects.create(
+            route=route,
+            train=train,
+            departure_time=departure,
+            arrival_time=departure + timedelta(hours=2),
+        )
+
+    with connection.cursor() as cursor:
+        # planner statistics of the generated history
+        cursor.execute("ANALYZE")
+
+    queryset = trip_search(
+        route.source_id, route.destination_id, tomorrow.date()
+    )
+    plan = queryset.explain()
+    timings, found = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = len(queryset.all())
+        timings.append((time.perf_counter() - start) * 1000)
+
+    index = route_departure_index()
+    return {
+        "past_trips": Trip.objects.filter(
+            departure_time__lt=timezone.now()
+        ).count(),
+        "found": found,
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "index": index,
+        "uses_index": index in plan,
+        "plan": plan,
+    }
@@ -0,0 +1,184 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .metrics import record_order
+from .models import Trip, Order, Ticket, SeatHold
+
+
+def sweep_expired_holds(trip_ids=None) -> int:
+    """Delete expired seat holds in bulk, of given trips only
+    when trip_ids are passed, return number of deleted holds"""
+    holds = SeatHold.objects.filter(expires_at__lte=timezone.now())
+    if trip_ids is not None:
+        holds = holds.filter(trip_id__in=trip_ids)
+
+    return holds.delete()[0]
+
+
+def split_holds(trip_ids, user) -> tuple[set, dict]:
+    """Sweep expired holds of locked trips and return places held
+    by other users together with {place: hold id} of user holds"""
+    sweep_expired_holds(trip_ids)
+
+    held_by_others = set()
+    held_by_user = {}
+    holds = SeatHold.objects.filter(trip_id__in=trip_ids).values_list(
+        "id", "user_id", "trip_id", "cargo", "seat"
+    )
+    for hold_id, user_id, *place in holds:
+        if user is not None and user_id == user.id:
+            held_by_user[tuple(place)] = hold_id
+        else:
+            held_by_others.add(tuple(place))
+
+    return held_by_others, held_by_user
+
+
+def release_user_holds(tickets: list[dict], held_by_user: dict) -> None:
+    """Delete user holds of ticket places, see split_holds"""
+    places = {
+        (ticket["trip"].id, ticket["cargo"], ticket["seat"])
+        for ticket in tickets
+    }
+    SeatHold.objects.filter(
+        id__in=[
+            hold_id
+            for place, hold_id in held_by_user.items()
+            if place in places
+        ]
+    ).delete()
+
+
+def lock_ticket_trips(tickets: list[dict]) -> dict[int, Trip]:
+    """Lock trips of tickets and replace ticket trips with locked ones"""
+    trips = Trip.lock_for_booking({ticket["trip"].id for ticket in tickets})
+    for ticket in tickets:
+        ticket["trip"] = trips[ticket["trip"].id]
+
+    return trips
+
+
+@transaction.atomic
+def create_order(tickets: list[dict], **order_fields) -> Order:
+    """Create order with all its tickets in bulk.
+
+    Trips of tickets are locked so their seat maps are checked and
+    updated without races with other orders of the same trips. Seats
+    held by the ordering user are released, seats held by other
+    users can not be ordered
+    """
+    trips = lock_ticket_trips(tickets)
+    held_by_others, held_by_user = split_holds(
+        trips, order_fields.get("user")
+    )
+
+    # seat maps could change since validation, check locked ones
+    Ticket.validate_tickets_are_free(
+        tickets, ValidationError, held_places=held_by_others
+    )
+
+    order = Order.objects.create(**order_fields)
+    try:
+        Ticket.objects.bulk_create(
+            [Ticket(order=order, **ticket) for ticket in tickets]
+        )
+    except IntegrityError:
+        raise ValidationError(
+            {"tickets": "Some of the seats have just been taken"}
+        )
+
+    release_user_holds(tickets, held_by_user)
+
+    places = defaultdict(list)
+    for ticket in tickets:
+        places[ticket["trip"]].append((ticket["cargo"], ticket["seat"]))
+
+    for trip, trip_places in places.items():
+        trip.set_places(trip_places)
+
+    transaction.on_commit(lambda: record_order(len(tickets)))
+
+    return order
+
+
+@transaction.atomic
+def allocate_seats(trip: Trip, passengers: int, **order_fields) -> Order:
+    """Pick the best free places for a group of passengers
+    on the trip and order them"""
+    trip = Trip.lock_for_booking([trip.id])[trip.id]
+    held_by_others, _ = split_holds([trip.id], order_fields.get("user"))
+
+    seat_map = trip.get_seat_map()
+    for _, cargo, seat in held_by_others:
+        if seat_map.contains(cargo, seat):
+            seat_map.take(cargo, seat)
+
+    places = seat_map.find_block(passengers)
+    if places is None:
+        raise ValidationError(
+            {
+                "passengers": "Not enough free seats, only "
+                f"{seat_map.size - seat_map.taken_count()} left"
+            }
+        )
+
+    return create_order(
+        [{"trip": trip, "cargo": cargo, "seat": seat}
+         for cargo, seat in places],
+        **order_fields,
+    )
+
+
+@transaction.atomic
+def hold_seats(tickets: list[dict], user) -> list[SeatHold]:
+    """Reserve places for user for SEAT_HOLD_TTL, holding
+    an already held place again prolongs the hold"""
+    trips = lock_ticket_trips(tickets)
+    held_by_others, held_by_user = split_holds(trips, user)
+
+    Ticket.validate_tickets_are_free(
+        tickets, ValidationError, held_places=held_by_others
+    )
+
+    release_user_holds(tickets, held_by_user)
+
+    expires_at = timezone.now() + settings.SEAT_HOLD_TTL
+    holds = SeatHold.objects.bulk_create(
+        [
+            SeatHold(user=user, expires_at=expires_at, **ticket)
+            for ticket in tickets
+        ]
+    )
+    Trip.touch(trips)
+
+    return holds
+
+
+@transaction.atomic
+def checkout_holds(user) -> Order:
+    """Turn all active seat holds of user into one order"""
+    trip_ids = set(
+        SeatHold.objects.filter(
+            user=user, expires_at__gt=timezone.now()
+        ).values_list("trip_id", flat=True)
+    )
+    trips = Trip.lock_for_booking(trip_ids)
+
+    holds = SeatHold.objects.filter(
+        user=user, trip_id__in=trips, expires_at__gt=timezone.now()
+    ).values_list("trip_id", "cargo", "seat")
+    tickets = [
+        {"trip": trips[trip_id], "cargo": cargo, "seat": seat}
+        for trip_id, cargo, seat in holds
+    ]
+
+    if not tickets:
+        raise ValidationError(
+            {"holds": "There are no active seat holds to check out"}
+        )
+
+    return create_order(tickets, user=user)
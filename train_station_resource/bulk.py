@@ -0,0 +1,64 @@
+"""Fast inserts of many rows.
+
+On PostgreSQL rows are sent with COPY FROM STDIN in CSV format, other
+databases get chunked bulk_create. Neither calls save() nor sends
+model signals, callers bump versions of changed models themselves
+"""
+import csv
+import io
+import itertools
+
+from django.db import connection
+
+COPY_NULL = r"\N"
+
+
+def copy_value(value):
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "\\x" + bytes(value).hex()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return "t" if value else "f"
+
+    return value
+
+
+def copy_rows(model, fields: list[str], rows) -> None:
+    """Insert tuples of field values with PostgreSQL COPY"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([copy_value(value) for value in row])
+    buffer.seek(0)
+
+    columns = ", ".join(
+        connection.ops.quote_name(model._meta.get_field(name).column)
+        for name in fields
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {connection.ops.quote_name(model._meta.db_table)}"
+            f" ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+            buffer,
+        )
+
+
+def insert_rows(model, fields: list[str], rows, batch_size: int = 5000):
+    """Insert tuples of field values of model in chunks of batch_size
+    rows, yield number of rows inserted after every chunk"""
+    use_copy = connection.vendor == "postgresql"
+    rows = iter(rows)
+
+    while chunk := list(itertools.islice(rows, batch_size)):
+        if use_copy:
+            copy_rows(model, fields, chunk)
+        else:
+            model.objects.bulk_create(
+                [model(**dict(zip(fields, row))) for row in chunk],
+                batch_size=batch_size,
+            )
+
+        yield len(chunk)
@@ -0,0 +1,130 @@
+"""Read-through cache of list responses of rarely changing models.
+
+Cache keys contain version counters of every model serialized in the
+response, saving or deleting any of them bumps its counter, so stale
+pages are never read again and expire on their own
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from .versions import bump_version, get_versions
+
+cached_views = []
+
+
+def model_version_name(model) -> str:
+    return f"model:{model._meta.label_lower}"
+
+
+def modified_key(model) -> str:
+    return f"modified:{model._meta.label_lower}"
+
+
+def bump_model_version(model) -> None:
+    bump_version(model_version_name(model))
+    cache.set(modified_key(model), time.time(), timeout=None)
+
+
+def get_modified_times(*models) -> list[float]:
+    """Return unix times of the last change of every model,
+    unknown times are taken as now"""
+    keys = [modified_key(model) for model in models]
+    times = cache.get_many(keys)
+
+    for key in keys:
+        if key not in times:
+            cache.add(key, time.time(), timeout=None)
+            times[key] = cache.get(key)
+
+    return [times[key] for key in keys]
+
+
+def stats_key(name: str, outcome: str) -> str:
+    return f"list_cache_stats:{name}:{outcome}"
+
+
+def count(name: str, outcome: str) -> None:
+    key = stats_key(name, outcome)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_cache_stats() -> dict[str, dict[str, int]]:
+    """Return hits and misses of every cached list view"""
+    names = [view.list_cache_name() for view in cached_views]
+    counters = cache.get_many(
+        [
+            stats_key(name, outcome)
+            for name in names
+            for outcome in ("hit", "miss")
+        ]
+    )
+
+    return {
+        name: {
+            outcome: counters.get(stats_key(name, outcome), 0)
+            for outcome in ("hit", "miss")
+        }
+        for name in names
+    }
+
+
+class CachedListMixin:
+    """Serve list action from the cache until any model
+    of list_cache_models is saved or deleted"""
+
+    list_cache_models = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cached_views.append(cls)
+
+    @classmethod
+    def list_cache_name(cls) -> str:
+        return cls.queryset.model._meta.model_name
+
+    def list_cache_key(self, request) -> str:
+        versions = get_versions(
+            *(model_version_name(model) for model in self.list_cache_models)
+        )
+        # absolute uri covers query params and host of image urls
+        url = hashlib.sha256(
+            request.build_absolute_uri().encode()
+        ).hexdigest()
+
+        return "list_cache:{}:{}:{}".format(
+            self.list_cache_name(),
+            ".".join(str(version) for version in versions),
+            url,
+        )
+
+    def list(self, request, *args, **kwargs):
+        name = self.list_cache_name()
+        key = self.list_cache_key(request)
+
+        data = cache.get(key)
+        if data is not None:
+            count(name, "hit")
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        count(name, "miss")
+        response = super().list(request, *args, **kwargs)
+
+        if status.is_success(response.status_code):
+            cache.set(
+                key,
+                response.data,
+                timeout=settings.LIST_CACHE_TIMEOUT.total_seconds(),
+            )
+        response["X-Cache"] = "MISS"
+
+        return response
@@ -0,0 +1,126 @@
+import hashlib
+import time
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .caching import get_modified_times, model_version_name
+from .versions import get_versions
+
+
+class ConditionalGetMixin:
+    """Send ETag and Last-Modified with list and retrieve responses
+    and answer 304 Not Modified before running the main query.
+
+    Validators are built from version counters and last change times
+    of conditional_models, retrieve also uses object_stamp_field
+    of the requested object when the model has one. Detail actions
+    answer conditionally with object_conditional_response
+    """
+
+    conditional_models = ()
+    object_stamp_field = None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, None, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.object_stamp_field:
+            return self.conditional_response(
+                request, None, super().retrieve, *args, **kwargs
+            )
+
+        return self.object_conditional_response(
+            request, super().retrieve, *args, **kwargs
+        )
+
+    def object_conditional_response(
+        self, request, handler, *args, resource=None, **kwargs
+    ):
+        """Answer handler of the object in kwargs conditionally,
+        validated by its stamp. Requests sharing resource share
+        validators, so a seat map ETag can be sent in If-Match"""
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        try:
+            stamp = self.get_object_stamp(kwargs[lookup])
+        except (TypeError, ValueError, ValidationError):
+            stamp = None
+
+        if stamp is None:
+            # let handler answer 404
+            return handler(request, *args, **kwargs)
+
+        return self.conditional_response(
+            request, stamp, handler, *args, resource=resource, **kwargs
+        )
+
+    def get_object_stamp(self, lookup_value):
+        """Return object_stamp_field of the object, None when
+        it does not exist"""
+        return self.queryset.model._default_manager.filter(
+            **{self.lookup_field: lookup_value}
+        ).values_list(self.object_stamp_field, flat=True).first()
+
+    def get_conditional_models(self):
+        return self.conditional_models
+
+    def get_validators(
+        self, request, stamp=None, resource=None
+    ) -> tuple[str, int | None]:
+        models = self.get_conditional_models()
+        if stamp is not None:
+            # the object stamp replaces version of the whole model
+            models = [
+                model for model in models
+                if model is not self.queryset.model
+            ]
+
+        versions = get_versions(
+            *(model_version_name(model) for model in models)
+        )
+        modified = get_modified_times(*models)
+
+        if stamp is not None:
+            if timezone.is_naive(stamp):
+                stamp = timezone.make_aware(stamp)
+            modified.append(stamp.timestamp())
+
+        etag = hashlib.sha256(
+            "{}:{}:{}:{}".format(
+                self.basename,
+                resource or request.build_absolute_uri(),
+                ".".join(str(version) for version in versions),
+                stamp.isoformat() if stamp else "",
+            ).encode()
+        ).hexdigest()
+
+        last_modified = int(max(modified))
+        if last_modified >= int(time.time()):
+            # a later change in the same second would not be newer
+            # than Last-Modified in whole seconds, until the second
+            # is over responses are validated by the ETag only
+            last_modified = None
+
+        return quote_etag(etag), last_modified
+
+    def conditional_response(
+        self, request, stamp, handler, *args, resource=None, **kwargs
+    ):
+        etag, last_modified = self.get_validators(request, stamp, resource)
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+
+        return response
@@ -0,0 +1,96 @@
+"""Streaming export of ordered tickets.
+
+Tickets are read as plain tuples from a server side cursor in chunks
+of EXPORT_CHUNK_SIZE rows and every row is written to the response
+as soon as it is read, so memory use does not depend on the number
+of exported tickets
+"""
+import csv
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from .models import Ticket
+
+EXPORT_COLUMNS = (
+    ("order_id", "order_id"),
+    ("order_created_at", "order__created_at"),
+    ("user_email", "order__user__email"),
+    ("ticket_id", "id"),
+    ("trip_id", "trip_id"),
+    ("source", "trip__route__source__name"),
+    ("destination", "trip__route__destination__name"),
+    ("departure_time", "trip__departure_time"),
+    ("arrival_time", "trip__arrival_time"),
+    ("cargo", "cargo"),
+    ("seat", "seat"),
+)
+EXPORT_HEADER = [name for name, _ in EXPORT_COLUMNS]
+
+
+class Echo:
+    """File-like object returning written value, lets csv.writer
+    build lines for a streaming response"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def export_tickets(created_after=None, created_before=None, route=None):
+    """Return ordered tickets as tuples of EXPORT_COLUMNS values"""
+    tickets = Ticket.objects.order_by("order_id", "id")
+
+    if created_after is not None:
+        tickets = tickets.filter(order__created_at__gte=created_after)
+    if created_before is not None:
+        tickets = tickets.filter(order__created_at__lt=created_before)
+    if route is not None:
+        tickets = tickets.filter(trip__route=route)
+
+    return tickets.values_list(
+        *(column for _, column in EXPORT_COLUMNS)
+    ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+
+def format_value(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+
+    return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+
+    for row in rows:
+        yield writer.writerow([format_value(value) for value in row])
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(
+            dict(zip(EXPORT_HEADER, map(format_value, row)))
+        ) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", csv_lines),
+    "ndjson": ("application/x-ndjson", ndjson_lines),
+}
+
+
+def export_response(
+    output: str, filename: str, **filters
+) -> StreamingHttpResponse:
+    content_type, lines = EXPORT_FORMATS[output]
+
+    response = StreamingHttpResponse(
+        lines(export_tickets(**filters)), content_type=content_type
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{output}"'
+    )
+
+    return response
@@ -0,0 +1,136 @@
+"""Sparse fieldsets of read endpoints.
+
+?fields=id,departure_time keeps only the listed top level fields of
+the returned resources and ?include=crew embeds the listed relations
+in full where the serializer renders them in short form by default.
+Views read the requested fields to leave out joins, prefetches and
+annotations that no requested field needs
+"""
+import copy
+
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = "fields"
+INCLUDE_PARAM = "include"
+
+FIELDS_PARAMETER = OpenApiParameter(
+    name=FIELDS_PARAM,
+    description=(
+        "Comma separated fields to return, all fields when omitted"
+    ),
+    type=str,
+    required=False,
+)
+INCLUDE_PARAMETER = OpenApiParameter(
+    name=INCLUDE_PARAM,
+    description="Comma separated relations to embed as full objects",
+    type=str,
+    required=False,
+)
+
+
+def parse_names(value: str | None) -> list[str]:
+    if not value:
+        return []
+
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class SparseFieldsetSerializerMixin:
+    """Keep only fields requested in the serializer context.
+
+    Only the serialized resource itself is pruned, nested serializers
+    keep all their fields. included_fields maps relation names to
+    fields that replace or extend the default ones when included
+    """
+
+    included_fields = {}
+
+    def is_resource(self) -> bool:
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.is_resource():
+            return fields
+
+        for name in self.context.get("include", ()):
+            fields[name] = copy.deepcopy(self.included_fields[name])
+
+        requested = self.context.get("fields")
+        if requested is not None:
+            fields = {
+                name: field
+                for name, field in fields.items()
+                if name in requested
+            }
+
+        return fields
+
+
+class SparseFieldsetMixin:
+    """Accept fields and include query params on read actions of
+    views with a SparseFieldsetSerializerMixin serializer"""
+
+    sparse_fieldset_actions = ("list", "retrieve")
+
+    def get_sparse_fieldset(self) -> tuple[set[str] | None, list[str]]:
+        """Return requested field names, None for all fields,
+        and names of included relations"""
+        if not hasattr(self, "_sparse_fieldset"):
+            self._sparse_fieldset = self.parse_sparse_fieldset()
+
+        return self._sparse_fieldset
+
+    def parse_sparse_fieldset(self):
+        request = getattr(self, "request", None)
+        if request is None or self.action not in self.sparse_fieldset_actions:
+            return None, []
+
+        serializer_class = self.get_serializer_class()
+        if not issubclass(serializer_class, SparseFieldsetSerializerMixin):
+            return None, []
+
+        include = parse_names(request.query_params.get(INCLUDE_PARAM))
+        unknown = set(include) - set(serializer_class.included_fields)
+        if unknown:
+            raise ValidationError({INCLUDE_PARAM: [
+                f"Unknown relation: {name}" for name in sorted(unknown)
+            ]})
+
+        names = parse_names(request.query_params.get(FIELDS_PARAM))
+        if not names:
+            return None, include
+
+        available = set(serializer_class().fields) | set(include)
+        unknown = set(names) - available
+        if unknown:
+            raise ValidationError({FIELDS_PARAM: [
+                f"Unknown field: {name}" for name in sorted(unknown)
+            ]})
+
+        # included relations are always returned
+        return set(names) | set(include), include
+
+    def field_requested(self, name: str) -> bool:
+        fields, include = self.get_sparse_fieldset()
+        return fields is None or name in fields
+
+    def field_included(self, name: str) -> bool:
+        return name in self.get_sparse_fieldset()[1]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields, include = self.get_sparse_fieldset()
+        if fields is not None:
+            context["fields"] = fields
+        if include:
+            context["include"] = include
+
+        return context
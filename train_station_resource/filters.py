@@ -0,0 +1,32 @@
+from datetime import datetime, time, timedelta
+
+import django_filters
+
+from .models import Trip
+
+
+class TripFilter(django_filters.FilterSet):
+    departure_after = django_filters.IsoDateTimeFilter(
+        field_name="departure_time", lookup_expr="gte"
+    )
+    departure_before = django_filters.IsoDateTimeFilter(
+        field_name="departure_time", lookup_expr="lt"
+    )
+    date = django_filters.DateFilter(method="filter_date")
+    destination = django_filters.NumberFilter(
+        field_name="route__destination"
+    )
+
+    class Meta:
+        model = Trip
+        fields = ["train", "route__source"]
+
+    def filter_date(self, queryset, name, value):
+        """Filter by departure day as a range of departure_time,
+        so (route, departure_time) index can be used"""
+        start = datetime.combine(value, time.min)
+
+        return queryset.filter(
+            departure_time__gte=start,
+            departure_time__lt=start + timedelta(days=1),
+        )
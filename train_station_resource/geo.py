@@ -0,0 +1,183 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from .models import Station
+from .versions import VersionedValue
+
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEGREES = 1.0
+
+
+@dataclass
+class NearbyStation:
+    id: int
+    name: str
+    latitude: float
+    longitude: float
+    distance: float
+
+
+def haversine(lat, lon, latitudes, longitudes, cos_latitudes) -> np.ndarray:
+    """Great circle distances in km from point to arrays of points,
+    all angles in radians"""
+    half_lat = np.sin((latitudes - lat) / 2)
+    half_lon = np.sin((longitudes - lon) / 2)
+    a = half_lat ** 2 + np.cos(lat) * cos_latitudes * half_lon ** 2
+
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class StationIndex:
+    """Stations bucketed into a grid of CELL_DEGREES cells.
+
+    Stations are sorted by cell key row * columns + column, so stations
+    of a run of cells in one grid row are a slice found with
+    searchsorted. Distances are computed only for stations of cells
+    that intersect the bounding box of the search circle
+    """
+
+    columns = int(360 / CELL_DEGREES)
+    rows = int(180 / CELL_DEGREES)
+
+    def __init__(self, stations) -> None:
+        stations = list(stations)
+        latitudes = np.array([row[2] for row in stations], dtype=float)
+        longitudes = np.array([row[3] for row in stations], dtype=float)
+
+        keys = self.cell_row(latitudes) * self.columns + self.cell_column(
+            longitudes
+        )
+        order = np.argsort(keys, kind="stable")
+
+        self.keys = keys[order]
+        self.ids = np.array([row[0] for row in stations], dtype=np.int64)[
+            order
+        ]
+        self.names = [stations[index][1] for index in order]
+        self.latitudes = latitudes[order]
+        self.longitudes = longitudes[order]
+        self.radian_latitudes = np.radians(self.latitudes)
+        self.radian_longitudes = np.radians(self.longitudes)
+        self.cos_latitudes = np.cos(self.radian_latitudes)
+
+    @classmethod
+    def load(cls) -> "StationIndex":
+        return cls(
+            Station.objects.order_by().values_list(
+                "id", "name", "latitude", "longitude"
+            )
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def cell_row(self, latitude):
+        return np.clip(
+            np.floor((latitude + 90) / CELL_DEGREES).astype(np.int64),
+            0,
+            self.rows - 1,
+        )
+
+    def cell_column(self, longitude):
+        return np.floor(
+            ((longitude + 180) % 360) / CELL_DEGREES
+        ).astype(np.int64) % self.columns
+
+    def candidates(
+        self, latitude: float, longitude: float, radius: float
+    ) -> np.ndarray:
+        """Positions of stations in cells around the search circle"""
+        delta_latitude = np.degrees(radius / EARTH_RADIUS_KM)
+        north = latitude + delta_latitude
+        south = latitude - delta_latitude
+
+        if north >= 90 or south <= -90:
+            delta_longitude = 180.0
+        else:
+            widest = np.cos(np.radians(max(abs(north), abs(south))))
+            delta_longitude = min(
+                180.0, np.degrees(radius / (EARTH_RADIUS_KM * widest))
+            )
+
+        first_row = int(self.cell_row(south))
+        last_row = int(self.cell_row(north))
+
+        if delta_longitude >= 180:
+            column_ranges = [(0, self.columns - 1)]
+        else:
+            west = int(self.cell_column(longitude - delta_longitude))
+            east = int(self.cell_column(longitude + delta_longitude))
+            if west <= east:
+                column_ranges = [(west, east)]
+            else:
+                # circle crosses the antimeridian
+                column_ranges = [(west, self.columns - 1), (0, east)]
+
+        rows = np.arange(first_row, last_row + 1) * self.columns
+        first_keys = np.concatenate(
+            [rows + west for west, _ in column_ranges]
+        )
+        last_keys = np.concatenate(
+            [rows + east for _, east in column_ranges]
+        )
+        starts = np.searchsorted(self.keys, first_keys, side="left")
+        stops = np.searchsorted(self.keys, last_keys, side="right")
+
+        slices = [
+            np.arange(start, stop)
+            for start, stop in zip(starts, stops)
+            if start < stop
+        ]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+
+        return np.concatenate(slices)
+
+    def nearby(
+        self, latitude: float, longitude: float, radius: float, k: int
+    ) -> list[NearbyStation]:
+        """Return up to k stations within radius km of the point
+        ordered by distance"""
+        positions = self.candidates(latitude, longitude, radius)
+        if not len(positions):
+            return []
+
+        distances = haversine(
+            np.radians(latitude),
+            np.radians(longitude),
+            self.radian_latitudes[positions],
+            self.radian_longitudes[positions],
+            self.cos_latitudes[positions],
+        )
+
+        inside = distances <= radius
+        positions, distances = positions[inside], distances[inside]
+
+        if len(positions) > k:
+            nearest = np.argpartition(distances, k - 1)[:k]
+            positions, distances = positions[nearest], distances[nearest]
+
+        order = np.lexsort((self.ids[positions], distances))
+
+        return [
+            NearbyStation(
+                id=int(self.ids[positions[index]]),
+                name=self.names[positions[index]],
+                latitude=float(self.latitudes[positions[index]]),
+                longitude=float(self.longitudes[positions[index]]),
+                distance=float(distances[index]),
+            )
+            for index in order
+        ]
+
+
+station_index = VersionedValue("station_index", StationIndex.load)
+
+
+def get_station_index() -> StationIndex:
+    return station_index.get()
+
+
+def invalidate_station_index() -> None:
+    station_index.invalidate()
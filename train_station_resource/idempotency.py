@@ -0,0 +1,99 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = (
+        "Idempotency-Key was already used with a different request body"
+    )
+    default_code = "idempotency_key_reused"
+
+
+class IdempotencyKeyInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = (
+        "Request with this Idempotency-Key is still being processed"
+    )
+    default_code = "idempotency_key_in_progress"
+
+
+class IdempotentCreateMixin:
+    """Make create action safe to retry.
+
+    Successful response of request sent with Idempotency-Key header
+    is stored for IDEMPOTENCY_KEY_TTL in the idempotency cache and
+    replayed for repeated requests of the same user with the same key
+    and body, without running create again
+    """
+
+    idempotency_header = "Idempotency-Key"
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(self.idempotency_header)
+        if not key:
+            return super().create(request, *args, **kwargs)
+
+        if len(key) > 255:
+            raise ValidationError(
+                {self.idempotency_header: "Key must be at most 255 chars"}
+            )
+
+        cache_key = "idempotency:{}:{}:{}".format(
+            self.basename,
+            request.user.pk,
+            hashlib.sha256(key.encode()).hexdigest(),
+        )
+        fingerprint = hashlib.sha256(
+            json.dumps(request.data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+        cache = caches["idempotency"]
+        in_progress = {"fingerprint": fingerprint, "status": None}
+        if not cache.add(
+            cache_key,
+            in_progress,
+            timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT.total_seconds(),
+        ):
+            return self.replay_response(cache.get(cache_key), fingerprint)
+
+        try:
+            response = super().create(request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+
+        if status.is_success(response.status_code):
+            cache.set(
+                cache_key,
+                {
+                    "fingerprint": fingerprint,
+                    "status": response.status_code,
+                    "data": response.data,
+                },
+                timeout=settings.IDEMPOTENCY_KEY_TTL.total_seconds(),
+            )
+        else:
+            cache.delete(cache_key)
+
+        return response
+
+    @staticmethod
+    def replay_response(stored: dict | None, fingerprint: str) -> Response:
+        if stored is None or stored["status"] is None:
+            raise IdempotencyKeyInProgress()
+
+        if stored["fingerprint"] != fingerprint:
+            raise IdempotencyKeyReused()
+
+        return Response(
+            stored["data"],
+            status=stored["status"],
+            headers={"Idempotent-Replayed": "true"},
+        )
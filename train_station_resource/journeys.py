@@ -0,0 +1,314 @@
+import copy
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Station, Trip
+from .versions import VersionedValue
+
+UNREACHED = 2 ** 62
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+CONNECTION_COLUMNS = (
+    "departure_stop", "arrival_stop", "departure", "arrival", "trip_ids"
+)
+
+
+def to_microseconds(value: datetime) -> int:
+    """Return microseconds since epoch, naive datetimes are in UTC"""
+    if timezone.is_naive(value):
+        value = value.replace(tzinfo=dt_timezone.utc)
+
+    return (value - EPOCH) // MICROSECOND
+
+
+def from_microseconds(value: int) -> datetime:
+    moment = EPOCH + value * MICROSECOND
+    if settings.USE_TZ:
+        return moment
+
+    return moment.replace(tzinfo=None)
+
+
+@dataclass
+class Leg:
+    trip: int
+    source: str
+    destination: str
+    departure_time: datetime
+    arrival_time: datetime
+
+
+@dataclass
+class Journey:
+    legs: list[Leg]
+
+    @property
+    def departure_time(self) -> datetime:
+        return self.legs[0].departure_time
+
+    @property
+    def arrival_time(self) -> datetime:
+        return self.legs[-1].arrival_time
+
+    @property
+    def transfers(self) -> int:
+        return len(self.legs) - 1
+
+
+class Timetable:
+    """Upcoming trips as connections sorted by departure time.
+
+    Every trip is a connection from its route source to destination,
+    stored column wise in arrays so Connection Scan Algorithm
+    walks plain integer arrays. Times are kept in microseconds, so
+    legs have exactly the times of their trips.
+
+    A timetable shared by requests is never changed, with_trip and
+    without_trip return changed copies to be swapped in its place
+    """
+
+    def __init__(self, stations: dict[int, str], trips) -> None:
+        self.station_ids = list(stations)
+        self.station_names = list(stations.values())
+        self.station_index = {
+            station_id: index
+            for index, station_id in enumerate(self.station_ids)
+        }
+
+        self.departure_stop = array("l")
+        self.arrival_stop = array("l")
+        self.departure = array("q")
+        self.arrival = array("q")
+        self.trip_ids = array("q")
+
+        for trip in sorted(trips, key=lambda trip: trip[3]):
+            self.append_connection(*trip)
+
+    @classmethod
+    def load(cls) -> "Timetable":
+        stations = dict(Station.objects.values_list("id", "name"))
+        trips = Trip.objects.filter(
+            arrival_time__gte=timezone.now()
+        ).order_by().values_list(
+            "id",
+            "route__source_id",
+            "route__destination_id",
+            "departure_time",
+            "arrival_time",
+        )
+        return cls(stations, trips)
+
+    def __len__(self) -> int:
+        return len(self.trip_ids)
+
+    def append_connection(
+        self,
+        trip_id: int,
+        source_id: int,
+        destination_id: int,
+        departure_time: datetime,
+        arrival_time: datetime,
+    ) -> None:
+        self.insert_connection(
+            len(self), trip_id, source_id, destination_id,
+            departure_time, arrival_time,
+        )
+
+    def insert_connection(
+        self,
+        position: int,
+        trip_id: int,
+        source_id: int,
+        destination_id: int,
+        departure_time: datetime,
+        arrival_time: datetime,
+    ) -> None:
+        self.departure_stop.insert(position, self.station_index[source_id])
+        self.arrival_stop.insert(
+            position, self.station_index[destination_id]
+        )
+        self.departure.insert(position, to_microseconds(departure_time))
+        self.arrival.insert(position, to_microseconds(arrival_time))
+        self.trip_ids.insert(position, trip_id)
+
+    def copy(self) -> "Timetable":
+        """Return timetable with own copies of connection arrays"""
+        timetable = copy.copy(self)
+        for name in CONNECTION_COLUMNS:
+            setattr(timetable, name, getattr(self, name)[:])
+
+        return timetable
+
+    def without_trip(self, trip_id: int) -> "Timetable":
+        """Return copy of timetable without connection of trip"""
+        timetable = self.copy()
+        try:
+            position = timetable.trip_ids.index(trip_id)
+        except ValueError:
+            return timetable
+
+        for name in CONNECTION_COLUMNS:
+            del getattr(timetable, name)[position]
+
+        return timetable
+
+    def with_trip(
+        self,
+        trip_id: int,
+        source_id: int,
+        destination_id: int,
+        departure_time: datetime,
+        arrival_time: datetime,
+    ) -> "Timetable | None":
+        """Return copy of timetable with connection of trip replaced,
+        None when timetable does not know route stations and has
+        to be rebuilt"""
+        if (
+            source_id not in self.station_index
+            or destination_id not in self.station_index
+        ):
+            return None
+
+        timetable = self.without_trip(trip_id)
+        position = bisect_right(
+            timetable.departure, to_microseconds(departure_time)
+        )
+        timetable.insert_connection(
+            position, trip_id, source_id, destination_id,
+            departure_time, arrival_time,
+        )
+        return timetable
+
+    def earliest_arrival(
+        self,
+        source_id: int,
+        destination_id: int,
+        depart_after: datetime,
+        min_transfer: timedelta,
+    ) -> Journey | None:
+        """Connection Scan for the journey that arrives first,
+        changing trains at a station takes at least min_transfer"""
+        source = self.station_index.get(source_id)
+        target = self.station_index.get(destination_id)
+        if source is None or target is None or source == target:
+            return None
+
+        transfer = min_transfer // MICROSECOND
+        start = to_microseconds(depart_after)
+
+        arrived = [UNREACHED] * len(self.station_ids)
+        ready = [UNREACHED] * len(self.station_ids)
+        reached_by = [-1] * len(self.station_ids)
+        arrived[source] = ready[source] = start
+
+        departure_stop, arrival_stop = self.departure_stop, self.arrival_stop
+        departure, arrival = self.departure, self.arrival
+
+        for index in range(bisect_left(departure, start), len(departure)):
+            if departure[index] >= arrived[target]:
+                break
+
+            stop = departure_stop[index]
+            if departure[index] < ready[stop]:
+                continue
+
+            next_stop = arrival_stop[index]
+            if arrival[index] < arrived[next_stop]:
+                arrived[next_stop] = arrival[index]
+                ready[next_stop] = arrival[index] + transfer
+                reached_by[next_stop] = index
+
+        if reached_by[target] == -1:
+            return None
+
+        legs = []
+        stop = target
+        while stop != source:
+            index = reached_by[stop]
+            legs.append(self.leg(index))
+            stop = departure_stop[index]
+
+        return Journey(legs=legs[::-1])
+
+    def journeys(
+        self,
+        source_id: int,
+        destination_id: int,
+        depart_after: datetime,
+        min_transfer: timedelta,
+        count: int = 1,
+    ) -> list[Journey]:
+        """Return up to count journeys that are not dominated
+        by others: every next journey departs and arrives later
+        than the previous one"""
+        journeys = []
+        while True:
+            journey = self.earliest_arrival(
+                source_id, destination_id, depart_after, min_transfer
+            )
+            if journey is None:
+                break
+
+            if journeys and journeys[-1].arrival_time == journey.arrival_time:
+                # departs later and arrives at the same time
+                journeys[-1] = journey
+            elif len(journeys) == count:
+                break
+            else:
+                journeys.append(journey)
+
+            depart_after = journey.departure_time + MICROSECOND
+
+        return journeys
+
+    def leg(self, index: int) -> Leg:
+        return Leg(
+            trip=self.trip_ids[index],
+            source=self.station_names[self.departure_stop[index]],
+            destination=self.station_names[self.arrival_stop[index]],
+            departure_time=from_microseconds(self.departure[index]),
+            arrival_time=from_microseconds(self.arrival[index]),
+        )
+
+
+timetable = VersionedValue("timetable", Timetable.load)
+
+
+def get_timetable() -> Timetable:
+    """Return timetable of this process, rebuilt when other
+    process changed trips, routes or stations"""
+    return timetable.get()
+
+
+def invalidate_timetable() -> None:
+    timetable.invalidate()
+
+
+def apply_trip_change(trip_id: int, deleted: bool = False) -> None:
+    """Swap timetable of this process for a copy with the trip
+    saved or deleted, requests already planning on the previous
+    one keep using it. Other processes rebuild theirs"""
+
+    def apply(current: Timetable) -> Timetable | None:
+        trip = None
+        if not deleted:
+            trip = Trip.objects.filter(
+                id=trip_id, arrival_time__gte=timezone.now()
+            ).values_list(
+                "route__source_id",
+                "route__destination_id",
+                "departure_time",
+                "arrival_time",
+            ).first()
+
+        if trip is None:
+            return current.without_trip(trip_id)
+
+        return current.with_trip(trip_id, *trip)
+
+    timetable.update(apply)
@@ -0,0 +1,133 @@
+import json
+from datetime import datetime
+
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import transaction
+
+from train_station_resource import benchmarks
+
+SIZES = {
+    "small": {"stations": 100, "trains": 20, "users": 50, "trips": 500},
+    "medium": {"stations": 1000, "trains": 200, "users": 500, "trips": 5000},
+    "large": {
+        "stations": 5000, "trains": 1000, "users": 5000, "trips": 50000,
+    },
+}
+
+
+class Command(BaseCommand):
+    """Measure API endpoints on generated datasets of several sizes.
+
+    A separate test database is created for the run, every size is
+    generated with generate_dataset inside a transaction that is
+    rolled back after its endpoints are measured. The report is
+    written as JSON, with --baseline p95 latency and queries are
+    compared with an earlier report
+    """
+
+    help = "Benchmark API endpoints against latency and query budgets"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="small,medium",
+            help=f"Comma separated sizes of {', '.join(SIZES)}",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Number of measured calls of every endpoint",
+        )
+        parser.add_argument(
+            "--output",
+            default="benchmark_report.json",
+            help="Path of the JSON report",
+        )
+        parser.add_argument("--baseline", help="Earlier JSON report")
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Exit with error when an endpoint is over budget",
+        )
+
+    def handle(self, *args, **options):
+        sizes = options["sizes"].split(",")
+        unknown = set(sizes) - set(SIZES)
+        if unknown:
+            raise CommandError(f"Unknown sizes: {', '.join(sorted(unknown))}")
+
+        report = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "seed": options["seed"],
+            "repeat": options["repeat"],
+            "sizes": {},
+        }
+
+        with benchmarks.benchmark_database():
+            for size in sizes:
+                report["sizes"][size] = self.run_size(size, options)
+
+        with open(options["output"], "w") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+        self.stdout.write(f"Report written to {options['output']}")
+
+        if options["baseline"]:
+            self.compare(report, options["baseline"])
+
+        over_budget = [
+            f"{size} {name}"
+            for size, result in report["sizes"].items()
+            for name, endpoint in result["endpoints"].items()
+            if not endpoint["within_budget"]
+        ]
+        if over_budget and options["check"]:
+            raise CommandError(f"Over budget: {', '.join(over_budget)}")
+
+    def run_size(self, size: str, options) -> dict:
+        with transaction.atomic():
+            call_command(
+                "generate_dataset",
+                seed=options["seed"],
+                verbosity=0,
+                **SIZES[size],
+            )
+            result = benchmarks.run(options["repeat"])
+            transaction.set_rollback(True)
+
+        for name, endpoint in result["endpoints"].items():
+            self.stdout.write(
+                f"{size} {name}: p50 {endpoint['p50_ms']} ms,"
+                f" p95 {endpoint['p95_ms']} ms,"
+                f" {endpoint['queries']} queries,"
+                f" {endpoint['peak_memory_kb']} KiB"
+                + ("" if endpoint["within_budget"] else ", OVER BUDGET")
+            )
+
+        return result
+
+    def compare(self, report: dict, path: str) -> None:
+        try:
+            with open(path) as file:
+                baseline = json.load(file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f"{path}: {error}")
+
+        for size, result in report["sizes"].items():
+            before = baseline.get("sizes", {}).get(size, {}).get(
+                "endpoints", {}
+            )
+            for name, endpoint in result["endpoints"].items():
+                if name not in before:
+                    continue
+
+                change = (
+                    endpoint["p95_ms"] / before[name]["p95_ms"] - 1
+                    if before[name]["p95_ms"] else 0
+                )
+                queries = endpoint["queries"] - before[name]["queries"]
+                self.stdout.write(
+                    f"{size} {name}: p95 {change:+.0%},"
+                    f" queries {queries:+d} against baseline"
+                )
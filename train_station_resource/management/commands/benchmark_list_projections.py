@@ -0,0 +1,104 @@
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.db.models import F
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from train_station_resource.models import Order, Trip
+from train_station_resource.projections import (
+    OrderListProjection,
+    TripListProjection,
+)
+from train_station_resource.serializers import (
+    OrderListSerializer,
+    TripListSerializer,
+)
+
+
+class Command(BaseCommand):
+    """Compare list serializers with values() projections on pages
+    of existing trips and orders, rendered to JSON"""
+
+    help = "Benchmark list serializers against list projections"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--page-sizes",
+            default="10,50,100,500",
+            help="Comma separated page sizes",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Number of times every page is built",
+        )
+
+    def handle(self, *args, **options):
+        page_sizes = [int(size) for size in options["page_sizes"].split(",")]
+        request = Request(APIRequestFactory().get("/"))
+        renderer = JSONRenderer()
+
+        trips = Trip.objects.select_related(
+            "train", "route__source", "route__destination"
+        ).prefetch_related("crew").annotate(available_tickets=(
+            F("train__cargo_num") * F("train__seats_in_cargo")
+            - F("seats_sold")
+        ))
+        orders = Order.objects.prefetch_related(
+            "tickets__trip__route__source",
+            "tickets__trip__route__destination",
+            "tickets__trip__crew",
+            "tickets__trip__train",
+        )
+
+        benchmarks = [
+            ("trips", trips, TripListSerializer, TripListProjection()),
+            ("orders", orders, OrderListSerializer, OrderListProjection()),
+        ]
+        for name, queryset, serializer_class, projection in benchmarks:
+            if not queryset.exists():
+                self.stdout.write(f"{name}: no rows, skipped")
+                continue
+
+            for size in page_sizes:
+                def serialize():
+                    page = list(queryset[:size])
+                    data = serializer_class(
+                        page, many=True, context={"request": request}
+                    ).data
+                    return renderer.render(data)
+
+                def project():
+                    page = list(projection.rows(queryset)[:size])
+                    return renderer.render(
+                        projection.serialize(page, request)
+                    )
+
+                if serialize() != project():
+                    raise CommandError(
+                        f"{name} page of {size}: projection output differs"
+                    )
+
+                serializer_time = self.measure(serialize, options["repeat"])
+                projection_time = self.measure(project, options["repeat"])
+
+                self.stdout.write(
+                    f"{name} page of {size}: "
+                    f"serializer {serializer_time * 1000:.2f} ms, "
+                    f"projection {projection_time * 1000:.2f} ms, "
+                    f"{serializer_time / projection_time:.1f}x faster"
+                )
+
+    @staticmethod
+    def measure(function, repeat: int) -> float:
+        """Return best time of repeated calls"""
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            best = min(best, time.perf_counter() - start)
+
+        return best
@@ -0,0 +1,106 @@
+import json
+from datetime import datetime, timedelta
+
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import transaction
+
+from train_station_resource import benchmarks
+
+
+class Command(BaseCommand):
+    """Measure "trips from A to B tomorrow" against growing history.
+
+    For every history size a network with that number of past trips
+    is generated with generate_dataset in a separate test database,
+    a few trips departing tomorrow are added to one route and the
+    search of the trip list filters is timed and explained. The
+    plan has to use the (route, departure_time) index, so latency
+    does not grow with the number of past trips
+    """
+
+    help = "Benchmark trip search by route and date as history grows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--histories",
+            default="10000,100000,1000000",
+            help="Comma separated numbers of past trips",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=50,
+            help="Number of measured searches for every history size",
+        )
+        parser.add_argument("--output", help="Path of a JSON report")
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Exit with error when a plan does not use the index",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            histories = [
+                int(size) for size in options["histories"].split(",")
+            ]
+        except ValueError:
+            raise CommandError("--histories must be numbers of trips")
+
+        report = {}
+        with benchmarks.benchmark_database():
+            for history in histories:
+                report[history] = self.run_history(history, options)
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2, sort_keys=True)
+            self.stdout.write(f"Report written to {options['output']}")
+
+        without_index = [
+            str(history)
+            for history, result in report.items()
+            if not result["uses_index"]
+        ]
+        if without_index and options["check"]:
+            raise CommandError(
+                "Trip search does not use the (route, departure_time)"
+                f" index with {', '.join(without_index)} past trips"
+            )
+
+    def run_history(self, history: int, options) -> dict:
+        days = 730
+        start = datetime.combine(
+            datetime.now().date() - timedelta(days=days + 1),
+            datetime.min.time(),
+        )
+        with transaction.atomic():
+            call_command(
+                "generate_dataset",
+                seed=options["seed"],
+                stations=200,
+                trains=100,
+                crew=10,
+                users=1,
+                trips=history,
+                occupancy=0,
+                start=start,
+                days=days,
+                verbosity=0,
+            )
+            result = benchmarks.measure_trip_search(options["repeat"])
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{result['past_trips']} past trips: {result['found']} found,"
+            f" p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms,"
+            + (
+                f" {result['index']} used" if result["uses_index"]
+                else " INDEX NOT USED"
+            )
+        )
+        if options["verbosity"] >= 2:
+            self.stdout.write(result["plan"])
+
+        return result
@@ -0,0 +1,27 @@
+from django.core.management import BaseCommand, CommandError
+
+from train_station_resource.network import RouteNetwork
+
+
+class Command(BaseCommand):
+    """Find routes which distance is longer than
+    a chain of other routes between the same stations"""
+
+    help = "Check that Route.distance values agree with each other"
+
+    def handle(self, *args, **options):
+        inconsistent = list(RouteNetwork.load().inconsistent_routes())
+
+        for route_id, distance, shortest in inconsistent:
+            self.stdout.write(
+                f"Route {route_id}: distance {distance}, "
+                f"but other routes make it in {shortest}"
+            )
+
+        if inconsistent:
+            raise CommandError(
+                f"{len(inconsistent)} routes are longer than "
+                "paths through other stations"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Route distances agree"))
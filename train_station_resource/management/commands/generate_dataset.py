@@ -0,0 +1,443 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from train_station_resource import geo
+from train_station_resource.bulk import insert_rows
+from train_station_resource.models import (
+    Station,
+    Route,
+    TrainType,
+    Train,
+    Crew,
+    Trip,
+    Order,
+    Ticket,
+)
+from train_station_resource.signals import invalidate_all
+
+# generated stations lie inside this box of latitudes and longitudes
+AREA = ((44.0, 55.0), (14.0, 40.0))
+# rail lines are longer than great circle distances
+DETOUR = 1.25
+TRAIN_TYPES = {
+    "Intercity": {"cargo_num": (6, 10), "seats_in_cargo": (50, 80)},
+    "Regional": {"cargo_num": (3, 6), "seats_in_cargo": (60, 100)},
+    "Night": {"cargo_num": (8, 14), "seats_in_cargo": (30, 40)},
+}
+SPEED_KMH = {"Intercity": 140, "Regional": 70, "Night": 90}
+FIRST_NAMES = [
+    "Olena", "Taras", "Iryna", "Andrii", "Maria",
+    "Petro", "Sofia", "Dmytro", "Anna", "Yurii",
+]
+LAST_NAMES = [
+    "Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko",
+    "Kravchenko", "Melnyk", "Boyko", "Moroz", "Lysenko",
+]
+
+
+class Command(BaseCommand):
+    """Fill the database with a generated train network.
+
+    Stations are scattered over AREA and every station is connected
+    to its nearest neighbours in both directions. Trips run on random
+    routes with random trains, every trip has seats sold to random
+    orders with its seat map and sold seats counter filled to match.
+    The same seed and sizes always give the same rows. Rows are
+    written with COPY on PostgreSQL and bulk_create elsewhere, where
+    order and trip timestamps are set to the current time instead
+    """
+
+    help = "Generate a deterministic dataset of any size for benchmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--stations", type=int, default=1000)
+        parser.add_argument(
+            "--neighbours",
+            type=int,
+            default=3,
+            help="Number of nearest stations every station has routes to",
+        )
+        parser.add_argument("--trains", type=int, default=200)
+        parser.add_argument("--crew", type=int, default=500)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--trips", type=int, default=10000)
+        parser.add_argument(
+            "--occupancy",
+            type=float,
+            default=0.5,
+            help="Average share of sold seats of a trip",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Trips depart within this number of days from --start",
+        )
+        parser.add_argument(
+            "--start",
+            type=datetime.fromisoformat,
+            default=datetime(2024, 1, 1),
+            help="Date of the first departures",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="Generated ",
+            help="Prefix of generated station, train and type names",
+        )
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        if options["stations"] < 2 or options["trains"] < 1:
+            raise CommandError("At least 2 stations and 1 train are needed")
+        if not 0 <= options["occupancy"] <= 1:
+            raise CommandError("--occupancy must be between 0 and 1")
+        if Station.objects.filter(
+            name__startswith=options["prefix"]
+        ).exists():
+            raise CommandError(
+                f"Stations named {options['prefix']!r}... already exist,"
+                " use another --prefix"
+            )
+
+        self.options = options
+        self.random = random.Random(options["seed"])
+        self.prefix = options["prefix"]
+        self.now = timezone.now()
+        self.start = options["start"]
+        if settings.USE_TZ:
+            self.start = timezone.make_aware(self.start)
+        self.next_ids = {}
+
+        models = [
+            Station, Route, TrainType, Train, Crew,
+            get_user_model(), Trip, Trip.crew.through, Order, Ticket,
+        ]
+        start = time.perf_counter()
+        with transaction.atomic():
+            for model in models:
+                self.next_ids[model] = (
+                    model.objects.aggregate(last=Max("id"))["last"] or 0
+                ) + 1
+
+            stations = self.generate_stations()
+            routes = self.generate_routes(stations)
+            trains = self.generate_trains()
+            crew = self.generate_crew()
+            users = self.generate_users()
+            self.generate_trips(routes, trains, crew, users)
+
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(
+                    no_style(), models
+                ):
+                    cursor.execute(sql)
+
+        invalidate_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"Dataset generated in {time.perf_counter() - start:.1f}s"
+        ))
+
+    def ids(self, model, count: int) -> range:
+        """Reserve primary keys for count new rows"""
+        first = self.next_ids[model]
+        self.next_ids[model] = first + count
+        return range(first, first + count)
+
+    def insert(
+        self, model, fields: list[str], rows, total: int, report=True
+    ) -> None:
+        inserted = 0
+        for count in insert_rows(
+            model, fields, rows, self.options["batch_size"]
+        ):
+            inserted += count
+            if report:
+                self.progress(
+                    f"{model._meta.verbose_name_plural}: {inserted}/{total}"
+                )
+
+    def progress(self, message: str) -> None:
+        if self.options["verbosity"] >= 1:
+            self.stdout.write(message)
+
+    def generate_stations(self) -> list[tuple[int, float, float]]:
+        (min_lat, max_lat), (min_lon, max_lon) = AREA
+        ids = self.ids(Station, self.options["stations"])
+        stations = [
+            (
+                station_id,
+                round(self.random.uniform(min_lat, max_lat), 5),
+                round(self.random.uniform(min_lon, max_lon), 5),
+            )
+            for station_id in ids
+        ]
+
+        self.insert(
+            Station,
+            ["id", "name", "latitude", "longitude"],
+            (
+                (station_id, f"{self.prefix}Station {number}", lat, lon)
+                for number, (station_id, lat, lon) in enumerate(
+                    stations, start=1
+                )
+            ),
+            len(stations),
+        )
+
+        return stations
+
+    def generate_routes(self, stations) -> list[tuple[int, int]]:
+        """Connect every station with its nearest neighbours, return
+        (route id, distance) of every route"""
+        ids = np.array([station[0] for station in stations])
+        latitudes = np.radians([station[1] for station in stations])
+        longitudes = np.radians([station[2] for station in stations])
+        cos_latitudes = np.cos(latitudes)
+        neighbours = min(self.options["neighbours"], len(stations) - 1)
+
+        pairs = {}
+        for index in range(len(stations)):
+            distances = geo.haversine(
+                latitudes[index],
+                longitudes[index],
+                latitudes,
+                longitudes,
+                cos_latitudes,
+            )
+            distances[index] = np.inf
+            for other in np.argsort(distances, kind="stable")[:neighbours]:
+                distance = max(1, round(float(distances[other]) * DETOUR))
+                pairs[(ids[index], ids[other])] = distance
+                pairs[(ids[other], ids[index])] = distance
+
+        pairs = sorted(pairs.items())
+        route_ids = self.ids(Route, len(pairs))
+        self.insert(
+            Route,
+            ["id", "source_id", "destination_id", "distance"],
+            (
+                (route_id, int(source), int(destination), distance)
+                for route_id, ((source, destination), distance)
+                in zip(route_ids, pairs)
+            ),
+            len(pairs),
+        )
+
+        return [
+            (route_id, distance)
+            for route_id, (_, distance) in zip(route_ids, pairs)
+        ]
+
+    def generate_trains(self) -> list[tuple[int, int, int, int]]:
+        """Return (train id, cargo_num, seats_in_cargo, speed) of trains"""
+        type_ids = dict(
+            zip(TRAIN_TYPES, self.ids(TrainType, len(TRAIN_TYPES)))
+        )
+        self.insert(
+            TrainType,
+            ["id", "name", "description"],
+            (
+                (type_id, f"{self.prefix}{name}", None)
+                for name, type_id in type_ids.items()
+            ),
+            len(type_ids),
+        )
+
+        trains = []
+        for train_id in self.ids(Train, self.options["trains"]):
+            train_type = self.random.choice(list(TRAIN_TYPES))
+            sizes = TRAIN_TYPES[train_type]
+            trains.append((
+                train_id,
+                type_ids[train_type],
+                self.random.randint(*sizes["cargo_num"]),
+                self.random.randint(*sizes["seats_in_cargo"]),
+                SPEED_KMH[train_type],
+            ))
+
+        self.insert(
+            Train,
+            ["id", "name", "train_type_id", "cargo_num", "seats_in_cargo",
+             "image"],
+            (
+                (train_id, f"{self.prefix}Train {number}", type_id,
+                 cargo_num, seats_in_cargo, None)
+                for number, (train_id, type_id, cargo_num, seats_in_cargo, _)
+                in enumerate(trains, start=1)
+            ),
+            len(trains),
+        )
+
+        return [(train[0], *train[2:]) for train in trains]
+
+    def generate_crew(self) -> list[int]:
+        crew_ids = self.ids(Crew, self.options["crew"])
+        self.insert(
+            Crew,
+            ["id", "first_name", "last_name"],
+            (
+                (
+                    crew_id,
+                    self.random.choice(FIRST_NAMES),
+                    self.random.choice(LAST_NAMES),
+                )
+                for crew_id in crew_ids
+            ),
+            len(crew_ids),
+        )
+
+        return list(crew_ids)
+
+    def generate_users(self) -> list[int]:
+        user_model = get_user_model()
+        user_ids = self.ids(user_model, self.options["users"])
+        # hashing is slow, every generated user shares one password
+        password = make_password(f"{self.prefix}password")
+        domain = f"seed{self.options['seed']}.example.com"
+
+        self.insert(
+            user_model,
+            ["id", "password", "email", "first_name", "last_name",
+             "is_staff", "is_active", "is_superuser", "date_joined"],
+            (
+                (user_id, password,
+                 f"{self.prefix.strip().lower()}{user_id}@{domain}",
+                 "", "", False, True, False, self.now)
+                for user_id in user_ids
+            ),
+            len(user_ids),
+        )
+
+        return list(user_ids)
+
+    def generate_trips(self, routes, trains, crew, users) -> None:
+        """Insert trips with their crew, orders and tickets, one
+        chunk of trips at a time to keep memory use flat"""
+        trip_ids = self.ids(Trip, self.options["trips"])
+        chunk_size = max(1, self.options["batch_size"] // 100)
+        window = self.options["days"] * 24 * 60
+        sold = 0
+
+        for first in range(0, len(trip_ids), chunk_size):
+            trips, trip_crew, orders, tickets = [], [], [], []
+
+            for number in range(first, min(first + chunk_size, len(trip_ids))):
+                trip_id = trip_ids[number]
+                route_id, distance = self.random.choice(routes)
+                train_id, cargo_num, seats_in_cargo, speed = (
+                    self.random.choice(trains)
+                )
+                departure = self.start + timedelta(
+                    minutes=self.random.randrange(window)
+                )
+                arrival = departure + timedelta(
+                    minutes=max(10, round(distance / speed * 60))
+                )
+
+                seat_map, seats_sold = self.sell_seats(
+                    number, trip_id, departure, cargo_num, seats_in_cargo,
+                    users, orders, tickets,
+                )
+                trips.append((
+                    trip_id, route_id, train_id, departure, arrival,
+                    seats_sold, seat_map, self.now,
+                ))
+                if crew:
+                    trip_crew.extend(
+                        (trip_id, crew_id)
+                        for crew_id in self.random.sample(
+                            crew, min(2, len(crew))
+                        )
+                    )
+
+            self.insert(
+                Trip,
+                ["id", "route_id", "train_id", "departure_time",
+                 "arrival_time", "seats_sold", "seat_map", "updated_at"],
+                trips,
+                len(trips),
+                report=False,
+            )
+            through = Trip.crew.through
+            self.insert(
+                through,
+                ["id", "trip_id", "crew_id"],
+                (
+                    (link_id, *link) for link_id, link
+                    in zip(self.ids(through, len(trip_crew)), trip_crew)
+                ),
+                len(trip_crew),
+                report=False,
+            )
+            self.insert(
+                Order,
+                ["id", "user_id", "created_at"],
+                orders,
+                len(orders),
+                report=False,
+            )
+            self.insert(
+                Ticket,
+                ["id", "cargo", "seat", "trip_id", "order_id"],
+                tickets,
+                len(tickets),
+                report=False,
+            )
+
+            sold += len(tickets)
+            self.progress(
+                f"trips: {first + len(trips)}/{len(trip_ids)},"
+                f" {sold} tickets"
+            )
+
+    def sell_seats(
+        self, number, trip_id, departure, cargo_num, seats_in_cargo,
+        users, orders, tickets,
+    ) -> tuple[bytes, int]:
+        """Sell random seats of the trip to orders of one to four
+        tickets, return packed seat map and number of sold seats"""
+        capacity = cargo_num * seats_in_cargo
+        # seeded by trip number, not id, to give the same
+        # seats whatever ids earlier rows already took
+        rng = np.random.default_rng([self.options["seed"], number])
+        sold = int(rng.binomial(capacity, self.options["occupancy"]))
+        if not users:
+            sold = 0
+
+        seats = rng.choice(capacity, size=sold, replace=False)
+        taken = np.zeros(capacity, dtype=bool)
+        taken[seats] = True
+        seat_map = np.packbits(taken, bitorder="little").tobytes()
+
+        cargos = (seats // seats_in_cargo + 1).tolist()
+        places = (seats % seats_in_cargo + 1).tolist()
+        ticket_ids = self.ids(Ticket, sold)
+        position = 0
+        while position < sold:
+            size = min(int(rng.integers(1, 5)), sold - position)
+            order_id = self.ids(Order, 1)[0]
+            orders.append((
+                order_id,
+                users[int(rng.integers(len(users)))],
+                departure - timedelta(minutes=int(rng.integers(60, 43200))),
+            ))
+            for index in range(position, position + size):
+                tickets.append((
+                    ticket_ids[index], cargos[index], places[index],
+                    trip_id, order_id,
+                ))
+            position += size
+
+        return seat_map, sold
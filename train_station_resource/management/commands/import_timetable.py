@@ -0,0 +1,321 @@
+import csv
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from train_station_resource import geo, journeys, network, search
+from train_station_resource.bulk import insert_rows
+from train_station_resource.caching import bump_model_version
+from train_station_resource.models import Station, Route, Train, Trip
+
+TRIP_COLUMNS = {
+    "source",
+    "destination",
+    "departure_time",
+    "arrival_time",
+    "train",
+}
+STATION_COLUMNS = {"name", "latitude", "longitude"}
+TRIP_FIELDS = [
+    "route_id",
+    "train_id",
+    "departure_time",
+    "arrival_time",
+    "seats_sold",
+    "seat_map",
+    "updated_at",
+]
+MAX_REPORTED_ERRORS = 20
+
+
+def read_csv(path: str, columns: set[str]) -> list[dict]:
+    try:
+        with open(path, newline="", encoding="utf-8") as file:
+            reader = csv.DictReader(file)
+            missing = columns - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(
+                    f"{path}: missing columns {', '.join(sorted(missing))}"
+                )
+            # short rows get None for missing values
+            return [
+                {
+                    key: (value or "").strip()
+                    for key, value in row.items()
+                    if key is not None
+                }
+                for row in reader
+            ]
+    except OSError as error:
+        raise CommandError(f"{path}: {error}")
+
+
+def to_datetime(value: str):
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(f"invalid date and time {value!r}")
+
+    if settings.USE_TZ and timezone.is_naive(moment):
+        return timezone.make_aware(moment)
+    if not settings.USE_TZ and timezone.is_aware(moment):
+        return timezone.make_naive(moment)
+
+    return moment
+
+
+class Command(BaseCommand):
+    """Load trips from a CSV file with source, destination,
+    departure_time, arrival_time, train and optional distance
+    columns, and stations from an optional CSV file with name,
+    latitude and longitude columns.
+
+    Stations, trains and routes are resolved with one query each,
+    rows are validated before anything is written and trips are
+    inserted in chunks with COPY on PostgreSQL or bulk_create.
+    With --upsert trips of the same train and departure time are
+    updated instead of inserted again. Model signals are not sent,
+    versions of cached data are bumped once at the end
+    """
+
+    help = "Bulk import trips, routes and stations from CSV files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("trips", help="CSV file with trips")
+        parser.add_argument(
+            "--stations",
+            help="CSV file with stations, created or updated by name",
+        )
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Update trips with the same train and departure time",
+        )
+        parser.add_argument(
+            "--skip-invalid",
+            action="store_true",
+            help="Import valid rows when some rows are invalid",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of trips written at once",
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        self.batch_size = options["batch_size"]
+        stations = (
+            read_csv(options["stations"], STATION_COLUMNS)
+            if options["stations"] else []
+        )
+        rows = read_csv(options["trips"], TRIP_COLUMNS)
+
+        with transaction.atomic():
+            if stations:
+                self.import_stations(stations)
+
+            trips, new_routes = self.validate_trips(
+                rows, options["skip_invalid"]
+            )
+            if options["upsert"]:
+                trips = self.update_existing(trips)
+            created = self.insert_trips(trips)
+
+        self.bump_versions(bool(stations), new_routes)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {created} trips, {new_routes} new routes"
+        ))
+
+    def import_stations(self, rows: list[dict]) -> None:
+        stations, errors = {}, []
+        for line, row in enumerate(rows, start=2):
+            try:
+                latitude = float(row["latitude"])
+                longitude = float(row["longitude"])
+            except ValueError:
+                errors.append((line, "invalid coordinates"))
+                continue
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                errors.append((line, "coordinates out of range"))
+                continue
+            # one insert can not update the same row twice
+            stations[row["name"]] = Station(
+                name=row["name"],
+                latitude=latitude,
+                longitude=longitude,
+            )
+
+        self.check_errors("stations", errors, skip_invalid=False)
+        Station.objects.bulk_create(
+            stations.values(),
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=["latitude", "longitude"],
+        )
+        self.progress(f"Stations: {len(stations)} created or updated")
+
+    def validate_trips(
+        self, rows: list[dict], skip_invalid: bool
+    ) -> tuple[list[tuple], int]:
+        """Return (route_id, train_id, departure, arrival) of valid rows
+        and number of created routes"""
+        station_ids = dict(Station.objects.filter(name__in={
+            row[column] for row in rows for column in ("source", "destination")
+        }).values_list("name", "id"))
+        train_ids = dict(Train.objects.filter(
+            name__in={row["train"] for row in rows}
+        ).values_list("name", "id"))
+        route_ids = {
+            (source_id, destination_id): route_id
+            for route_id, source_id, destination_id
+            in Route.objects.values_list("id", "source_id", "destination_id")
+        }
+
+        valid, errors, distances = [], [], {}
+        for line, row in enumerate(rows, start=2):
+            source = station_ids.get(row["source"])
+            destination = station_ids.get(row["destination"])
+            train = train_ids.get(row["train"])
+            try:
+                departure = to_datetime(row["departure_time"])
+                arrival = to_datetime(row["arrival_time"])
+            except ValueError as error:
+                errors.append((line, str(error)))
+                continue
+
+            stations = (source, destination)
+            distance = row.get("distance", "")
+
+            if source is None or destination is None:
+                errors.append((line, "unknown station"))
+            elif source == destination:
+                errors.append((line, "source and destination are the same"))
+            elif train is None:
+                errors.append((line, f"unknown train {row['train']!r}"))
+            elif arrival <= departure:
+                errors.append((line, "arrival is not after departure"))
+            elif stations in route_ids or stations in distances:
+                valid.append((stations, train, departure, arrival))
+            elif distance.isdigit() and int(distance) > 0:
+                # distance is needed only in the first row of a new route
+                distances[stations] = int(distance)
+                valid.append((stations, train, departure, arrival))
+            else:
+                errors.append((line, "distance of new route is missing"))
+
+        self.check_errors("trips", errors, skip_invalid)
+
+        if distances:
+            Route.objects.bulk_create(
+                [
+                    Route(
+                        source_id=source,
+                        destination_id=destination,
+                        distance=distance,
+                    )
+                    for (source, destination), distance in distances.items()
+                ],
+                batch_size=self.batch_size,
+            )
+            route_ids = {
+                (source_id, destination_id): route_id
+                for route_id, source_id, destination_id
+                in Route.objects.values_list(
+                    "id", "source_id", "destination_id"
+                )
+            }
+
+        trips = [
+            (route_ids[stations], train, departure, arrival)
+            for stations, train, departure, arrival in valid
+        ]
+
+        return trips, len(distances)
+
+    def update_existing(self, trips: list[tuple]) -> list[tuple]:
+        """Update trips that already exist with the same train
+        and departure time, return trips that are still new"""
+        if not trips:
+            return trips
+
+        # the last row of the same train and departure wins
+        by_key = {(trip[1], trip[2]): trip for trip in trips}
+        existing = Trip.objects.filter(
+            train_id__in={trip[1] for trip in trips},
+            departure_time__gte=min(trip[2] for trip in trips),
+            departure_time__lte=max(trip[2] for trip in trips),
+        ).values_list(
+            "id", "train_id", "departure_time", "route_id", "arrival_time"
+        )
+
+        changed, now = [], timezone.now()
+        for trip_id, train, departure, route, arrival in existing:
+            trip = by_key.pop((train, departure), None)
+            if trip is not None and (route, arrival) != (trip[0], trip[3]):
+                changed.append(Trip(
+                    id=trip_id,
+                    route_id=trip[0],
+                    arrival_time=trip[3],
+                    updated_at=now,
+                ))
+
+        Trip.objects.bulk_update(
+            changed,
+            ["route", "arrival_time", "updated_at"],
+            batch_size=self.batch_size,
+        )
+        self.progress(f"Trips: {len(changed)} updated")
+
+        return list(by_key.values())
+
+    def insert_trips(self, trips: list[tuple]) -> int:
+        now = timezone.now()
+        rows = (trip + (0, b"", now) for trip in trips)
+
+        created, start = 0, time.perf_counter()
+        for count in insert_rows(Trip, TRIP_FIELDS, rows, self.batch_size):
+            created += count
+            rate = created / max(time.perf_counter() - start, 1e-6)
+            self.progress(
+                f"Trips: {created}/{len(trips)} inserted, {rate:.0f} rows/s"
+            )
+
+        return created
+
+    def check_errors(self, name, errors, skip_invalid: bool) -> None:
+        for line, message in errors[:MAX_REPORTED_ERRORS]:
+            self.stderr.write(f"{name} line {line}: {message}")
+        if len(errors) > MAX_REPORTED_ERRORS:
+            self.stderr.write(
+                f"... and {len(errors) - MAX_REPORTED_ERRORS} more errors"
+            )
+
+        if errors and not skip_invalid:
+            raise CommandError(
+                f"{len(errors)} invalid {name} rows, nothing imported"
+            )
+
+    def progress(self, message: str) -> None:
+        if self.verbosity >= 1:
+            self.stdout.write(message)
+
+    @staticmethod
+    def bump_versions(stations_changed: bool, new_routes: int) -> None:
+        """Do what model signals would do for saved objects"""
+        bump_model_version(Trip)
+        journeys.invalidate_timetable()
+
+        if new_routes:
+            bump_model_version(Route)
+            network.invalidate_network()
+
+        if stations_changed:
+            bump_model_version(Station)
+            geo.invalidate_station_index()
+            search.invalidate_station_names()
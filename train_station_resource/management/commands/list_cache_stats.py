@@ -0,0 +1,19 @@
+from django.core.management import BaseCommand
+
+from train_station_resource.caching import get_cache_stats
+
+
+class Command(BaseCommand):
+    """Print hits and misses of cached list responses"""
+
+    help = "Show list response cache hits and misses"
+
+    def handle(self, *args, **options):
+        for name, stats in get_cache_stats().items():
+            requests = stats["hit"] + stats["miss"]
+            ratio = stats["hit"] / requests if requests else 0
+
+            self.stdout.write(
+                f"{name}: {stats['hit']} hits, {stats['miss']} misses, "
+                f"hit ratio {ratio:.1%}"
+            )
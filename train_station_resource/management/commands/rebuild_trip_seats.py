@@ -0,0 +1,88 @@
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from train_station_resource.caching import bump_model_version
+from train_station_resource.models import Trip, Ticket
+from train_station_resource.seat_map import SeatMap
+
+
+class Command(BaseCommand):
+    """Compare stored trip seat maps and sold seats counters
+    with real trip tickets and rebuild the ones that drifted"""
+
+    help = "Check and rebuild Trip.seat_map and Trip.seats_sold"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report drifted trips, exit with error if any",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of trips checked in one transaction",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        trip_ids = list(Trip.objects.values_list("id", flat=True))
+        drifted = 0
+
+        for start in range(0, len(trip_ids), chunk_size):
+            with transaction.atomic():
+                drifted += self.sync_trips(
+                    trip_ids[start:start + chunk_size],
+                    check=options["check"],
+                )
+
+        if options["check"]:
+            if drifted:
+                raise CommandError(f"{drifted} trips are out of sync")
+            self.stdout.write(self.style.SUCCESS("All trips in sync"))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {drifted} trips"))
+
+    def sync_trips(self, trip_ids: list[int], check: bool) -> int:
+        trips = Trip.lock_for_booking(trip_ids)
+        places = {trip_id: [] for trip_id in trips}
+        tickets = Ticket.objects.filter(trip_id__in=trips).values_list(
+            "trip_id", "cargo", "seat"
+        )
+        for trip_id, cargo, seat in tickets:
+            places[trip_id].append((cargo, seat))
+
+        drifted = []
+        for trip in trips.values():
+            seat_map = SeatMap.from_places(
+                trip.train.cargo_num,
+                trip.train.seats_in_cargo,
+                places[trip.id],
+            )
+            stored_map = trip.get_seat_map()
+
+            if (
+                stored_map.to_bytes() != seat_map.to_bytes()
+                or trip.seats_sold != seat_map.taken_count()
+            ):
+                self.stdout.write(
+                    f"Trip {trip.id}: stored {trip.seats_sold} sold seats"
+                    f" ({stored_map.taken_count()} in seat map), "
+                    f"tickets {len(places[trip.id])}"
+                )
+                trip.seat_map = seat_map.to_bytes()
+                trip.seats_sold = seat_map.taken_count()
+                trip.updated_at = timezone.now()
+                drifted.append(trip)
+
+        if not check:
+            Trip.objects.bulk_update(
+                drifted, ["seat_map", "seats_sold", "updated_at"]
+            )
+            if drifted:
+                transaction.on_commit(lambda: bump_model_version(Trip))
+
+        return len(drifted)
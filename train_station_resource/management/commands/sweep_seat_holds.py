@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+
+from train_station_resource.bookings import sweep_expired_holds
+
+
+class Command(BaseCommand):
+    """Delete all expired seat holds in bulk"""
+
+    help = "Delete expired seat holds"
+
+    def handle(self, *args, **options):
+        deleted = sweep_expired_holds()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired seat holds"
+        ))
@@ -0,0 +1,188 @@
+"""Request, database, cache, throttle and booking metrics
+in Prometheus text format.
+
+Counters and histograms live in prometheus_client, with several
+workers PROMETHEUS_MULTIPROC_DIR has to point at an empty directory
+shared by all of them before they start, every worker then writes
+its values to memory mapped files there and the metrics view sums
+them. List cache hits and misses are already counted in the shared
+cache and are read from it when metrics are scraped.
+
+The endpoint is served only with METRICS_TOKEN set, to requests
+with that token as a bearer token
+"""
+import hmac
+import os
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from .caching import get_cache_stats
+from .profiling import QueryTimer
+
+VIEW_LABELS = ["view", "action"]
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float("inf"))
+
+REQUESTS = Counter(
+    "train_station_http_requests",
+    "Requests by view, action and response status",
+    VIEW_LABELS + ["method", "status"],
+)
+LATENCY = Histogram(
+    "train_station_http_request_duration_seconds",
+    "Time from the first middleware to the response",
+    VIEW_LABELS,
+)
+QUERIES = Histogram(
+    "train_station_http_request_queries",
+    "Database queries of one request",
+    VIEW_LABELS,
+    buckets=QUERY_BUCKETS,
+)
+DB_TIME = Histogram(
+    "train_station_http_request_db_duration_seconds",
+    "Time spent in database queries of one request",
+    VIEW_LABELS,
+)
+THROTTLED = Counter(
+    "train_station_throttled_requests",
+    "Requests rejected by throttles",
+    ["scope"],
+)
+ORDERS = Counter("train_station_orders_created", "Committed orders")
+TICKETS = Counter("train_station_tickets_created", "Committed tickets")
+
+
+class ListCacheCollector:
+    """Hits, misses and hit ratio of cached list views"""
+
+    def describe(self):
+        # nothing is read from the cache when registered
+        return [
+            CounterMetricFamily(
+                "train_station_list_cache_requests",
+                "Cached list requests by outcome",
+            ),
+            GaugeMetricFamily(
+                "train_station_list_cache_hit_ratio",
+                "Share of cached list requests served from the cache",
+            ),
+        ]
+
+    def collect(self):
+        requests = CounterMetricFamily(
+            "train_station_list_cache_requests",
+            "Cached list requests by outcome",
+            labels=["view", "outcome"],
+        )
+        ratio = GaugeMetricFamily(
+            "train_station_list_cache_hit_ratio",
+            "Share of cached list requests served from the cache",
+            labels=["view"],
+        )
+        for name, counts in get_cache_stats().items():
+            for outcome, value in counts.items():
+                requests.add_metric([name, outcome], value)
+            total = counts["hit"] + counts["miss"]
+            ratio.add_metric([name], counts["hit"] / total if total else 0)
+
+        return [requests, ratio]
+
+
+LIST_CACHE = ListCacheCollector()
+REGISTRY.register(LIST_CACHE)
+
+
+def record_order(tickets: int) -> None:
+    ORDERS.inc()
+    TICKETS.inc(tickets)
+
+
+def view_labels(request) -> tuple[str, str]:
+    """Return view class and action of the resolved view"""
+    view, action = getattr(request, "metrics_view", (None, None))
+    if view is not None:
+        return view, action
+
+    match = getattr(request, "resolver_match", None)
+    return (match.view_name if match else "unmatched"), request.method
+
+
+def metrics_registry() -> CollectorRegistry:
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(LIST_CACHE)
+
+    return registry
+
+
+def metrics_view(request):
+    if not settings.METRICS_TOKEN:
+        raise Http404
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(
+        " "
+    )
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        response = HttpResponse(status=401)
+        response["WWW-Authenticate"] = 'Bearer realm="metrics"'
+        return response
+
+    return HttpResponse(
+        generate_latest(metrics_registry()),
+        content_type=CONTENT_TYPE_LATEST,
+    )
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        if not settings.METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        view, action = view_labels(request)
+        REQUESTS.labels(
+            view, action, request.method, response.status_code
+        ).inc()
+        LATENCY.labels(view, action).observe(duration)
+        QUERIES.labels(view, action).observe(queries.count)
+        DB_TIME.labels(view, action).observe(queries.duration)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "cls", None)
+        if view_class is not None:
+            actions = getattr(view_func, "actions", None) or {}
+            request.metrics_view = (
+                view_class.__name__,
+                actions.get(request.method.lower(), request.method),
+            )
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.6 on 2026-10-18 04:28
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_seats_sold(apps, schema_editor):
+    Trip = apps.get_model("train_station_resource", "Trip")
+    Ticket = apps.get_model("train_station_resource", "Ticket")
+
+    tickets_count = (
+        Ticket.objects.filter(trip=OuterRef("pk"))
+        .order_by()
+        .values("trip")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Trip.objects.update(seats_sold=Coalesce(Subquery(tickets_count), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("train_station_resource", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trip",
+            name="seats_sold",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_seats_sold, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.6 on 2026-10-18 05:02
+
+from django.db import migrations, models
+
+from train_station_resource.seat_map import SeatMap
+
+
+def fill_seat_map(apps, schema_editor):
+    Trip = apps.get_model("train_station_resource", "Trip")
+    Ticket = apps.get_model("train_station_resource", "Ticket")
+
+    trips = Trip.objects.select_related("train").only(
+        "id", "train__cargo_num", "train__seats_in_cargo"
+    )
+    for trip in trips.iterator(chunk_size=500):
+        seat_map = SeatMap.from_places(
+            trip.train.cargo_num,
+            trip.train.seats_in_cargo,
+            Ticket.objects.filter(trip_id=trip.id).values_list(
+                "cargo", "seat"
+            ),
+        )
+        trip.seat_map = seat_map.to_bytes()
+        trip.seats_sold = seat_map.taken_count()
+        trip.save(update_fields=["seat_map", "seats_sold"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("train_station_resource", "0002_trip_seats_sold"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trip",
+            name="seat_map",
+            field=models.BinaryField(default=bytes, editable=False),
+        ),
+        migrations.RunPython(fill_seat_map, migrations.RunPython.noop),
+    ]
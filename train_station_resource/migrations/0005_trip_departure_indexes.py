@@ -0,0 +1,36 @@
+# Generated by Django 4.2.6 on 2026-10-18 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("train_station_resource", "0004_seathold"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="trip",
+            name="train_stati_route_i_8dfa54_idx",
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["route", "departure_time"],
+                name="train_stati_route_i_ee288b_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["train", "departure_time"],
+                name="train_stati_train_i_409db1_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["departure_time", "id"], name="train_stati_departu_a3ea43_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.6 on 2026-10-18 08:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("train_station_resource", "0005_trip_departure_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trip",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
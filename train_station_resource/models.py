@@ -2,10 +2,13 @@ import os
 import uuid
 
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 from django.utils.text import slugify
 
+from .seat_map import SeatMap
+
 
 class Station(models.Model):
     name = models.CharField(unique=True, max_length=255)
@@ -119,6 +122,53 @@ class Train(models.Model):
     def capacity(self) -> int:
         return self.cargo_num * self.seats_in_cargo
 
+    def rebuild_trip_seat_maps(self) -> None:
+        """Lay seat maps of all trips of the train out for its
+        current cargos and seats, trips are locked until the end
+        of current transaction"""
+        trips = Trip.lock_for_booking(
+            self.trips.values_list("id", flat=True)
+        )
+        places = {trip_id: [] for trip_id in trips}
+        for trip_id, cargo, seat in Ticket.objects.filter(
+            trip_id__in=trips
+        ).values_list("trip_id", "cargo", "seat"):
+            places[trip_id].append((cargo, seat))
+
+        now = timezone.now()
+        for trip in trips.values():
+            seat_map = SeatMap.from_places(
+                self.cargo_num, self.seats_in_cargo, places[trip.id]
+            )
+            trip.seat_map = seat_map.to_bytes()
+            trip.seats_sold = seat_map.taken_count()
+            trip.updated_at = now
+
+        Trip.objects.bulk_update(
+            trips.values(), ["seat_map", "seats_sold", "updated_at"]
+        )
+
+    def save(
+        self,
+        force_insert=False,
+        force_update=False,
+        using=None,
+        update_fields=None,
+    ):
+        layout = (self.cargo_num, self.seats_in_cargo)
+        old_layout = None
+        if not self._state.adding:
+            old_layout = Train.objects.filter(pk=self.pk).values_list(
+                "cargo_num", "seats_in_cargo"
+            ).first()
+
+        with transaction.atomic(using=using):
+            super().save(force_insert, force_update, using, update_fields)
+
+            if old_layout not in (None, layout):
+                # seat maps of trips are laid out for the old grid
+                self.rebuild_trip_seat_maps()
+
     def __str__(self) -> str:
         return self.name
 
@@ -153,13 +203,102 @@ class Trip(models.Model):
     )
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
+    seats_sold = models.PositiveIntegerField(default=0, editable=False)
+    seat_map = models.BinaryField(default=bytes, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["departure_time"]
         indexes = [
-            models.Index(fields=["route"])
+            models.Index(fields=["route", "departure_time"]),
+            models.Index(fields=["train", "departure_time"]),
+            models.Index(fields=["departure_time", "id"]),
         ]
 
+    @staticmethod
+    def lock_for_booking(trip_ids) -> dict[int, "Trip"]:
+        """Return trips with their trains and lock trip rows
+        until the end of current transaction"""
+        return Trip.objects.select_for_update(
+            of=("self",)
+        ).select_related("train").in_bulk(trip_ids)
+
+    @staticmethod
+    def touch(trip_ids) -> None:
+        """Set updated_at of trips whose seat holds changed"""
+        Trip.objects.filter(pk__in=trip_ids).update(
+            updated_at=timezone.now()
+        )
+
+    def get_seat_map(self) -> SeatMap:
+        return SeatMap(
+            self.train.cargo_num,
+            self.train.seats_in_cargo,
+            self.seat_map,
+        )
+
+    def set_places(self, places, taken: bool = True) -> None:
+        """Mark (cargo, seat) places as taken or free and store seat map
+        with sold seats counter, trip has to be locked by the caller"""
+        seat_map = self.get_seat_map()
+        for cargo, seat in places:
+            if seat_map.contains(cargo, seat):
+                if taken:
+                    seat_map.take(cargo, seat)
+                else:
+                    seat_map.release(cargo, seat)
+
+        self.seat_map = seat_map.to_bytes()
+        self.seats_sold = seat_map.taken_count()
+        self.save(update_fields=["seat_map", "seats_sold", "updated_at"])
+
+    def rebuild_seat_map(self) -> None:
+        """Recalculate seat map and sold seats from trip tickets"""
+        seat_map = SeatMap.from_places(
+            self.train.cargo_num,
+            self.train.seats_in_cargo,
+            Ticket.objects.filter(trip_id=self.pk).values_list(
+                "cargo", "seat"
+            ),
+        )
+        self.seat_map = seat_map.to_bytes()
+        self.seats_sold = seat_map.taken_count()
+
+    def save(
+        self,
+        force_insert=False,
+        force_update=False,
+        using=None,
+        update_fields=None,
+    ):
+        if not self._state.adding and update_fields is None:
+            old_train_id = Trip.objects.filter(
+                pk=self.pk
+            ).values_list("train_id", flat=True).first()
+
+            if old_train_id not in (None, self.train_id):
+                # seat layout changed together with the train
+                with transaction.atomic(using=using):
+                    Trip.lock_for_booking([self.pk])
+                    self.rebuild_seat_map()
+                    return super().save(
+                        force_insert, force_update, using, update_fields
+                    )
+
+            if old_train_id is not None:
+                # seat map and sold seats of this instance may be stale,
+                # they are written only by set_places of a locked trip
+                update_fields = [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key
+                    and field.name not in ("seat_map", "seats_sold")
+                ]
+
+        return super().save(
+            force_insert, force_update, using, update_fields
+        )
+
     def __str__(self) -> str:
         return f"{self.route.string_repr}"
 
@@ -215,6 +354,49 @@ class Ticket(models.Model):
                     }
                 )
 
+    @staticmethod
+    def validate_tickets_are_free(
+            tickets: list[dict],
+            error_to_raise,
+            held_places: set = frozenset(),
+    ):
+        """Check a whole set of tickets at once: no seat may be
+        repeated inside the set, already be taken on its trip
+        or be in held_places of (trip id, cargo, seat)"""
+        requested = set()
+        seat_maps = {}
+        for ticket in tickets:
+            trip = ticket["trip"]
+            cargo, seat = ticket["cargo"], ticket["seat"]
+
+            if (trip.id, cargo, seat) in requested:
+                raise error_to_raise(
+                    {
+                        "tickets": f"Seat {seat} in cargo "
+                        f"{cargo} is repeated in the order"
+                    }
+                )
+            requested.add((trip.id, cargo, seat))
+
+            if trip.id not in seat_maps:
+                seat_maps[trip.id] = trip.get_seat_map()
+
+            if seat_maps[trip.id].is_taken(cargo, seat):
+                raise error_to_raise(
+                    {
+                        "tickets": f"Seat {seat} in cargo {cargo} "
+                        f"is already taken on trip {trip.id}"
+                    }
+                )
+
+            if (trip.id, cargo, seat) in held_places:
+                raise error_to_raise(
+                    {
+                        "tickets": f"Seat {seat} in cargo {cargo} "
+                        f"is held by another customer on trip {trip.id}"
+                    }
+                )
+
     def clean(self):
         Ticket.validate_ticket(
             self.cargo,
@@ -232,9 +414,29 @@ class Ticket(models.Model):
     ):
         self.full_clean()
 
-        return super().save(
-            force_insert, force_update, using, update_fields
-        )
+        with transaction.atomic():
+            old_place = None
+            if not self._state.adding:
+                old_place = Ticket.objects.filter(
+                    pk=self.pk
+                ).values_list("trip_id", "cargo", "seat").first()
+
+            super().save(
+                force_insert, force_update, using, update_fields
+            )
+
+            new_place = (self.trip_id, self.cargo, self.seat)
+            if old_place != new_place:
+                trip_ids = {self.trip_id}
+                if old_place:
+                    trip_ids.add(old_place[0])
+
+                trips = Trip.lock_for_booking(trip_ids)
+                if old_place:
+                    trips[old_place[0]].set_places(
+                        [old_place[1:]], taken=False
+                    )
+                trips[self.trip_id].set_places([new_place[1:]])
 
     def __str__(self) -> str:
         return (
@@ -244,3 +446,53 @@ class Ticket(models.Model):
     class Meta:
         unique_together = ["cargo", "seat", "trip"]
         ordering = ["cargo", "seat"]
+
+
+class SeatHold(models.Model):
+    """Seat reserved for a user until expires_at
+    while they are completing their order"""
+    cargo = models.PositiveIntegerField()
+    seat = models.PositiveIntegerField()
+    trip = models.ForeignKey(
+        Trip,
+        on_delete=models.CASCADE,
+        related_name="holds",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ["cargo", "seat", "trip"]
+        ordering = ["cargo", "seat"]
+        indexes = [
+            models.Index(fields=["expires_at"])
+        ]
+
+    def save(
+        self,
+        force_insert=False,
+        force_update=False,
+        using=None,
+        update_fields=None,
+    ):
+        with transaction.atomic(using=using):
+            super().save(force_insert, force_update, using, update_fields)
+            Trip.touch([self.trip_id])
+
+    def delete(self, using=None, keep_parents=False):
+        with transaction.atomic(using=using):
+            deleted = super().delete(using, keep_parents)
+            Trip.touch([self.trip_id])
+
+        return deleted
+
+    def __str__(self) -> str:
+        return (
+            f"{str(self.trip)} (cargo: {self.cargo}, seat: {self.seat}) "
+            f"held until {self.expires_at}"
+        )
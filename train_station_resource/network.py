@@ -0,0 +1,162 @@
+import functools
+import heapq
+from array import array
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from .models import Route
+from .versions import VersionedValue
+
+UNREACHED = 2 ** 62
+
+
+@dataclass
+class Path:
+    distance: int
+    stations: list[int]
+    routes: list[int]
+
+
+class RouteNetwork:
+    """Directed graph of routes in compressed sparse row arrays.
+
+    Edges leaving station with index i are stored in positions
+    offsets[i]:offsets[i + 1] of targets, distances and route_ids.
+    Shortest path trees of the ROUTE_NETWORK_TREE_CACHE_SIZE most
+    recently queried source stations are kept for networks up to
+    ROUTE_NETWORK_ALL_PAIRS_LIMIT stations, larger networks run
+    Dijkstra per query stopping at the destination
+    """
+
+    def __init__(self, routes) -> None:
+        routes = sorted(routes, key=lambda route: route[1])
+        station_ids = sorted(
+            {route[1] for route in routes} | {route[2] for route in routes}
+        )
+        self.station_ids = station_ids
+        self.station_index = {
+            station_id: index for index, station_id in enumerate(station_ids)
+        }
+
+        self.offsets = array("l", [0] * (len(station_ids) + 1))
+        self.sources = array("l")
+        self.targets = array("l")
+        self.distances = array("q")
+        self.route_ids = array("q")
+
+        for route_id, source_id, destination_id, distance in routes:
+            self.offsets[self.station_index[source_id] + 1] += 1
+            self.sources.append(self.station_index[source_id])
+            self.targets.append(self.station_index[destination_id])
+            self.distances.append(distance)
+            self.route_ids.append(route_id)
+
+        for index in range(len(station_ids)):
+            self.offsets[index + 1] += self.offsets[index]
+
+        self.keep_trees = (
+            len(station_ids) <= settings.ROUTE_NETWORK_ALL_PAIRS_LIMIT
+        )
+        self.shortest_tree = functools.lru_cache(
+            maxsize=settings.ROUTE_NETWORK_TREE_CACHE_SIZE
+        )(self.build_tree)
+
+    @classmethod
+    def load(cls) -> "RouteNetwork":
+        return cls(
+            Route.objects.order_by().values_list(
+                "id", "source_id", "destination_id", "distance"
+            )
+        )
+
+    def dijkstra(
+        self, source: int, target: int | None = None
+    ) -> tuple[list[int], list[int]]:
+        """Return distances from source and edge used to reach
+        every station, stop early once target is settled"""
+        distance = [UNREACHED] * len(self.station_ids)
+        reached_by = [-1] * len(self.station_ids)
+        distance[source] = 0
+        queue = [(0, source)]
+
+        offsets, targets = self.offsets, self.targets
+        distances = self.distances
+
+        while queue:
+            current, station = heapq.heappop(queue)
+            if current > distance[station]:
+                continue
+            if station == target:
+                break
+
+            for edge in range(offsets[station], offsets[station + 1]):
+                candidate = current + distances[edge]
+                next_station = targets[edge]
+
+                if candidate < distance[next_station]:
+                    distance[next_station] = candidate
+                    reached_by[next_station] = edge
+                    heapq.heappush(queue, (candidate, next_station))
+
+        return distance, reached_by
+
+    def build_tree(self, source: int) -> tuple[array, array]:
+        """Shortest path tree of source in arrays, which take a fixed
+        8 bytes per station unlike lists of int objects"""
+        distance, reached_by = self.dijkstra(source)
+
+        return array("q", distance), array("l", reached_by)
+
+    def shortest_path(
+        self, source_id: int, destination_id: int
+    ) -> Path | None:
+        source = self.station_index.get(source_id)
+        target = self.station_index.get(destination_id)
+        if source is None or target is None:
+            return None
+
+        if self.keep_trees:
+            distance, reached_by = self.shortest_tree(source)
+        else:
+            distance, reached_by = self.dijkstra(source, target)
+
+        if distance[target] == UNREACHED:
+            return None
+
+        stations, routes = [target], []
+        while stations[-1] != source:
+            edge = reached_by[stations[-1]]
+            routes.append(self.route_ids[edge])
+            stations.append(self.sources[edge])
+
+        return Path(
+            distance=distance[target],
+            stations=[self.station_ids[index] for index in stations[::-1]],
+            routes=routes[::-1],
+        )
+
+    def inconsistent_routes(self):
+        """Yield (route id, distance, shortest distance) of routes
+        that are longer than a path through other stations"""
+        for source in range(len(self.station_ids)):
+            # every tree is needed once, cached ones are left alone
+            distance, _ = self.dijkstra(source)
+
+            for edge in range(
+                self.offsets[source], self.offsets[source + 1]
+            ):
+                shortest = distance[self.targets[edge]]
+                if shortest < self.distances[edge]:
+                    yield self.route_ids[edge], self.distances[edge], shortest
+
+
+network = VersionedValue("route_network", RouteNetwork.load)
+
+
+def get_network() -> RouteNetwork:
+    return network.get()
+
+
+def invalidate_network() -> None:
+    network.invalidate()
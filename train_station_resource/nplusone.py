@@ -0,0 +1,111 @@
+"""Detection of N+1 queries in API views and admin changelists.
+
+Queries are fingerprinted by their SQL with literals and lists of
+parameters collapsed, when the same fingerprint runs more than
+NPLUSONE_THRESHOLD times in one request the call stack is searched
+for the serializer field or admin list_display column that ran it.
+Offending statements are logged as warnings after the response, or
+raised as NPlusOneError right away with NPLUSONE_RAISE, which is
+meant for tests
+"""
+import logging
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.fields import Field
+
+logger = logging.getLogger(__name__)
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+PARAMETER_LISTS = re.compile(r"\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)")
+SPACES = re.compile(r"\s+")
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def fingerprint(sql: str) -> str:
+    """Return shape of statement shared by queries of different rows"""
+    sql = LITERALS.sub("?", sql)
+    sql = PARAMETER_LISTS.sub("(...)", sql)
+
+    return SPACES.sub(" ", sql).strip()
+
+
+def query_source() -> str:
+    """Name the innermost serializer field or admin column
+    in the call stack"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        owner = frame.f_locals.get("self")
+        if isinstance(owner, Field) and owner.field_name:
+            return f"{type(owner.parent).__name__}.{owner.field_name}"
+        if frame.f_code.co_name == "lookup_field" and (
+            "model_admin" in frame.f_locals
+        ):
+            model_admin = frame.f_locals["model_admin"]
+            return f"{type(model_admin).__name__}.{frame.f_locals['name']}"
+        frame = frame.f_back
+
+    return "unknown"
+
+
+class QueryRepeatDetector:
+    """execute_wrapper counting queries of every fingerprint"""
+
+    def __init__(self, threshold: int, raise_error: bool):
+        self.threshold = threshold
+        self.raise_error = raise_error
+        self.counts = Counter()
+        self.sources = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = fingerprint(sql)
+        self.counts[shape] += 1
+        if self.counts[shape] == self.threshold + 1:
+            self.sources[shape] = query_source()
+            if self.raise_error:
+                raise NPlusOneError(self.message(shape))
+
+        return execute(sql, params, many, context)
+
+    def message(self, shape: str) -> str:
+        return (
+            f"{self.counts[shape]} queries from {self.sources[shape]}: "
+            f"{shape}"
+        )
+
+    def report(self, label: str) -> None:
+        for shape in self.sources:
+            logger.warning("N+1 in %s, %s", label, self.message(shape))
+
+
+@contextmanager
+def detect_n_plus_one(label: str = "block", threshold=None, raise_error=None):
+    """Watch queries on every database connection inside the block"""
+    detector = QueryRepeatDetector(
+        settings.NPLUSONE_THRESHOLD if threshold is None else threshold,
+        settings.NPLUSONE_RAISE if raise_error is None else raise_error,
+    )
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(detector))
+        yield detector
+    detector.report(label)
+
+
+class NPlusOneMiddleware:
+    def __init__(self, get_response):
+        if not settings.NPLUSONE_DETECTION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with detect_n_plus_one(f"{request.method} {request.path}"):
+            return self.get_response(request)
@@ -1,6 +1,164 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    PageNumberPagination,
+    CursorPagination,
+    _reverse_ordering,
+)
 
 
 class CustomPagination(PageNumberPagination):
     page_size = 10
     max_page_size = 50
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination that always ends ordering with id and keeps
+    values of every ordering field in the cursor.
+
+    Positions are unique, so the next page is filtered with
+    (a, b, id) > (x, y, z) written as OR of prefixes and cursors never
+    carry an offset, unlike CursorPagination, which positions on the
+    first field only and skips rows sharing its value with OFFSET
+    """
+
+    page_size = 10
+    max_page_size = 50
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+
+        if not {"id", "-id", "pk", "-pk"} & set(ordering):
+            tiebreaker = "-id" if ordering[0].startswith("-") else "id"
+            ordering += (tiebreaker,)
+
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            reverse, current_position = (
+                self.cursor.reverse, self.cursor.position
+            )
+
+        ordering = (
+            _reverse_ordering(self.ordering) if reverse else self.ordering
+        )
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            values = self.decode_position(current_position)
+            try:
+                queryset = queryset.filter(self.after(ordering, values))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    @staticmethod
+    def after(ordering, values) -> Q:
+        """Rows following values in ordering, the bound on the first
+        field alone lets the database scan the index from there"""
+        first = ordering[0].lstrip("-")
+        bound = "lte" if ordering[0].startswith("-") else "gte"
+
+        condition, equal = Q(), Q()
+        for order, value in zip(ordering, values):
+            name = order.lstrip("-")
+            lookup = "lt" if order.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+
+        return Q(**{f"{first}__{bound}": values[0]}) & condition
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None:
+            return None
+
+        # positions are unique, an offset is never needed
+        return cursor._replace(offset=0)
+
+    def decode_position(self, position: str) -> list[str]:
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            name = order.lstrip("-")
+            if isinstance(instance, dict):
+                values.append(instance[name])
+            else:
+                values.append(getattr(instance, name))
+
+        return json.dumps([str(value) for value in values])
+
+
+class TripCursorPagination(KeysetPagination):
+    ordering = ("departure_time", "id")
+
+
+class OrderCursorPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+
+
+class CursorPaginationMixin:
+    """Paginate view with cursor_pagination_class instead of
+    pagination_class when request has ?pagination=cursor"""
+
+    cursor_pagination_class = None
+    pagination_query_param = "pagination"
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            mode = self.request.query_params.get(self.pagination_query_param)
+
+            if mode == "cursor" and self.cursor_pagination_class:
+                self._paginator = self.cursor_pagination_class()
+            else:
+                return super().paginator
+
+        return self._paginator
@@ -0,0 +1,164 @@
+"""Per-request database, serialization and rendering time
+in Server-Timing headers.
+
+ServerTimingMiddleware counts queries and their time on every
+database connection with execute_wrapper. Serializers and list
+projections building response data, and rendering of template and
+DRF responses are timed separately without the queries they run.
+The results are sent as Server-Timing metrics: db, serialize, render,
+app (the rest of the view) and total. SERVER_TIMING_LOG_RATE of
+requests are also logged as one JSON line. When SERVER_TIMING is off
+the middleware removes itself from the chain at startup and costs
+nothing
+"""
+import functools
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+
+class QueryTimer:
+    """execute_wrapper counting queries and their time in seconds"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestTimings:
+    """Queries and time of named phases of one request in seconds,
+    phases do not include time of their queries"""
+
+    def __init__(self):
+        self.queries = QueryTimer()
+        self.phases = {"serialize": 0.0, "render": 0.0}
+
+    @contextmanager
+    def measure(self, phase: str):
+        start = time.perf_counter()
+        queries_start = self.queries.duration
+        try:
+            yield
+        finally:
+            self.phases[phase] += (
+                time.perf_counter() - start
+                - (self.queries.duration - queries_start)
+            )
+
+
+@contextmanager
+def serialize_timing(request):
+    """Add time of the block to serialize metric of the request"""
+    timings = getattr(request, "server_timing", None)
+    if timings is None:
+        yield
+        return
+
+    with timings.measure("serialize"):
+        yield
+
+
+def timed_to_representation(to_representation):
+    @functools.wraps(to_representation)
+    def wrapper(self, instance):
+        if self.parent is not None:
+            # nested serializers are timed by the outermost one
+            return to_representation(self, instance)
+
+        with serialize_timing(self.context.get("request")):
+            return to_representation(self, instance)
+
+    wrapper.timed = True
+    return wrapper
+
+
+def time_serializers() -> None:
+    """Time outermost serializers of every request"""
+    for serializer_class in (
+        serializers.Serializer,
+        serializers.ListSerializer,
+    ):
+        method = serializer_class.to_representation
+        if not getattr(method, "timed", False):
+            serializer_class.to_representation = timed_to_representation(
+                method
+            )
+
+
+def server_timing(metrics: dict[str, float], queries: int) -> str:
+    """Format durations in seconds as a Server-Timing header value"""
+    return ", ".join(
+        f"{name};dur={duration * 1000:.1f}"
+        + (f';desc="{queries} queries"' if name == "db" else "")
+        for name, duration in metrics.items()
+    )
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        time_serializers()
+
+    def __call__(self, request):
+        timings = request.server_timing = RequestTimings()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(timings.queries)
+                )
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        db = timings.queries.duration
+        metrics = {"db": db, **timings.phases}
+        metrics["app"] = max(total - sum(metrics.values()), 0.0)
+        metrics["total"] = total
+        response["Server-Timing"] = server_timing(
+            metrics, timings.queries.count
+        )
+
+        if random.random() < settings.SERVER_TIMING_LOG_RATE:
+            self.log(request, response, metrics, timings.queries.count)
+
+        return response
+
+    def process_template_response(self, request, response):
+        # runs after the hooks of every later middleware, the handler
+        # does not render the response again
+        with request.server_timing.measure("render"):
+            response.render()
+
+        return response
+
+    @staticmethod
+    def log(request, response, metrics: dict[str, float], queries: int):
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": queries,
+            **{
+                f"{name}_ms": round(duration * 1000, 2)
+                for name, duration in metrics.items()
+            },
+        }))
@@ -0,0 +1,237 @@
+"""Fast path of list endpoints.
+
+Rows are read with values() and turned into dicts by functions
+generated once from field expressions, so no model instances are
+built and no serializer fields run per row. Output matches the
+list serializers exactly, TripListSerializer for trips and
+OrderListSerializer for orders
+"""
+import functools
+
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .fieldsets import SparseFieldsetMixin
+from .profiling import serialize_timing
+from .models import Crew, Ticket, Train, Trip
+
+datetime_field = serializers.DateTimeField()
+image_storage = Train._meta.get_field("image").storage
+
+
+def image_url(name: str, context: dict) -> str | None:
+    """Same as ImageField of a serializer with request in context"""
+    if not name:
+        return None
+
+    url = image_storage.url(name)
+    request = context.get("request")
+    if request is not None:
+        return request.build_absolute_uri(url)
+
+    return url
+
+
+def compile_projection(name: str, fields: list[tuple[str, str]]):
+    """Return function(row, context) building dict of fields,
+    every field is (output key, python expression of row and context)"""
+    items = "".join(
+        f"        {key!r}: {expression},\n" for key, expression in fields
+    )
+    source = f"def {name}(row, context):\n    return {{\n{items}    }}\n"
+
+    namespace = {
+        "datetime": datetime_field.to_representation,
+        "image_url": image_url,
+    }
+    exec(compile(source, f"<projection {name}>", "exec"), namespace)
+
+    return namespace[name]
+
+
+TRIP_COLUMNS = {
+    "id": (),
+    "crew": (),
+    "route": ("route__source__name", "route__destination__name"),
+    "departure_time": (),
+    "arrival_time": (),
+    "train_name": ("train__name",),
+    "train_image": ("train__image",),
+    "train_capacity": ("train__cargo_num", "train__seats_in_cargo"),
+    "available_tickets": ("available_tickets",),
+}
+# columns of every row, ordering of cursor pagination included
+TRIP_BASE_COLUMNS = ("id", "departure_time", "arrival_time")
+TRIP_FIELDS = [
+    ("id", 'row["id"]'),
+    ("crew", 'context["crew"].get(row["id"], [])'),
+    (
+        "route",
+        'row["route__source__name"] + " - "'
+        ' + row["route__destination__name"]',
+    ),
+    ("departure_time", 'datetime(row["departure_time"])'),
+    ("arrival_time", 'datetime(row["arrival_time"])'),
+    ("train_name", 'row["train__name"]'),
+    ("train_image", 'image_url(row["train__image"], context)'),
+    (
+        "train_capacity",
+        'row["train__cargo_num"] * row["train__seats_in_cargo"]',
+    ),
+]
+ORDER_FIELDS = [
+    ("id", 'row["id"]'),
+    ("tickets", 'context["tickets"].get(row["id"], [])'),
+    ("created_at", 'datetime(row["created_at"])'),
+]
+
+
+def trip_columns(fields=None) -> list[str]:
+    columns = list(TRIP_BASE_COLUMNS)
+    for name, names in TRIP_COLUMNS.items():
+        if fields is None or name in fields:
+            columns.extend(names)
+
+    return columns
+
+
+@functools.lru_cache(maxsize=None)
+def trip_projection(fields: frozenset | None = None):
+    return compile_projection("project_trip", [
+        (key, expression)
+        for key, expression in TRIP_FIELDS
+        + [("available_tickets", 'row["available_tickets"]')]
+        if fields is None or key in fields
+    ])
+
+
+@functools.lru_cache(maxsize=None)
+def order_projection(fields: frozenset | None = None):
+    return compile_projection("project_order", [
+        (key, expression)
+        for key, expression in ORDER_FIELDS
+        if fields is None or key in fields
+    ])
+
+
+# trips of ordered tickets are not annotated with available tickets
+project_ticket_trip = compile_projection("project_ticket_trip", TRIP_FIELDS)
+project_ticket = compile_projection(
+    "project_ticket",
+    [
+        ("id", 'row["id"]'),
+        ("cargo", 'row["cargo"]'),
+        ("seat", 'row["seat"]'),
+        ("trip", 'context["trips"][row["trip_id"]]'),
+    ],
+)
+
+
+def crew_names(trip_ids) -> dict[int, list[str]]:
+    """Full names of crew members of every trip, in the order
+    the crew prefetch of the list serializer returns them"""
+    names = {}
+    crew = Crew.objects.filter(trip__id__in=trip_ids).values_list(
+        "trip__id", "first_name", "last_name"
+    )
+    for trip_id, first_name, last_name in crew:
+        names.setdefault(trip_id, []).append(f"{first_name} {last_name}")
+
+    return names
+
+
+class TripListProjection:
+    """Projection of TripListSerializer, fields limits rows
+    and output to requested fields like a sparse fieldset"""
+
+    def rows(self, queryset, fields=None):
+        return queryset.prefetch_related(None).values(*trip_columns(fields))
+
+    def serialize(self, rows, request, fields=None) -> list[dict]:
+        context = {"request": request}
+        if fields is None or "crew" in fields:
+            context["crew"] = crew_names([row["id"] for row in rows])
+
+        project = trip_projection(fields and frozenset(fields))
+        return [project(row, context) for row in rows]
+
+
+class OrderListProjection:
+    """Projection of OrderListSerializer, tickets are not
+    loaded when fields leave them out"""
+
+    def rows(self, queryset, fields=None):
+        return queryset.prefetch_related(None).values("id", "created_at")
+
+    def serialize(self, rows, request, fields=None) -> list[dict]:
+        context = {"request": request, "tickets": {}}
+        if fields is None or "tickets" in fields:
+            context["tickets"] = self.tickets(
+                [row["id"] for row in rows], request
+            )
+
+        project = order_projection(fields and frozenset(fields))
+        return [project(row, context) for row in rows]
+
+    def tickets(self, order_ids, request) -> dict[int, list[dict]]:
+        tickets = list(
+            Ticket.objects.filter(order_id__in=order_ids).values(
+                "id", "order_id", "cargo", "seat", "trip_id"
+            )
+        )
+        trip_rows = Trip.objects.filter(
+            id__in={ticket["trip_id"] for ticket in tickets}
+        ).order_by().values(*trip_columns(set(TRIP_COLUMNS) - {
+            "available_tickets"
+        }))
+
+        context = {"request": request, "crew": crew_names(
+            [row["id"] for row in trip_rows]
+        )}
+        context["trips"] = {
+            row["id"]: project_ticket_trip(row, context) for row in trip_rows
+        }
+
+        order_tickets = {}
+        for ticket in tickets:
+            order_tickets.setdefault(ticket["order_id"], []).append(
+                project_ticket(ticket, context)
+            )
+
+        return order_tickets
+
+
+class ProjectionListMixin(SparseFieldsetMixin):
+    """Answer list action with list_projection instead of the list
+    serializer, unless LIST_PROJECTIONS setting is turned off.
+    Included relations are left to the list serializer"""
+
+    list_projection = None
+
+    def list(self, request, *args, **kwargs):
+        fields, include = self.get_sparse_fieldset()
+        if (
+            self.list_projection is None
+            or not settings.LIST_PROJECTIONS
+            or include
+        ):
+            return super().list(request, *args, **kwargs)
+
+        rows = self.list_projection.rows(
+            self.filter_queryset(self.get_queryset()), fields
+        )
+
+        page = self.paginate_queryset(rows)
+        if page is None:
+            rows = list(rows)
+
+        with serialize_timing(request):
+            data = self.list_projection.serialize(
+                rows if page is None else page, request, fields
+            )
+
+        if page is not None:
+            return self.get_paginated_response(data)
+
+        return Response(data)
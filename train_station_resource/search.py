@@ -0,0 +1,190 @@
+import heapq
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+
+from .models import Station, Train
+from .versions import VersionedValue
+
+# tiers of matches, lower is better
+EXACT, NAME_PREFIX, WORD_PREFIX, SIMILAR = range(4)
+
+MIN_SIMILARITY = 0.3
+BUDGET_CHECK_EVERY = 256
+MAX_RESULTS = 50
+# best matches of prefixes up to this length are kept precomputed,
+# as they match a large part of all names
+SHORT_PREFIX = 2
+
+
+def normalize(text: str) -> str:
+    """Casefold text and strip accents"""
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(
+        char for char in text if not unicodedata.combining(char)
+    ).casefold()
+
+
+def trigrams(text: str) -> set[str]:
+    text = f"  {text} "
+    return {text[index:index + 3] for index in range(len(text) - 2)}
+
+
+class NameIndex:
+    """Prefix and trigram index of object names.
+
+    Every name is stored as sorted suffixes starting at its words, so
+    names with a word starting with the query are a contiguous slice
+    found with bisect, best matches of short prefixes are kept ready.
+    Names with a typo are found by trigrams shared with the query
+    when prefix matches do not fill the limit
+    """
+
+    def __init__(self, names) -> None:
+        self.ids = []
+        self.names = []
+        self.normalized = []
+        self.trigram_counts = []
+        self.keys = []
+        self.trigrams = {}
+
+        for position, (object_id, name) in enumerate(names):
+            normalized = " ".join(normalize(name).split())
+            name_trigrams = trigrams(normalized)
+            self.ids.append(object_id)
+            self.names.append(name)
+            self.normalized.append(normalized)
+            self.trigram_counts.append(len(name_trigrams))
+
+            start = 0
+            for word in normalized.split():
+                start = normalized.index(word, start)
+                self.keys.append((normalized[start:], position))
+                start += len(word)
+
+            for trigram in name_trigrams:
+                self.trigrams.setdefault(trigram, []).append(position)
+
+        self.keys.sort()
+
+        self.short_prefixes = {}
+        for key, position in self.keys:
+            for length in range(1, min(len(key), SHORT_PREFIX) + 1):
+                ranks = self.short_prefixes.setdefault(key[:length], {})
+                rank = self.rank(key, position, key[:length])
+                if rank < ranks.get(position, (SIMILAR,)):
+                    ranks[position] = rank
+
+        for prefix, ranks in self.short_prefixes.items():
+            self.short_prefixes[prefix] = {
+                position: ranks[position]
+                for position in self.best(ranks, MAX_RESULTS)
+            }
+
+    @classmethod
+    def loader(cls, model):
+        def load() -> "NameIndex":
+            return cls(model.objects.order_by().values_list("id", "name"))
+
+        return load
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def rank(self, key: str, position: int, query: str) -> tuple:
+        name = self.normalized[position]
+        if len(key) < len(name):
+            tier = WORD_PREFIX
+        elif len(key) == len(query):
+            tier = EXACT
+        else:
+            tier = NAME_PREFIX
+
+        return tier, len(name)
+
+    @staticmethod
+    def best(ranks: dict, limit: int) -> list[int]:
+        return heapq.nsmallest(
+            limit, ranks, key=lambda position: (ranks[position], position)
+        )
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """Return up to limit {"id", "name"} best matching query:
+        exact names, then names and words starting with query, then
+        similar names, shorter names first inside every tier"""
+        query = " ".join(normalize(query).split())
+        if not query:
+            return []
+
+        if len(query) <= SHORT_PREFIX:
+            ranks = self.short_prefixes.get(query, {})
+        else:
+            deadline = (
+                time.perf_counter()
+                + settings.AUTOCOMPLETE_TIME_BUDGET.total_seconds()
+            )
+            ranks = self.rank_prefixed(query, deadline)
+
+            if len(ranks) < limit:
+                self.rank_similar(query, ranks, deadline)
+
+        return [
+            {"id": self.ids[position], "name": self.names[position]}
+            for position in self.best(ranks, limit)
+        ]
+
+    def rank_prefixed(self, query: str, deadline: float) -> dict:
+        ranks = {}
+        index = bisect_left(self.keys, (query,))
+
+        while index < len(self.keys):
+            key, position = self.keys[index]
+            if not key.startswith(query):
+                break
+
+            rank = self.rank(key, position, query)
+            if rank < ranks.get(position, (SIMILAR,)):
+                ranks[position] = rank
+
+            index += 1
+            if (
+                index % BUDGET_CHECK_EVERY == 0
+                and time.perf_counter() > deadline
+            ):
+                break
+
+        return ranks
+
+    def rank_similar(self, query: str, ranks: dict, deadline: float) -> None:
+        query_trigrams = trigrams(query)
+        shared = Counter()
+
+        for trigram in query_trigrams:
+            shared.update(self.trigrams.get(trigram, ()))
+            if time.perf_counter() > deadline:
+                break
+
+        for position, count in shared.items():
+            if position in ranks:
+                continue
+
+            similarity = count / (
+                len(query_trigrams) + self.trigram_counts[position] - count
+            )
+            if similarity >= MIN_SIMILARITY:
+                ranks[position] = (SIMILAR, -similarity)
+
+
+station_names = VersionedValue("station_names", NameIndex.loader(Station))
+train_names = VersionedValue("train_names", NameIndex.loader(Train))
+
+
+def invalidate_station_names() -> None:
+    station_names.invalidate()
+
+
+def invalidate_train_names() -> None:
+    train_names.invalidate()
@@ -0,0 +1,143 @@
+import base64
+from typing import Iterable, Iterator
+
+
+class SeatMap:
+    """Occupancy bitset of train cargo x seat grid.
+
+    Seat (cargo, seat) is stored at bit index
+    (cargo - 1) * seats_in_cargo + (seat - 1), bits are packed
+    least significant bit first inside every byte
+    """
+
+    def __init__(
+        self,
+        cargo_num: int,
+        seats_in_cargo: int,
+        data: bytes = b"",
+    ) -> None:
+        self.cargo_num = cargo_num
+        self.seats_in_cargo = seats_in_cargo
+        self.bits = bytearray((cargo_num * seats_in_cargo + 7) // 8)
+
+        data = bytes(data or b"")[:len(self.bits)]
+        self.bits[:len(data)] = data
+
+    @classmethod
+    def from_places(
+        cls,
+        cargo_num: int,
+        seats_in_cargo: int,
+        places: Iterable[tuple[int, int]],
+    ) -> "SeatMap":
+        seat_map = cls(cargo_num, seats_in_cargo)
+        for cargo, seat in places:
+            if seat_map.contains(cargo, seat):
+                seat_map.take(cargo, seat)
+
+        return seat_map
+
+    @property
+    def size(self) -> int:
+        return self.cargo_num * self.seats_in_cargo
+
+    def contains(self, cargo: int, seat: int) -> bool:
+        return (
+            1 <= cargo <= self.cargo_num
+            and 1 <= seat <= self.seats_in_cargo
+        )
+
+    def index(self, cargo: int, seat: int) -> int:
+        return (cargo - 1) * self.seats_in_cargo + seat - 1
+
+    def is_taken(self, cargo: int, seat: int) -> bool:
+        index = self.index(cargo, seat)
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def take(self, cargo: int, seat: int) -> None:
+        index = self.index(cargo, seat)
+        self.bits[index >> 3] |= 1 << (index & 7)
+
+    def release(self, cargo: int, seat: int) -> None:
+        index = self.index(cargo, seat)
+        self.bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def taken_count(self) -> int:
+        return int.from_bytes(self.bits, "little").bit_count()
+
+    def taken_places(self) -> Iterator[tuple[int, int]]:
+        """Yield taken (cargo, seat) pairs ordered by cargo and seat"""
+        for byte_index, byte in enumerate(self.bits):
+            while byte:
+                lowest = byte & -byte
+                index = (byte_index << 3) + lowest.bit_length() - 1
+                byte ^= lowest
+
+                if index < self.size:
+                    cargo, seat = divmod(index, self.seats_in_cargo)
+                    yield cargo + 1, seat + 1
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.bits)
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.bits).decode("ascii")
+
+    def free_runs(self) -> Iterator[tuple[int, int, int]]:
+        """Yield (cargo, first seat, length) of every run of
+        adjacent free seats ordered by cargo and seat"""
+        bits = int.from_bytes(self.bits, "little")
+        cargo_mask = (1 << self.seats_in_cargo) - 1
+
+        for cargo in range(self.cargo_num):
+            free = ~(bits >> cargo * self.seats_in_cargo) & cargo_mask
+
+            while free:
+                start = (free & -free).bit_length() - 1
+                shifted = free >> start
+                length = (shifted ^ (shifted + 1)).bit_length() - 1
+                free &= ~(((1 << length) - 1) << start)
+
+                yield cargo + 1, start + 1, length
+
+    def find_block(self, count: int) -> list[tuple[int, int]] | None:
+        """Return places for group of count passengers or None
+        when there are not enough free seats.
+
+        Smallest run of adjacent free seats that fits the whole group
+        is preferred, then the cargo with the smallest sufficient number
+        of free seats, then the largest runs of the whole train
+        """
+        if count < 1 or count > self.size - self.taken_count():
+            return None
+
+        runs = list(self.free_runs())
+
+        fitting = [run for run in runs if run[2] >= count]
+        if fitting:
+            cargo, seat, _ = min(fitting, key=lambda run: run[2])
+            return [(cargo, seat + offset) for offset in range(count)]
+
+        free_in_cargo = {}
+        for cargo, _, length in runs:
+            free_in_cargo[cargo] = free_in_cargo.get(cargo, 0) + length
+
+        cargos = [
+            cargo for cargo, free in free_in_cargo.items() if free >= count
+        ]
+        if cargos:
+            cargo = min(cargos, key=free_in_cargo.get)
+            runs = [run for run in runs if run[0] == cargo]
+
+        places = []
+        for cargo, seat, length in sorted(
+            runs, key=lambda run: run[2], reverse=True
+        ):
+            places.extend(
+                (cargo, seat + offset)
+                for offset in range(min(length, count - len(places)))
+            )
+            if len(places) == count:
+                break
+
+        return sorted(places)
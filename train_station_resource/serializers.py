@@ -1,8 +1,12 @@
-from django.db import transaction
-
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from drf_spectacular.utils import extend_schema_field
+
+from .bookings import create_order
+from .fieldsets import SparseFieldsetSerializerMixin
+from .seat_map import SeatMap
 from .models import (
     Station,
     Route,
@@ -12,6 +16,7 @@ from .models import (
     Train,
     Order,
     Ticket,
+    SeatHold,
 )
 
 
@@ -21,6 +26,36 @@ class StationSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class NearbyStationQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    radius = serializers.FloatField(
+        min_value=0,
+        max_value=1000,
+        default=50,
+        help_text="Search radius in km",
+    )
+    k = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class NearbyStationSerializer(StationSerializer):
+    distance = serializers.FloatField(help_text="Distance in km")
+
+    class Meta:
+        model = Station
+        fields = ("id", "name", "latitude", "longitude", "distance")
+
+
+class AutocompleteQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=255, trim_whitespace=True)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+
+
 class RouteSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         data = super().validate(attrs)
@@ -68,10 +103,57 @@ class CrewSerializer(serializers.ModelSerializer):
 class TripSerializer(serializers.ModelSerializer):
     class Meta:
         model = Trip
-        fields = "__all__"
+        fields = [
+            "id",
+            "departure_time",
+            "arrival_time",
+            "route",
+            "train",
+            "crew",
+        ]
+
+
+class TicketTripField(serializers.PrimaryKeyRelatedField):
+    """Trip primary key field that reuses trips already loaded
+    in bulk by BulkTicketListSerializer"""
+
+    def to_internal_value(self, data):
+        trips = getattr(self.parent, "prefetched_trips", None)
+
+        if trips is not None and not isinstance(data, bool):
+            try:
+                return trips[int(data)]
+            except (TypeError, ValueError, KeyError):
+                pass
+
+        return super().to_internal_value(data)
+
+
+class BulkTicketListSerializer(serializers.ListSerializer):
+    """Load every trip referenced by the tickets, together
+    with its train, in one query before validating tickets"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            trip_ids = set()
+            for item in data:
+                trip_id = item.get("trip") if isinstance(item, dict) else None
+                if isinstance(trip_id, (int, str)) and str(trip_id).isdigit():
+                    trip_ids.add(int(trip_id))
+
+            self.child.prefetched_trips = Trip.objects.select_related(
+                "train"
+            ).in_bulk(trip_ids)
+
+        try:
+            return super().to_internal_value(data)
+        finally:
+            self.child.prefetched_trips = None
 
 
 class TicketSerializer(serializers.ModelSerializer):
+    trip = TicketTripField(queryset=Trip.objects.select_related("train"))
+
     def validate(self, attrs):
         data = super().validate(attrs=attrs)
         Ticket.validate_ticket(
@@ -90,6 +172,9 @@ class TicketSerializer(serializers.ModelSerializer):
             "seat",
             "trip"
         ]
+        list_serializer_class = BulkTicketListSerializer
+        # uniqueness is validated for the whole order at once
+        validators = []
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -101,15 +186,13 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = ["id", "tickets", "created_at"]
 
-    @transaction.atomic
+    def validate_tickets(self, tickets):
+        Ticket.validate_tickets_are_free(tickets, ValidationError)
+        return tickets
+
     def create(self, validated_data):
         tickets = validated_data.pop("tickets")
-        order = Order.objects.create(**validated_data)
-
-        for ticket in tickets:
-            Ticket.objects.create(order=order, **ticket)
-
-        return order
+        return create_order(tickets, **validated_data)
 
 
 class RouteListSerializer(RouteSerializer):
@@ -121,10 +204,11 @@ class RouteListSerializer(RouteSerializer):
     )
 
 
-class TrainListSerializer(TrainSerializer):
+class TrainListSerializer(SparseFieldsetSerializerMixin, TrainSerializer):
     train_type_name = serializers.CharField(
         read_only=True, source="train_type.name"
     )
+    included_fields = {"train_type": TrainTypeSerializer(read_only=True)}
 
     class Meta:
         model = Train
@@ -139,7 +223,7 @@ class TrainListSerializer(TrainSerializer):
         ]
 
 
-class TrainDetailSerializer(TrainSerializer):
+class TrainDetailSerializer(SparseFieldsetSerializerMixin, TrainSerializer):
     train_type = TrainTypeSerializer(read_only=True)
 
     class Meta:
@@ -160,7 +244,7 @@ class TrainImageSerializer(TrainSerializer):
         fields = ["id", "image"]
 
 
-class TripListSerializer(TripSerializer):
+class TripListSerializer(SparseFieldsetSerializerMixin, TripSerializer):
     crew = serializers.SlugRelatedField(
         many=True, read_only=True, slug_field="full_name"
     )
@@ -179,6 +263,11 @@ class TripListSerializer(TripSerializer):
     available_tickets = serializers.IntegerField(
         read_only=True
     )
+    included_fields = {
+        "crew": CrewSerializer(many=True, read_only=True),
+        "route": RouteListSerializer(read_only=True),
+        "train": TrainListSerializer(read_only=True),
+    }
 
     class Meta:
         model = Trip
@@ -201,13 +290,20 @@ class TicketTakenPlacesSerializer(TicketSerializer):
         fields = ["cargo", "seat"]
 
 
-class TripDetailSerializer(TripSerializer):
+class TripDetailSerializer(SparseFieldsetSerializerMixin, TripSerializer):
     crew = CrewSerializer(many=True, read_only=True)
     route = RouteListSerializer(read_only=True)
     train = TrainListSerializer(read_only=True)
-    taken_places = TicketTakenPlacesSerializer(
-        many=True, read_only=True, source="tickets"
-    )
+    taken_places = serializers.SerializerMethodField()
+
+    @extend_schema_field(TicketTakenPlacesSerializer(many=True))
+    def get_taken_places(self, trip: Trip) -> list[dict]:
+        """Read taken places from trip seat map instead
+        of loading every ticket of the trip"""
+        return [
+            {"cargo": cargo, "seat": seat}
+            for cargo, seat in trip.get_seat_map().taken_places()
+        ]
 
     class Meta:
         model = Trip
@@ -222,9 +318,152 @@ class TripDetailSerializer(TripSerializer):
         ]
 
 
+class TripSeatMapSerializer(serializers.ModelSerializer):
+    cargo_num = serializers.IntegerField(
+        read_only=True, source="train.cargo_num"
+    )
+    seats_in_cargo = serializers.IntegerField(
+        read_only=True, source="train.seats_in_cargo"
+    )
+    seat_map = serializers.SerializerMethodField(
+        help_text=(
+            "Base64 encoded bitmap, bit (cargo - 1) * seats_in_cargo"
+            " + seat - 1 is set when place is taken, least significant"
+            " bit of every byte goes first"
+        )
+    )
+    held_map = serializers.SerializerMethodField(
+        help_text="Bitmap of seats held by customers, same as seat_map"
+    )
+
+    class Meta:
+        model = Trip
+        fields = [
+            "id",
+            "cargo_num",
+            "seats_in_cargo",
+            "seats_sold",
+            "seat_map",
+            "held_map",
+        ]
+
+    def get_seat_map(self, trip: Trip) -> str:
+        return trip.get_seat_map().to_base64()
+
+    def get_held_map(self, trip: Trip) -> str:
+        held = SeatMap.from_places(
+            trip.train.cargo_num,
+            trip.train.seats_in_cargo,
+            trip.holds.filter(
+                expires_at__gt=timezone.now()
+            ).values_list("cargo", "seat"),
+        )
+        return held.to_base64()
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ["id", "trip", "cargo", "seat", "expires_at"]
+        read_only_fields = fields
+
+
+class SeatHoldCreateSerializer(serializers.Serializer):
+    tickets = TicketSerializer(
+        many=True, read_only=False, allow_empty=False
+    )
+
+    def validate_tickets(self, tickets):
+        Ticket.validate_tickets_are_free(tickets, ValidationError)
+        return tickets
+
+
+class SeatAllocationSerializer(serializers.Serializer):
+    passengers = serializers.IntegerField(min_value=1)
+
+
+class TicketExportQuerySerializer(serializers.Serializer):
+    output = serializers.ChoiceField(
+        choices=["csv", "ndjson"], default="csv"
+    )
+    created_after = serializers.DateTimeField(
+        required=False, help_text="Orders created at or after this moment"
+    )
+    created_before = serializers.DateTimeField(
+        required=False, help_text="Orders created before this moment"
+    )
+    route = serializers.PrimaryKeyRelatedField(
+        queryset=Route.objects.all(), required=False
+    )
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if (
+            "created_after" in attrs
+            and "created_before" in attrs
+            and attrs["created_after"] >= attrs["created_before"]
+        ):
+            raise ValidationError(
+                {"created_before": "Must be later than created_after"}
+            )
+        return data
+
+
+class ShortestRouteQuerySerializer(serializers.Serializer):
+    to = serializers.PrimaryKeyRelatedField(queryset=Station.objects.all())
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # "from" is a python keyword so can not be declared as attribute
+        fields["from"] = serializers.PrimaryKeyRelatedField(
+            queryset=Station.objects.all()
+        )
+        return fields
+
+
+class ShortestRouteSerializer(serializers.Serializer):
+    distance = serializers.IntegerField()
+    stations = StationSerializer(many=True)
+    routes = serializers.ListField(child=serializers.IntegerField())
+
+
+class JourneyQuerySerializer(serializers.Serializer):
+    to = serializers.PrimaryKeyRelatedField(queryset=Station.objects.all())
+    depart_after = serializers.DateTimeField(required=False)
+    min_transfer = serializers.IntegerField(
+        min_value=0,
+        required=False,
+        help_text="Minimum transfer time between trips in minutes",
+    )
+    k = serializers.IntegerField(min_value=1, max_value=10, default=1)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # "from" is a python keyword so can not be declared as attribute
+        fields["from"] = serializers.PrimaryKeyRelatedField(
+            queryset=Station.objects.all()
+        )
+        return fields
+
+
+class JourneyLegSerializer(serializers.Serializer):
+    trip = serializers.IntegerField()
+    source = serializers.CharField()
+    destination = serializers.CharField()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+
+
+class JourneySerializer(serializers.Serializer):
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    transfers = serializers.IntegerField()
+    legs = JourneyLegSerializer(many=True)
+
+
 class TicketListSerializer(TicketSerializer):
     trip = TripListSerializer(read_only=True)
 
 
-class OrderListSerializer(OrderSerializer):
+class OrderListSerializer(SparseFieldsetSerializerMixin, OrderSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
@@ -0,0 +1,161 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+    pre_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import caching, geo, journeys, network, search
+from .models import (
+    Station,
+    Route,
+    Crew,
+    TrainType,
+    Train,
+    Trip,
+    Order,
+    Ticket,
+)
+
+SEAT_FIELDS = {"seat_map", "seats_sold", "updated_at"}
+
+
+@receiver(post_delete, sender=Ticket)
+def release_ticket_seat(sender, instance: Ticket, origin=None, **kwargs):
+    """Free ticket place in trip seat map when ticket is deleted
+    directly (API, admin inline removal)"""
+    if origin is not None and not (
+        isinstance(origin, Ticket) or getattr(origin, "model", None) is Ticket
+    ):
+        # cascades reach tickets through their orders, which release
+        # the seats before, or through trips that are being deleted
+        return
+
+    trip = Trip.lock_for_booking([instance.trip_id]).get(instance.trip_id)
+    if trip:
+        trip.set_places([(instance.cargo, instance.seat)], taken=False)
+
+
+@receiver(pre_delete, sender=Order)
+def release_order_seats(sender, instance: Order, **kwargs):
+    """Free places of order tickets with one seat map update per trip"""
+    places = defaultdict(list)
+    for trip_id, cargo, seat in instance.tickets.values_list(
+        "trip_id", "cargo", "seat"
+    ):
+        places[trip_id].append((cargo, seat))
+
+    if places:
+        for trip_id, trip in Trip.lock_for_booking(places).items():
+            trip.set_places(places[trip_id], taken=False)
+
+
+@receiver(post_save, sender=Trip)
+def update_timetable_trip(
+    sender, instance: Trip, update_fields=None, **kwargs
+):
+    if update_fields and set(update_fields) <= SEAT_FIELDS:
+        return
+
+    trip_id = instance.id
+    transaction.on_commit(lambda: journeys.apply_trip_change(trip_id))
+
+
+@receiver(post_delete, sender=Trip)
+def remove_timetable_trip(sender, instance: Trip, **kwargs):
+    trip_id = instance.id
+    transaction.on_commit(
+        lambda: journeys.apply_trip_change(trip_id, deleted=True)
+    )
+
+
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+@receiver(post_save, sender=Station)
+@receiver(post_delete, sender=Station)
+def invalidate_timetable(sender, **kwargs):
+    transaction.on_commit(journeys.invalidate_timetable)
+
+
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+def invalidate_route_network(sender, **kwargs):
+    transaction.on_commit(network.invalidate_network)
+
+
+@receiver(post_save, sender=Station)
+@receiver(post_delete, sender=Station)
+def invalidate_station_index(sender, **kwargs):
+    transaction.on_commit(geo.invalidate_station_index)
+
+
+@receiver(post_save, sender=Station)
+@receiver(post_delete, sender=Station)
+def invalidate_station_names(sender, **kwargs):
+    transaction.on_commit(search.invalidate_station_names)
+
+
+@receiver(post_save, sender=Train)
+@receiver(post_delete, sender=Train)
+def invalidate_train_names(sender, **kwargs):
+    transaction.on_commit(search.invalidate_train_names)
+
+
+@receiver(post_save, sender=Station)
+@receiver(post_delete, sender=Station)
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+@receiver(post_save, sender=TrainType)
+@receiver(post_delete, sender=TrainType)
+@receiver(post_save, sender=Train)
+@receiver(post_delete, sender=Train)
+@receiver(post_save, sender=Crew)
+@receiver(post_delete, sender=Crew)
+@receiver(post_save, sender=Trip)
+@receiver(post_delete, sender=Trip)
+def bump_model_version(sender, **kwargs):
+    """Bump version right away and again after commit,
+    so pages read before commit from other transactions
+    are not kept under the new version"""
+    caching.bump_model_version(sender)
+    transaction.on_commit(lambda: caching.bump_model_version(sender))
+
+
+@receiver(m2m_changed, sender=Trip.crew.through)
+def touch_trip_crew(sender, instance, action, reverse, pk_set, **kwargs):
+    """Crew changes do not save the trip, so updated_at
+    of changed trips is set here"""
+    now = timezone.now()
+
+    if not reverse and action in ("post_add", "post_remove", "post_clear"):
+        trips = Trip.objects.filter(pk=instance.pk)
+        instance.updated_at = now
+    elif reverse and action in ("post_add", "post_remove"):
+        trips = Trip.objects.filter(pk__in=pk_set)
+    elif reverse and action == "pre_clear":
+        # trips of crew member are unknown once they are cleared
+        trips = Trip.objects.filter(crew=instance)
+    else:
+        return
+
+    trips.update(updated_at=now)
+    caching.bump_model_version(Trip)
+    transaction.on_commit(lambda: caching.bump_model_version(Trip))
+
+
+def invalidate_all() -> None:
+    """Bump versions of every cached model and drop indexes built
+    from them, for bulk writes that do not send model signals"""
+    for model in (Station, Route, TrainType, Train, Crew, Trip):
+        caching.bump_model_version(model)
+
+    journeys.invalidate_timetable()
+    network.invalidate_network()
+    geo.invalidate_station_index()
+    search.invalidate_station_names()
+    search.invalidate_train_names()
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from train_station_resource import benchmarks
+
+
+class QueryBudgetTests(TestCase):
+    """Endpoints stay within their query budgets whatever
+    the amount of data"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "generate_dataset",
+            stations=20,
+            trains=3,
+            crew=5,
+            users=5,
+            trips=20,
+            stdout=StringIO(),
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def assertWithinQueryBudgets(self):
+        result = benchmarks.run(repeat=1)
+
+        self.assertGreater(result["dataset"]["ticket"], 100)
+        for name, endpoint in result["endpoints"].items():
+            with self.subTest(endpoint=name):
+                self.assertLessEqual(
+                    endpoint["queries"], endpoint["budget"]["queries"]
+                )
+                self.assertEqual(
+                    [status // 100 for status in endpoint["status"]], [2]
+                )
+
+    def test_endpoints_are_within_query_budgets(self):
+        self.assertWithinQueryBudgets()
+
+    @override_settings(LIST_PROJECTIONS=False)
+    def test_serializer_lists_are_within_query_budgets(self):
+        self.assertWithinQueryBudgets()
+
+
+class TripSearchPlanTests(TestCase):
+    def test_search_by_route_and_date_uses_route_departure_index(self):
+        call_command(
+            "generate_dataset",
+            stations=20,
+            trains=3,
+            crew=5,
+            users=1,
+            trips=500,
+            occupancy=0,
+            start=datetime.now() - timedelta(days=400),
+            days=365,
+            stdout=StringIO(),
+        )
+
+        result = benchmarks.measure_trip_search(repeat=1)
+
+        self.assertEqual(result["past_trips"], 500)
+        self.assertEqual(result["found"], 5)
+        self.assertTrue(result["uses_index"], result["plan"])
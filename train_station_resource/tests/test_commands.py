@@ -0,0 +1,284 @@
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from train_station_resource.caching import model_version_name
+from train_station_resource.models import (
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Trip,
+    SeatHold,
+)
+from train_station_resource.versions import get_version
+from .models_create_sample import (
+    sample_trip,
+    sample_ticket,
+    sample_station,
+    sample_route,
+    sample_train,
+)
+
+
+class RebuildTripSeatsCommandTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            email="main@gmail.com", password="rvtquen"
+        )
+        self.trip = sample_trip(name="Trip1")
+        sample_ticket(self.user, self.trip)
+        sample_ticket(self.user, self.trip, cargo=2)
+
+    def test_check_passes_when_counters_are_in_sync(self):
+        out = StringIO()
+        call_command("rebuild_trip_seats", "--check", stdout=out)
+
+        self.assertIn("in sync", out.getvalue())
+
+    def test_check_fails_when_counter_drifted(self):
+        Trip.objects.filter(id=self.trip.id).update(seats_sold=7)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_trip_seats", "--check", stdout=StringIO())
+
+    def test_rebuild_fixes_drifted_counter(self):
+        Trip.objects.filter(id=self.trip.id).update(seats_sold=7)
+
+        call_command("rebuild_trip_seats", stdout=StringIO())
+
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.seats_sold, 2)
+
+    def test_rebuild_fixes_drifted_seat_map(self):
+        Trip.objects.filter(id=self.trip.id).update(seat_map=b"")
+
+        call_command("rebuild_trip_seats", stdout=StringIO())
+
+        self.trip.refresh_from_db()
+        self.assertEqual(
+            list(self.trip.get_seat_map().taken_places()),
+            [(1, 1), (2, 1)],
+        )
+
+
+class SweepSeatHoldsCommandTests(TestCase):
+    def test_only_expired_holds_are_deleted(self):
+        user = get_user_model().objects.create_user(
+            email="main@gmail.com", password="rvtquen"
+        )
+        trip = sample_trip(name="Trip1")
+        for seat, expires_in in [(1, -1), (2, -5), (3, 5)]:
+            SeatHold.objects.create(
+                trip=trip,
+                user=user,
+                cargo=1,
+                seat=seat,
+                expires_at=timezone.now() + timedelta(minutes=expires_in),
+            )
+
+        call_command("sweep_seat_holds", stdout=StringIO())
+
+        self.assertEqual(
+            list(SeatHold.objects.values_list("seat", flat=True)), [3]
+        )
+
+
+class CheckRouteDistancesCommandTests(TestCase):
+    def setUp(self) -> None:
+        self.stations = [
+            sample_station(name=f"Station{index}") for index in range(3)
+        ]
+        self.first = sample_route(self.stations[0], self.stations[1])
+        self.second = sample_route(self.stations[1], self.stations[2])
+
+    def test_consistent_distances(self):
+        out = StringIO()
+        call_command("check_route_distances", stdout=out)
+
+        self.assertIn("agree", out.getvalue())
+
+    def test_route_longer_than_path_through_other_stations(self):
+        direct = sample_route(self.stations[0], self.stations[2])
+        direct.distance = 500
+        direct.save()
+        out = StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command("check_route_distances", stdout=out)
+
+        self.assertIn(f"Route {direct.id}: distance 500", out.getvalue())
+
+
+class BenchmarkListProjectionsCommandTests(TestCase):
+    def test_benchmark_reports_every_page_size(self):
+        user = get_user_model().objects.create_user(
+            email="main@gmail.com", password="rvtquen"
+        )
+        sample_ticket(user, sample_trip(name="Trip1"))
+        out = StringIO()
+
+        call_command(
+            "benchmark_list_projections",
+            "--page-sizes=1,5",
+            "--repeat=1",
+            stdout=out,
+        )
+
+        self.assertIn("trips page of 1: serializer", out.getvalue())
+        self.assertIn("orders page of 5: serializer", out.getvalue())
+
+
+class ImportTimetableCommandTests(TestCase):
+    def setUp(self) -> None:
+        self.train = sample_train(name="Intercity")
+        self.station = sample_station(name="Kyiv")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def write(self, name: str, content: str) -> str:
+        path = self.directory / name
+        path.write_text(content, encoding="utf-8")
+        return str(path)
+
+    def import_timetable(self, trips: str, *args) -> StringIO:
+        out = StringIO()
+        call_command(
+            "import_timetable",
+            self.write("trips.csv", trips),
+            *args,
+            stdout=out,
+            stderr=StringIO(),
+        )
+        return out
+
+    def test_trips_routes_and_stations_are_imported(self):
+        stations = self.write(
+            "stations.csv",
+            "name,latitude,longitude\n"
+            "Lviv,49.84,24.03\n"
+            "Kyiv,50.44,30.49\n",
+        )
+        trip_version = get_version(model_version_name(Trip))
+
+        out = self.import_timetable(
+            "source,destination,departure_time,arrival_time,train,distance\n"
+            "Kyiv,Lviv,2024-03-01T08:00:00,2024-03-01T14:00:00,Intercity,540\n"
+            "Lviv,Kyiv,2024-03-01T16:00:00,2024-03-01T22:00:00,Intercity,540\n"
+            "Kyiv,Lviv,2024-03-02T08:00:00,2024-03-02T14:00:00,Intercity,\n",
+            f"--stations={stations}",
+            "--batch-size=2",
+        )
+
+        self.assertEqual(Trip.objects.filter(train=self.train).count(), 3)
+        self.assertEqual(Route.objects.count(), 2)
+        self.station.refresh_from_db()
+        self.assertEqual(self.station.latitude, 50.44)
+        self.assertIn("Trips: 2/3 inserted", out.getvalue())
+        self.assertIn("Trips: 3/3 inserted", out.getvalue())
+        self.assertGreater(
+            get_version(model_version_name(Trip)), trip_version
+        )
+
+    def test_invalid_rows_stop_import(self):
+        trips = (
+            "source,destination,departure_time,arrival_time,train\n"
+            "Kyiv,Odesa,2024-03-01T08:00:00,2024-03-01T14:00:00,Intercity\n"
+            "Kyiv,Kyiv,2024-03-01T08:00:00,2024-03-01T14:00:00,Intercity\n"
+        )
+        sample_route(self.station, sample_station(name="Odesa"))
+
+        with self.assertRaises(CommandError):
+            self.import_timetable(
+                trips + "Kyiv,Odesa,2024-03-01T08:00:00,soon,Intercity\n"
+            )
+        self.assertFalse(Trip.objects.filter(train=self.train).exists())
+
+        self.import_timetable(trips, "--skip-invalid")
+        self.assertEqual(Trip.objects.filter(train=self.train).count(), 1)
+
+    def test_upsert_updates_trips_of_same_train_and_departure(self):
+        trips = (
+            "source,destination,departure_time,arrival_time,train,distance\n"
+            "Kyiv,Lviv,2024-03-01T08:00:00,2024-03-01T14:00:00,Intercity,540\n"
+        )
+        sample_station(name="Lviv")
+        self.import_timetable(trips)
+
+        self.import_timetable(
+            trips.replace("14:00", "15:30")
+            + "Kyiv,Lviv,2024-03-02T08:00:00,2024-03-02T14:00:00,"
+            "Intercity,540\n",
+            "--upsert",
+        )
+
+        trips = Trip.objects.filter(train=self.train).order_by(
+            "departure_time"
+        )
+        self.assertEqual(len(trips), 2)
+        self.assertEqual(trips[0].arrival_time, datetime(2024, 3, 1, 15, 30))
+
+
+class GenerateDatasetCommandTests(TestCase):
+    def generate(self, prefix: str, seed: int = 7) -> None:
+        call_command(
+            "generate_dataset",
+            f"--seed={seed}",
+            f"--prefix={prefix}",
+            "--stations=20",
+            "--trains=4",
+            "--crew=5",
+            "--users=3",
+            "--trips=30",
+            "--batch-size=500",
+            stdout=StringIO(),
+        )
+
+    def test_dataset_is_consistent(self):
+        self.generate("A ")
+
+        self.assertEqual(Station.objects.count(), 20)
+        self.assertEqual(Trip.objects.count(), 30)
+        self.assertGreater(Route.objects.count(), 20)
+        self.assertEqual(
+            Ticket.objects.count(),
+            sum(Trip.objects.values_list("seats_sold", flat=True)),
+        )
+        self.assertFalse(Order.objects.filter(tickets=None).exists())
+
+        # seat maps match generated tickets
+        call_command("rebuild_trip_seats", "--check", stdout=StringIO())
+
+        # sequences continue after generated ids
+        sample_station(name="Added")
+
+    def test_same_seed_generates_same_data(self):
+        self.generate("A ")
+        self.generate("B ")
+        self.generate("C ", seed=8)
+
+        def trips(prefix):
+            return list(Trip.objects.filter(
+                train__name__startswith=prefix
+            ).order_by("id").values_list(
+                "route__distance",
+                "departure_time",
+                "seats_sold",
+                "seat_map",
+            ))
+
+        self.assertEqual(trips("A "), trips("B "))
+        self.assertNotEqual(trips("A "), trips("C "))
+
+    def test_existing_prefix_is_rejected(self):
+        self.generate("A ")
+
+        with self.assertRaises(CommandError):
+            self.generate("A ")
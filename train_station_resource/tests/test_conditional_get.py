@@ -0,0 +1,236 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from .models_create_sample import (
+    sample_trip,
+    sample_ticket,
+    sample_station,
+    sample_crew,
+    detail_url,
+)
+from train_station_resource.models import Order, SeatHold
+
+TRIP_URL = reverse("train_station:trip-list")
+STATION_URL = reverse("train_station:station-list")
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Main@gmail.com", password="rvtquen"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.trip = sample_trip(name="Trip1")
+        self.other_trip = sample_trip(name="Trip2")
+
+    def a_second_later(self):
+        """Clock after the second of the last change"""
+        # unknown change times are recorded by the first request
+        self.client.get(TRIP_URL)
+
+        return mock.patch("time.time", return_value=time.time() + 1)
+
+    def test_list_has_validators(self):
+        with self.a_second_later():
+            res = self.client.get(TRIP_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("ETag", res)
+        self.assertIn("Last-Modified", res)
+
+    def test_matching_etag_returns_not_modified_without_queries(self):
+        etag = self.client.get(TRIP_URL)["ETag"]
+
+        with self.assertNumQueries(0):
+            res = self.client.get(TRIP_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+        self.assertEqual(res.content, b"")
+
+    def test_if_modified_since_returns_not_modified(self):
+        with self.a_second_later():
+            last_modified = self.client.get(TRIP_URL)["Last-Modified"]
+
+            res = self.client.get(
+                TRIP_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_modified_since_sees_change_in_the_same_second(self):
+        second = int(time.time()) + 10
+
+        with mock.patch("time.time", return_value=second + 0.2):
+            sample_ticket(self.user, self.trip, seat=1)
+            res = self.client.get(TRIP_URL)
+        self.assertNotIn("Last-Modified", res)
+
+        with mock.patch("time.time", return_value=second + 1.2):
+            last_modified = self.client.get(TRIP_URL)["Last-Modified"]
+        self.assertEqual(last_modified, http_date(second))
+
+        with mock.patch("time.time", return_value=second + 1.5):
+            sample_ticket(self.user, self.trip, seat=2)
+            res = self.client.get(
+                TRIP_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_sold_ticket_changes_list_etag(self):
+        etag = self.client.get(TRIP_URL)["ETag"]
+        sample_ticket(self.user, self.trip)
+
+        res = self.client.get(TRIP_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_query_params_change_etag(self):
+        etag1 = self.client.get(TRIP_URL)["ETag"]
+        etag2 = self.client.get(TRIP_URL, {"train": 1})["ETag"]
+
+        self.assertNotEqual(etag1, etag2)
+
+    def test_detail_not_modified_by_other_trip_change(self):
+        url = detail_url("trip", self.trip.id)
+        etag = self.client.get(url)["ETag"]
+
+        sample_ticket(self.user, self.other_trip)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_modified_by_own_change(self):
+        url = detail_url("trip", self.trip.id)
+        etag = self.client.get(url)["ETag"]
+
+        sample_ticket(self.user, self.trip)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["taken_places"], [{"cargo": 1, "seat": 1}])
+
+    def test_detail_modified_by_crew_change(self):
+        url = detail_url("trip", self.trip.id)
+        etag = self.client.get(url)["ETag"]
+
+        self.trip.crew.add(sample_crew())
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["crew"]), 1)
+
+    def test_detail_modified_by_related_model_change(self):
+        url = detail_url("trip", self.trip.id)
+        etag = self.client.get(url)["ETag"]
+
+        station = self.trip.route.source
+        station.name = "Renamed"
+        station.save()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_missing_trip_returns_not_found(self):
+        res = self.client.get(detail_url("trip", 1000))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_trip_id_returns_not_found(self):
+        res = self.client.get(detail_url("trip", "abc"))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def seat_map_url(self, trip_id=None):
+        return reverse(
+            "train_station:trip-seat-map", args=[trip_id or self.trip.id]
+        )
+
+    def test_seat_map_not_modified_until_ticket_sold(self):
+        etag = self.client.get(self.seat_map_url())["ETag"]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                self.seat_map_url(), HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        sample_ticket(self.user, self.trip)
+        res = self.client.get(self.seat_map_url(), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["seats_sold"], 1)
+
+    def test_seat_map_modified_when_hold_is_placed_and_expires(self):
+        etag = self.client.get(self.seat_map_url())["ETag"]
+        SeatHold.objects.create(
+            trip=self.trip,
+            user=self.user,
+            cargo=1,
+            seat=1,
+            expires_at=timezone.now() + timedelta(minutes=1),
+        )
+
+        res = self.client.get(self.seat_map_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        held_map, etag = res.data["held_map"], res["ETag"]
+
+        # the hold runs out without any write
+        SeatHold.objects.update(expires_at=timezone.now())
+        res = self.client.get(self.seat_map_url(), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data["held_map"], held_map)
+
+    def test_seat_map_of_missing_trip_returns_not_found(self):
+        for trip_id in (1000, "abc"):
+            res = self.client.get(self.seat_map_url(trip_id))
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_allocate_requires_current_seat_map_etag_in_if_match(self):
+        url = reverse("train_station:trip-allocate", args=[self.trip.id])
+        etag = self.client.get(self.seat_map_url())["ETag"]
+        sample_ticket(self.user, self.trip)
+
+        res = self.client.post(
+            url, {"passengers": 2}, HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(Order.objects.count(), 1)
+
+        etag = self.client.get(self.seat_map_url())["ETag"]
+        res = self.client.post(
+            url, {"passengers": 2}, HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_reference_list_not_modified_until_saved(self):
+        etag = self.client.get(STATION_URL)["ETag"]
+
+        res = self.client.get(STATION_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        sample_station("Odesa")
+
+        res = self.client.get(STATION_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
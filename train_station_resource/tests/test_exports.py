@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from train_station_resource.models import Order
+from .models_create_sample import sample_trip, sample_order, sample_ticket
+
+EXPORT_URL = reverse("train_station:order-export")
+
+
+class TicketExportTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@gmail.com", password="rvtafj", is_staff=True
+        )
+        self.user = get_user_model().objects.create_user(
+            email="main@gmail.com", password="rvtquen"
+        )
+        self.client.force_authenticate(self.admin)
+
+        self.trip1 = sample_trip(name="Trip1")
+        self.trip2 = sample_trip(name="Trip2")
+
+        self.old_order = sample_order(self.user)
+        Order.objects.filter(id=self.old_order.id).update(
+            created_at=datetime(2024, 1, 1, 12)
+        )
+        sample_ticket(self.user, self.trip1, order=self.old_order)
+
+        self.order = sample_order(self.user)
+        sample_ticket(self.user, self.trip1, seat=2, order=self.order)
+        sample_ticket(self.user, self.trip2, order=self.order)
+
+    def export(self, **params) -> str:
+        res = self.client.get(EXPORT_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+
+        return b"".join(res.streaming_content).decode()
+
+    def test_export_requires_staff(self):
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(EXPORT_CHUNK_SIZE=1)
+    def test_csv_export_has_row_for_every_ticket(self):
+        rows = list(csv.DictReader(io.StringIO(self.export())))
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            [(row["order_id"], row["seat"]) for row in rows],
+            [
+                (str(self.old_order.id), "1"),
+                (str(self.order.id), "2"),
+                (str(self.order.id), "1"),
+            ],
+        )
+        self.assertEqual(rows[0]["user_email"], "main@gmail.com")
+        self.assertEqual(rows[0]["source"], "Trip1")
+        self.assertEqual(rows[0]["order_created_at"], "2024-01-01T12:00:00")
+
+    def test_ndjson_export(self):
+        lines = self.export(output="ndjson").splitlines()
+
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[2])["destination"], "Trip2Trip2")
+
+    def test_export_is_filtered_by_date_and_route(self):
+        rows = list(csv.DictReader(io.StringIO(
+            self.export(created_after="2024-01-02T00:00:00")
+        )))
+        self.assertEqual(
+            {row["order_id"] for row in rows}, {str(self.order.id)}
+        )
+
+        rows = list(csv.DictReader(io.StringIO(
+            self.export(created_before="2024-01-02T00:00:00")
+        )))
+        self.assertEqual(
+            {row["order_id"] for row in rows}, {str(self.old_order.id)}
+        )
+
+        rows = list(csv.DictReader(io.StringIO(
+            self.export(route=self.trip2.route_id)
+        )))
+        self.assertEqual([row["trip_id"] for row in rows], [
+            str(self.trip2.id)
+        ])
+
+    def test_invalid_export_params_are_rejected(self):
+        res = self.client.get(EXPORT_URL, {"output": "xlsx"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(EXPORT_URL, {
+            "created_after": "2024-01-02T00:00:00",
+            "created_before": "2024-01-01T00:00:00",
+        })
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,193 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from .models_create_sample import (
+    sample_station,
+    sample_route,
+    sample_train,
+    sample_trip,
+)
+from train_station_resource.journeys import Timetable, get_timetable
+from train_station_resource.models import Route
+
+JOURNEY_URL = reverse("train_station:journey-list")
+
+
+class UnauthenticatedJourneyApiTests(TestCase):
+    def test_auth_required(self):
+        res = APIClient().get(JOURNEY_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class JourneyApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Main@gmail.com", password="rvtquen"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.start = datetime(2099, 1, 1, 8)
+        self.kyiv = sample_station("Kyiv")
+        self.lviv = sample_station("Lviv")
+        self.odesa = sample_station("Odesa")
+        self.train = sample_train("Train1")
+
+    def trip(self, source, destination, departs: int, arrives: int):
+        """Create trip departing and arriving in given hours from start"""
+        route = Route.objects.filter(
+            source=source, destination=destination
+        ).first() or sample_route(source, destination)
+
+        return sample_trip(
+            name=f"{source}{destination}{departs}",
+            route=route,
+            train=self.train,
+            departure_time=self.start + timedelta(hours=departs),
+            arrival_time=self.start + timedelta(hours=arrives),
+        )
+
+    def get_journeys(self, source, destination, **params):
+        return self.client.get(
+            JOURNEY_URL,
+            {
+                "from": source.id,
+                "to": destination.id,
+                "depart_after": self.start,
+                **params,
+            },
+        )
+
+    def test_direct_journey(self):
+        trip = self.trip(self.kyiv, self.lviv, 1, 5)
+
+        res = self.get_journeys(self.kyiv, self.lviv)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["transfers"], 0)
+        self.assertEqual(res.data[0]["legs"][0]["trip"], trip.id)
+        self.assertEqual(res.data[0]["legs"][0]["source"], "Kyiv")
+
+    def test_journey_with_transfer(self):
+        first = self.trip(self.kyiv, self.lviv, 1, 5)
+        second = self.trip(self.lviv, self.odesa, 6, 12)
+
+        res = self.get_journeys(self.kyiv, self.odesa)
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["transfers"], 1)
+        self.assertEqual(
+            [leg["trip"] for leg in res.data[0]["legs"]],
+            [first.id, second.id],
+        )
+
+    def test_transfer_shorter_than_min_transfer_is_skipped(self):
+        self.trip(self.kyiv, self.lviv, 1, 5)
+        self.trip(self.lviv, self.odesa, 5, 8)
+        self.trip(self.lviv, self.odesa, 7, 10)
+
+        res = self.get_journeys(self.kyiv, self.odesa, min_transfer=30)
+
+        self.assertEqual(
+            res.data[0]["arrival_time"],
+            (self.start + timedelta(hours=10)).isoformat(),
+        )
+
+    def test_k_best_journeys(self):
+        for departs in (1, 3, 5):
+            self.trip(self.kyiv, self.lviv, departs, departs + 4)
+
+        res = self.get_journeys(self.kyiv, self.lviv, k=2)
+
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(
+            [journey["departure_time"] for journey in res.data],
+            [
+                (self.start + timedelta(hours=1)).isoformat(),
+                (self.start + timedelta(hours=3)).isoformat(),
+            ],
+        )
+
+    def test_dominated_journey_is_skipped(self):
+        self.trip(self.kyiv, self.lviv, 1, 2)
+        self.trip(self.lviv, self.odesa, 3, 9)
+        self.trip(self.kyiv, self.odesa, 4, 9)
+
+        res = self.get_journeys(self.kyiv, self.odesa, k=2)
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["transfers"], 0)
+
+    def test_transfer_at_min_transfer_boundary(self):
+        arrives = self.start + timedelta(hours=5, microseconds=500000)
+        ready = arrives + timedelta(minutes=30)
+        first = self.trip(self.kyiv, self.lviv, 1, 5)
+        too_early = self.trip(self.lviv, self.odesa, 6, 8)
+        on_time = self.trip(self.lviv, self.odesa, 7, 9)
+        for trip, time in (
+            (too_early, ready - timedelta(microseconds=1)),
+            (on_time, ready),
+        ):
+            trip.departure_time = time
+            trip.save()
+        first.arrival_time = arrives
+        first.save()
+
+        res = self.get_journeys(self.kyiv, self.odesa, min_transfer=30)
+
+        legs = res.data[0]["legs"]
+        self.assertEqual(legs[0]["arrival_time"], arrives.isoformat())
+        self.assertEqual(legs[1]["trip"], on_time.id)
+        self.assertEqual(legs[1]["departure_time"], ready.isoformat())
+
+    def test_no_journey(self):
+        self.trip(self.lviv, self.kyiv, 1, 5)
+
+        res = self.get_journeys(self.kyiv, self.lviv)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+
+    def test_unknown_station(self):
+        res = self.client.get(JOURNEY_URL, {"from": 999, "to": 998})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_timetable_copy_swapped_in_when_trip_changes(self):
+        trip = self.trip(self.kyiv, self.lviv, 1, 5)
+        timetable = get_timetable()
+
+        with mock.patch.object(Timetable, "load") as load:
+            with self.captureOnCommitCallbacks(execute=True):
+                trip.departure_time = self.start + timedelta(hours=2)
+                trip.save()
+
+            updated = get_timetable()
+
+        load.assert_not_called()
+        self.assertIsNot(updated, timetable)
+        # searches running on the previous timetable are not affected
+        self.assertEqual(
+            timetable.leg(0).departure_time,
+            self.start + timedelta(hours=1),
+        )
+        res = self.get_journeys(self.kyiv, self.lviv)
+        self.assertEqual(
+            res.data[0]["departure_time"],
+            (self.start + timedelta(hours=2)).isoformat(),
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            trip.delete()
+
+        self.assertEqual(len(get_timetable()), 0)
@@ -0,0 +1,124 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from train_station_resource.caching import get_cache_stats
+from train_station_resource.models import Station
+from .models_create_sample import (
+    sample_station,
+    sample_route,
+    sample_train,
+)
+
+STATION_URL = reverse("train_station:station-list")
+ROUTE_URL = reverse("train_station:route-list")
+TRAIN_URL = reverse("train_station:train-list")
+
+
+class ListCacheTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Main@gmail.com", password="rvtquen"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.kyiv = sample_station("Kyiv")
+        self.lviv = sample_station("Lviv")
+
+    def test_repeated_list_is_served_from_cache(self):
+        res1 = self.client.get(STATION_URL)
+
+        with self.assertNumQueries(0):
+            res2 = self.client.get(STATION_URL)
+
+        self.assertEqual(res1["X-Cache"], "MISS")
+        self.assertEqual(res2["X-Cache"], "HIT")
+        self.assertEqual(res1.data, res2.data)
+
+    def test_query_params_are_cached_separately(self):
+        Station.objects.bulk_create(
+            [Station(name=f"Station{i}", latitude=0, longitude=0)
+             for i in range(10)]
+        )
+        res1 = self.client.get(STATION_URL)
+        res2 = self.client.get(STATION_URL, {"page": 2})
+
+        self.assertEqual(res2.status_code, status.HTTP_200_OK)
+        self.assertEqual(res2["X-Cache"], "MISS")
+        self.assertNotEqual(res1.data["results"], res2.data["results"])
+
+    def test_save_invalidates_cached_list(self):
+        self.client.get(STATION_URL)
+        sample_station("Odesa")
+
+        res = self.client.get(STATION_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["count"], 3)
+
+    def test_delete_invalidates_cached_list(self):
+        self.client.get(STATION_URL)
+        self.lviv.delete()
+
+        res = self.client.get(STATION_URL)
+
+        self.assertEqual(res.data["count"], 1)
+
+    def test_related_model_change_invalidates_cached_list(self):
+        sample_route(self.kyiv, self.lviv)
+        self.client.get(ROUTE_URL)
+
+        self.kyiv.name = "Kyiv-Pasazhyrskyi"
+        self.kyiv.save()
+
+        res = self.client.get(ROUTE_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(
+            res.data["results"][0]["source"], "Kyiv-Pasazhyrskyi"
+        )
+
+    def test_unrelated_model_change_keeps_cached_list(self):
+        sample_train(name="Train1")
+        self.client.get(STATION_URL)
+
+        sample_train(name="Train2")
+        res = self.client.get(STATION_URL)
+
+        self.assertEqual(res["X-Cache"], "HIT")
+
+    def test_error_response_is_not_cached(self):
+        self.client.get(STATION_URL, {"page": 5})
+
+        Station.objects.bulk_create(
+            [Station(name=f"Station{i}", latitude=0, longitude=0)
+             for i in range(100)]
+        )
+        res = self.client.get(STATION_URL, {"page": 5})
+
+        self.assertEqual(res["X-Cache"], "MISS")
+
+    def test_hits_and_misses_are_counted(self):
+        self.client.get(TRAIN_URL)
+        self.client.get(TRAIN_URL)
+        self.client.get(TRAIN_URL)
+
+        self.assertEqual(
+            get_cache_stats()["train"], {"hit": 2, "miss": 1}
+        )
+
+        out = StringIO()
+        call_command("list_cache_stats", stdout=out)
+
+        self.assertIn(
+            "train: 2 hits, 1 misses, hit ratio 66.7%", out.getvalue()
+        )
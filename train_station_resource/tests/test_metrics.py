@@ -0,0 +1,171 @@
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+
+from .models_create_sample import sample_station, sample_trip
+
+METRICS_URL = reverse("metrics")
+ORDER_URL = reverse("train_station:order-list")
+STATION_URL = reverse("train_station:station-list")
+TRIP_URL = reverse("train_station:trip-list")
+METRICS_TOKEN = "scrape-token"
+
+
+def sample_value(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@override_settings(METRICS_TOKEN=METRICS_TOKEN)
+class MetricsTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        caches["throttle"].clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="main@gmail.com", password="rvtquen"
+        )
+        self.client.force_authenticate(self.user)
+        self.trip = sample_trip("Fast")
+
+    def scrape(self, token=METRICS_TOKEN):
+        return APIClient().get(
+            METRICS_URL, HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+    def test_requests_are_counted_by_view_and_action(self):
+        labels = {"view": "TripViewSet", "action": "list"}
+        requests = sample_value(
+            "train_station_http_requests_total",
+            method="GET",
+            status="200",
+            **labels,
+        )
+        queries = sample_value(
+            "train_station_http_request_queries_sum", **labels
+        )
+
+        self.client.get(TRIP_URL)
+
+        self.assertEqual(
+            sample_value(
+                "train_station_http_requests_total",
+                method="GET",
+                status="200",
+                **labels,
+            ),
+            requests + 1,
+        )
+        self.assertEqual(
+            sample_value("train_station_http_request_queries_sum", **labels),
+            queries + 3,
+        )
+
+    def test_committed_orders_and_tickets_are_counted(self):
+        orders = sample_value("train_station_orders_created_total")
+        tickets = sample_value("train_station_tickets_created_total")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                ORDER_URL,
+                {"tickets": [
+                    {"cargo": 1, "seat": 1, "trip": self.trip.id},
+                    {"cargo": 1, "seat": 2, "trip": self.trip.id},
+                ]},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sample_value("train_station_orders_created_total"), orders + 1
+        )
+        self.assertEqual(
+            sample_value("train_station_tickets_created_total"), tickets + 2
+        )
+
+    def test_throttled_requests_are_counted(self):
+        throttled = sample_value(
+            "train_station_throttled_requests_total", scope="booking"
+        )
+
+        rates = {"user": None, "booking": "1/min"}
+        with mock.patch.object(SimpleRateThrottle, "THROTTLE_RATES", rates):
+            for seat in (1, 2):
+                response = self.client.post(
+                    ORDER_URL,
+                    {"tickets": [
+                        {"cargo": 1, "seat": seat, "trip": self.trip.id}
+                    ]},
+                    format="json",
+                )
+
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertEqual(
+            sample_value(
+                "train_station_throttled_requests_total", scope="booking"
+            ),
+            throttled + 1,
+        )
+
+    def test_list_cache_hit_ratio_is_exposed(self):
+        sample_station("Central")
+        self.client.get(STATION_URL)
+        self.client.get(STATION_URL)
+
+        response = self.scrape()
+        content = response.content.decode()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            'train_station_list_cache_requests_total'
+            '{outcome="hit",view="station"} 1.0',
+            content,
+        )
+        self.assertIn(
+            'train_station_list_cache_hit_ratio{view="station"} 0.5',
+            content,
+        )
+
+    def test_multiprocess_metrics_are_read_from_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with mock.patch.dict(
+                "os.environ", {"PROMETHEUS_MULTIPROC_DIR": directory}
+            ):
+                response = self.scrape()
+
+        content = response.content.decode()
+        self.assertIn("train_station_list_cache_hit_ratio", content)
+        # values of this process are not written to the directory
+        self.assertNotIn("train_station_http_requests_total{", content)
+
+    def test_anonymous_scrape_is_unauthorized(self):
+        response = APIClient().get(METRICS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response["WWW-Authenticate"], 'Bearer realm="metrics"')
+
+    def test_user_without_token_is_unauthorized(self):
+        self.assertEqual(
+            self.client.get(METRICS_URL).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+        self.assertEqual(
+            self.scrape("other-token").status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_endpoint_is_off_without_token(self):
+        response = self.scrape()
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,7 +1,8 @@
 import time
 
 from django.test import TestCase
-from django.db import IntegrityError
+from django.test.utils import CaptureQueriesContext
+from django.db import IntegrityError, connection
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 
@@ -195,3 +196,83 @@ class ModelsTest(TestCase):
             Ticket.objects.create(
                 cargo=5, seat=5, trip=trip, order=sample_order(user=user)
             )
+
+    def test_trip_seats_sold_follows_ticket_create_move_and_delete(self):
+        user = get_user_model().objects.create(
+            email="ticket@gmail.com", password="rvtqrey"
+        )
+        trip1 = sample_trip(name="Trip1")
+        trip2 = sample_trip(name="Trip2")
+        ticket = Ticket.objects.create(
+            cargo=1, seat=1, trip=trip1, order=sample_order(user=user)
+        )
+        Ticket.objects.create(
+            cargo=1, seat=2, trip=trip1, order=ticket.order
+        )
+        trip1.refresh_from_db()
+        self.assertEqual(trip1.seats_sold, 2)
+
+        ticket.trip = trip2
+        ticket.seat = 3
+        ticket.save()
+        trip1.refresh_from_db()
+        trip2.refresh_from_db()
+        self.assertEqual(trip1.seats_sold, 1)
+        self.assertEqual(trip2.seats_sold, 1)
+        self.assertEqual(
+            list(trip1.get_seat_map().taken_places()), [(1, 2)]
+        )
+        self.assertEqual(
+            list(trip2.get_seat_map().taken_places()), [(1, 3)]
+        )
+
+        ticket.order.delete()
+        trip1.refresh_from_db()
+        trip2.refresh_from_db()
+        self.assertEqual(trip1.seats_sold, 0)
+        self.assertEqual(trip2.seats_sold, 0)
+
+    def test_trip_seat_map_rebuilt_when_train_changes(self):
+        user = get_user_model().objects.create(
+            email="ticket@gmail.com", password="rvtqrey"
+        )
+        trip = sample_trip(name="Trip1")
+        Ticket.objects.create(
+            cargo=2, seat=2, trip=trip, order=sample_order(user=user)
+        )
+
+        trip.refresh_from_db()
+        trip.train = sample_train(
+            name="Train2", cargo_num=3, seats_in_cargo=3
+        )
+        trip.save()
+
+        trip.refresh_from_db()
+        self.assertEqual(
+            list(trip.get_seat_map().taken_places()), [(2, 2)]
+        )
+
+    def test_cascade_deletes_do_not_release_seats_ticket_by_ticket(self):
+        user = get_user_model().objects.create(
+            email="ticket@gmail.com", password="rvtqrey"
+        )
+        queries = []
+        for name, tickets in (("Trip1", 1), ("Trip2", 5)):
+            trip = sample_trip(name=name)
+            orders = [sample_order(user=user), sample_order(user=user)]
+            for seat in range(1, tickets + 1):
+                for cargo, order in enumerate(orders, start=1):
+                    Ticket.objects.create(
+                        cargo=cargo, seat=seat, trip=trip, order=order
+                    )
+
+            with CaptureQueriesContext(connection) as order_delete:
+                orders[0].delete()
+            trip.refresh_from_db()
+            self.assertEqual(trip.seats_sold, tickets)
+
+            with CaptureQueriesContext(connection) as station_delete:
+                trip.route.source.delete()
+            queries.append((len(order_delete), len(station_delete)))
+
+        self.assertEqual(queries[0], queries[1])
@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from train_station_resource.models import Route
+from train_station_resource.nplusone import (
+    NPlusOneError,
+    detect_n_plus_one,
+    fingerprint,
+)
+from train_station_resource.serializers import RouteListSerializer
+from .models_create_sample import sample_crew, sample_ticket, sample_trip
+
+API_LISTS = [
+    "station-list",
+    "route-list",
+    "traintype-list",
+    "crew-list",
+    "train-list",
+    "trip-list",
+    "order-list",
+]
+ADMIN_MODELS = [
+    "station",
+    "route",
+    "traintype",
+    "train",
+    "crew",
+    "trip",
+    "order",
+    "ticket",
+    "seathold",
+]
+
+
+class FingerprintTests(TestCase):
+    def test_literals_and_parameter_lists_are_collapsed(self):
+        self.assertEqual(
+            fingerprint(
+                "SELECT * FROM trip\n WHERE id IN (%s, %s, %s)"
+                " AND name = 'Fast' LIMIT 21"
+            ),
+            fingerprint(
+                "SELECT * FROM trip WHERE id IN (%s, %s)"
+                " AND name = 'Slow' LIMIT 1"
+            ),
+        )
+
+
+class DetectorTests(TestCase):
+    def setUp(self) -> None:
+        for name in "ABCD":
+            sample_trip(name)
+
+    def test_repeated_query_names_serializer_field(self):
+        routes = Route.objects.order_by("id")
+
+        with self.assertRaisesMessage(
+            NPlusOneError, "from RouteListSerializer.source"
+        ):
+            with detect_n_plus_one(threshold=2, raise_error=True):
+                RouteListSerializer(routes, many=True).data
+
+    def test_repeated_query_is_logged(self):
+        routes = Route.objects.order_by("id")
+
+        with self.assertLogs(
+            "train_station_resource.nplusone", "WARNING"
+        ) as logs:
+            with detect_n_plus_one("routes", threshold=2, raise_error=False):
+                RouteListSerializer(routes, many=True).data
+
+        # source and destination stations are loaded by the same statement
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn(
+            "N+1 in routes, 8 queries from RouteListSerializer.source",
+            logs.output[0],
+        )
+
+    def test_related_objects_loaded_up_front_pass(self):
+        routes = Route.objects.select_related("source", "destination")
+
+        with self.assertNoLogs("train_station_resource.nplusone"):
+            with detect_n_plus_one(threshold=2, raise_error=True):
+                RouteListSerializer(routes, many=True).data
+
+
+@override_settings(
+    NPLUSONE_DETECTION=True, NPLUSONE_THRESHOLD=2, NPLUSONE_RAISE=True
+)
+class ViewQueryRepeatTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_superuser(
+            email="admin@gmail.com", password="rvtwfafhg"
+        )
+        crew = sample_crew()
+        for name in "ABCD":
+            trip = sample_trip(name)
+            trip.crew.add(crew)
+            sample_ticket(self.user, trip)
+
+    def test_api_lists_do_not_repeat_queries(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        for name in API_LISTS:
+            with self.subTest(name):
+                response = client.get(reverse(f"train_station:{name}"))
+                self.assertEqual(response.status_code, 200)
+
+    def test_admin_changelists_do_not_repeat_queries(self):
+        self.client.force_login(self.user)
+
+        for model in ADMIN_MODELS:
+            with self.subTest(model):
+                response = self.client.get(reverse(
+                    f"admin:train_station_resource_{model}_changelist"
+                ))
+                self.assertEqual(response.status_code, 200)
@@ -1,7 +1,10 @@
 import time
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APIClient
@@ -18,7 +21,7 @@ from .models_create_sample import (
     sample_ticket,
     sample_train
 )
-from train_station_resource.models import Order
+from train_station_resource.models import Order, Ticket
 
 
 ORDER_URL = reverse("train_station:order-list")
@@ -182,3 +185,168 @@ class AuthenticatedOrderApiTests(TestCase):
         res = self.client.post(ORDER_URL, order_data, format="json")
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_can_not_order_same_seat_twice_in_one_order(self):
+        trip = sample_trip(name="TripForTicket")
+        order_data = {
+            "tickets": [
+                {"cargo": 1, "seat": 1, "trip": trip.id},
+                {"cargo": 1, "seat": 1, "trip": trip.id},
+            ]
+        }
+
+        res = self.client.post(ORDER_URL, order_data, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_user_can_not_order_already_taken_seat(self):
+        trip = sample_trip(name="TripForTicket")
+        sample_ticket(self.user, trip, cargo=2, seat=3)
+        order_data = {
+            "tickets": [
+                {"cargo": 1, "seat": 1, "trip": trip.id},
+                {"cargo": 2, "seat": 3, "trip": trip.id},
+            ]
+        }
+
+        res = self.client.post(ORDER_URL, order_data, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_order_create_queries_do_not_grow_with_tickets(self):
+        trip1 = sample_trip(name="TripForTicket1")
+        trip2 = sample_trip(name="TripForTicket2")
+
+        def order_data(seats: int) -> dict:
+            return {
+                "tickets": [
+                    {"cargo": 1, "seat": seat, "trip": trip.id}
+                    for trip in (trip1, trip2)
+                    for seat in range(1, seats + 1)
+                ]
+            }
+
+        with CaptureQueriesContext(connection) as small_order:
+            res = self.client.post(ORDER_URL, order_data(1), format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        Ticket.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as big_order:
+            res = self.client.post(ORDER_URL, order_data(5), format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(len(small_order), len(big_order))
+        self.assertEqual(Ticket.objects.count(), 10)
+
+    def test_order_create_updates_trip_seats_sold(self):
+        trip = sample_trip(name="TripForTicket")
+        order_data = {
+            "tickets": [
+                {"cargo": 1, "seat": 1, "trip": trip.id},
+                {"cargo": 1, "seat": 2, "trip": trip.id},
+            ]
+        }
+
+        res = self.client.post(ORDER_URL, order_data, format="json")
+
+        trip.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(trip.seats_sold, 2)
+
+    def test_order_create_with_idempotency_key_is_replayed(self):
+        trip = sample_trip(name="TripForTicket")
+        order_data = {"tickets": [{"cargo": 1, "seat": 1, "trip": trip.id}]}
+
+        res1 = self.client.post(
+            ORDER_URL, order_data, format="json",
+            HTTP_IDEMPOTENCY_KEY="order-1",
+        )
+        res2 = self.client.post(
+            ORDER_URL, order_data, format="json",
+            HTTP_IDEMPOTENCY_KEY="order-1",
+        )
+
+        self.assertEqual(res1.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res2.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res1.data, res2.data)
+        self.assertEqual(res2.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_idempotency_key_reused_with_other_body(self):
+        trip = sample_trip(name="TripForTicket")
+
+        self.client.post(
+            ORDER_URL,
+            {"tickets": [{"cargo": 1, "seat": 1, "trip": trip.id}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="order-2",
+        )
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"cargo": 1, "seat": 2, "trip": trip.id}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="order-2",
+        )
+
+        self.assertEqual(
+            res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_idempotency_key_survives_clearing_default_cache(self):
+        trip = sample_trip(name="TripForTicket")
+        order_data = {"tickets": [{"cargo": 1, "seat": 1, "trip": trip.id}]}
+
+        self.client.post(
+            ORDER_URL, order_data, format="json",
+            HTTP_IDEMPOTENCY_KEY="order-4",
+        )
+        # list pages and counters culled from a full default cache
+        cache.clear()
+        res = self.client.post(
+            ORDER_URL, order_data, format="json",
+            HTTP_IDEMPOTENCY_KEY="order-4",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_failed_order_is_not_stored_for_idempotency_key(self):
+        trip = sample_trip(name="TripForTicket")
+
+        res1 = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"cargo": 9, "seat": 1, "trip": trip.id}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="order-3",
+        )
+        res2 = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"cargo": 1, "seat": 1, "trip": trip.id}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="order-3",
+        )
+
+        self.assertEqual(res1.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res2.status_code, status.HTTP_201_CREATED)
+
+    def test_cursor_pagination_of_orders(self):
+        orders = [sample_order(self.user) for _ in range(12)]
+        # equal creation time, order is kept by id
+        Order.objects.update(created_at=orders[0].created_at)
+
+        order_ids = []
+        url, params = ORDER_URL, {"pagination": "cursor"}
+        while url:
+            res = self.client.get(url, params)
+            params = None
+            order_ids += [order["id"] for order in res.data["results"]]
+            url = res.data["next"]
+
+        self.assertEqual(
+            order_ids, sorted((order.id for order in orders), reverse=True)
+        )
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from train_station_resource.models import Train
+from .models_create_sample import (
+    sample_trip,
+    sample_ticket,
+    sample_crew,
+    sample_order,
+)
+
+TRIP_URL = reverse("train_station:trip-list")
+ORDER_URL = reverse("train_station:order-list")
+
+
+class ListProjectionTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Main@gmail.com", password="rvtquen"
+        )
+        self.client.force_authenticate(self.user)
+
+        start = datetime(2024, 1, 2, 8, 30, 15, 120)
+        self.trips = [
+            sample_trip(
+                name=f"Trip{index}",
+                departure_time=start + timedelta(hours=index),
+                arrival_time=start + timedelta(hours=index, minutes=90),
+            )
+            for index in range(12)
+        ]
+        Train.objects.filter(id=self.trips[0].train_id).update(
+            image="uploads/trains/train0.jpg"
+        )
+        self.trips[0].crew.add(
+            sample_crew(), sample_crew(first_name="Taras")
+        )
+        self.trips[1].crew.add(sample_crew(first_name="Olena"))
+
+        sample_ticket(self.user, self.trips[0])
+        order = sample_order(self.user)
+        sample_ticket(self.user, self.trips[0], seat=3, order=order)
+        sample_ticket(self.user, self.trips[1], seat=2, order=order)
+        sample_ticket(self.user, self.trips[0], seat=2, order=order)
+
+    def assertSameContent(self, url, params=None):
+        fast = self.client.get(url, params)
+        with override_settings(LIST_PROJECTIONS=False):
+            slow = self.client.get(url, params)
+
+        self.assertEqual(fast.status_code, slow.status_code)
+        self.assertEqual(fast.content, slow.content)
+
+        return fast
+
+    def test_trip_list_matches_serializer(self):
+        res = self.assertSameContent(TRIP_URL)
+
+        self.assertEqual(len(res.data["results"]), 10)
+        self.assertEqual(res.data["results"][0]["available_tickets"], 22)
+        self.assertTrue(
+            res.data["results"][0]["train_image"].startswith("http://")
+        )
+
+    def test_trip_list_pages_and_filters_match_serializer(self):
+        self.assertSameContent(TRIP_URL, {"page": 2})
+        self.assertSameContent(TRIP_URL, {"date": "2024-01-02"})
+        self.assertSameContent(
+            TRIP_URL, {"train": self.trips[3].train_id}
+        )
+
+    def test_trip_cursor_page_matches_serializer(self):
+        res = self.assertSameContent(TRIP_URL, {"pagination": "cursor"})
+
+        self.assertSameContent(res.data["next"])
+
+    def test_order_list_matches_serializer(self):
+        res = self.assertSameContent(ORDER_URL)
+
+        # sample_ticket also creates an empty order every time
+        self.assertEqual(
+            sorted(len(order["tickets"]) for order in res.data["results"]),
+            [0, 0, 0, 1, 3],
+        )
+        self.assertSameContent(ORDER_URL, {"ordering": "created_at"})
+        self.assertSameContent(ORDER_URL, {"pagination": "cursor"})
+
+    def test_order_list_queries_do_not_grow_with_tickets(self):
+        with self.assertNumQueries(5):
+            self.client.get(ORDER_URL)
+
+        order = sample_order(self.user)
+        for trip in self.trips[2:8]:
+            sample_ticket(self.user, trip, order=order)
+
+        with self.assertNumQueries(5):
+            self.client.get(ORDER_URL)
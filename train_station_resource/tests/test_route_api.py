@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from rest_framework.test import APIClient
@@ -11,8 +12,10 @@ from train_station_resource.serializers import (
 )
 from .models_create_sample import sample_station, sample_route
 from train_station_resource.models import Route
+from train_station_resource.network import get_network
 
 ROUTE_URL = reverse("train_station:route-list")
+SHORTEST_URL = reverse("train_station:route-shortest")
 
 
 class UnauthenticatedRouteApiTests(TestCase):
@@ -114,3 +117,83 @@ class AdminRouteApi(TestCase):
             )
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ShortestRouteApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Main@gmail.com", password="rvtquen"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.stations = [
+            sample_station(name=f"Station{index}") for index in range(4)
+        ]
+
+    def route(self, source: int, destination: int, distance: int) -> Route:
+        return Route.objects.create(
+            source=self.stations[source],
+            destination=self.stations[destination],
+            distance=distance,
+        )
+
+    def test_shortest_route_through_other_stations(self):
+        self.route(0, 3, 500)
+        first = self.route(0, 1, 100)
+        second = self.route(1, 2, 100)
+        third = self.route(2, 3, 100)
+
+        res = self.client.get(
+            SHORTEST_URL,
+            {"from": self.stations[0].id, "to": self.stations[3].id},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["distance"], 300)
+        self.assertEqual(res.data["routes"], [first.id, second.id, third.id])
+        self.assertEqual(
+            [station["name"] for station in res.data["stations"]],
+            ["Station0", "Station1", "Station2", "Station3"],
+        )
+
+    def test_routes_are_directed(self):
+        self.route(0, 1, 100)
+
+        res = self.client.get(
+            SHORTEST_URL,
+            {"from": self.stations[1].id, "to": self.stations[0].id},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_network_rebuilt_after_route_change(self):
+        route = self.route(0, 1, 100)
+        self.client.get(
+            SHORTEST_URL,
+            {"from": self.stations[0].id, "to": self.stations[1].id},
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            route.distance = 70
+            route.save()
+
+        res = self.client.get(
+            SHORTEST_URL,
+            {"from": self.stations[0].id, "to": self.stations[1].id},
+        )
+        self.assertEqual(res.data["distance"], 70)
+
+    @override_settings(ROUTE_NETWORK_TREE_CACHE_SIZE=2)
+    def test_number_of_kept_shortest_path_trees_is_bounded(self):
+        for source in range(3):
+            self.route(source, source + 1, 100)
+
+        for source in self.stations:
+            self.client.get(
+                SHORTEST_URL,
+                {"from": source.id, "to": self.stations[3].id},
+            )
+
+        self.assertEqual(get_network().shortest_tree.cache_info().currsize, 2)
@@ -0,0 +1,165 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from .models_create_sample import sample_trip, sample_ticket
+from train_station_resource.models import SeatHold, Order, Trip
+
+HOLD_URL = reverse("train_station:seathold-list")
+CHECKOUT_URL = reverse("train_station:seathold-checkout")
+ORDER_URL = reverse("train_station:order-list")
+
+
+def hold_data(trip: Trip, *places) -> dict:
+    return {
+        "tickets": [
+            {"cargo": cargo, "seat": seat, "trip": trip.id}
+            for cargo, seat in places
+        ]
+    }
+
+
+class UnauthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def test_post_method_auth_required(self):
+        res = self.client.post(HOLD_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Main@gmail.com", password="rvtquen"
+        )
+        self.other_user = get_user_model().objects.create_user(
+            email="Second@gmail.com", password="rvtquen2"
+        )
+        self.client.force_authenticate(self.user)
+        self.trip = sample_trip(name="Trip1")
+
+    def hold_for_other_user(self, *places, expires_in=timedelta(minutes=5)):
+        for cargo, seat in places:
+            SeatHold.objects.create(
+                trip=self.trip,
+                user=self.other_user,
+                cargo=cargo,
+                seat=seat,
+                expires_at=timezone.now() + expires_in,
+            )
+
+    def test_hold_seats(self):
+        res = self.client.post(
+            HOLD_URL, hold_data(self.trip, (1, 1), (1, 2)), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(
+            SeatHold.objects.filter(user=self.user).count(), 2
+        )
+
+    def test_can_not_hold_seat_held_by_other_user(self):
+        self.hold_for_other_user((1, 1))
+
+        res = self.client.post(
+            HOLD_URL, hold_data(self.trip, (1, 1)), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_can_not_hold_sold_seat(self):
+        sample_ticket(self.other_user, self.trip, cargo=1, seat=1)
+
+        res = self.client.post(
+            HOLD_URL, hold_data(self.trip, (1, 1)), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_hold_is_swept_and_seat_can_be_held(self):
+        self.hold_for_other_user((1, 1), expires_in=timedelta(minutes=-1))
+
+        res = self.client.post(
+            HOLD_URL, hold_data(self.trip, (1, 1)), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(
+            SeatHold.objects.filter(user=self.other_user).exists()
+        )
+
+    def test_list_shows_only_active_user_holds(self):
+        self.hold_for_other_user((2, 2))
+        self.client.post(
+            HOLD_URL, hold_data(self.trip, (1, 1)), format="json"
+        )
+
+        res = self.client.get(HOLD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 1)
+        self.assertEqual(res.data["results"][0]["cargo"], 1)
+
+    def test_release_hold(self):
+        res = self.client.post(
+            HOLD_URL, hold_data(self.trip, (1, 1)), format="json"
+        )
+
+        res = self.client.delete(
+            reverse("train_station:seathold-detail", args=[res.data[0]["id"]])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_checkout_turns_holds_into_order(self):
+        self.client.post(
+            HOLD_URL, hold_data(self.trip, (1, 1), (1, 2)), format="json"
+        )
+
+        res = self.client.post(CHECKOUT_URL)
+
+        self.trip.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 2)
+        self.assertEqual(self.trip.seats_sold, 2)
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertEqual(Order.objects.get().user, self.user)
+
+    def test_checkout_without_holds(self):
+        res = self.client.post(CHECKOUT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_can_not_order_seat_held_by_other_user(self):
+        self.hold_for_other_user((1, 1))
+
+        res = self.client.post(
+            ORDER_URL, hold_data(self.trip, (1, 1)), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_allocation_skips_seats_held_by_other_user(self):
+        self.hold_for_other_user((1, 1), (1, 2))
+
+        res = self.client.post(
+            reverse("train_station:trip-allocate", args=[self.trip.id]),
+            {"passengers": 2},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(ticket["cargo"], ticket["seat"])
+             for ticket in res.data["tickets"]],
+            [(1, 3), (1, 4)],
+        )
@@ -0,0 +1,88 @@
+import base64
+
+from django.test import SimpleTestCase
+
+from train_station_resource.seat_map import SeatMap
+
+
+class SeatMapTests(SimpleTestCase):
+    def test_empty_seat_map_has_no_taken_places(self):
+        seat_map = SeatMap(cargo_num=3, seats_in_cargo=5)
+
+        self.assertEqual(seat_map.taken_count(), 0)
+        self.assertEqual(list(seat_map.taken_places()), [])
+        self.assertEqual(len(seat_map.to_bytes()), 2)
+
+    def test_take_and_release_place(self):
+        seat_map = SeatMap(cargo_num=3, seats_in_cargo=5)
+
+        seat_map.take(2, 4)
+        self.assertTrue(seat_map.is_taken(2, 4))
+        self.assertFalse(seat_map.is_taken(3, 2))
+
+        seat_map.release(2, 4)
+        self.assertFalse(seat_map.is_taken(2, 4))
+
+    def test_taken_places_are_ordered_by_cargo_and_seat(self):
+        places = [(3, 5), (1, 2), (2, 1), (1, 1)]
+        seat_map = SeatMap.from_places(3, 5, places)
+
+        self.assertEqual(
+            list(seat_map.taken_places()), sorted(places)
+        )
+        self.assertEqual(seat_map.taken_count(), 4)
+
+    def test_from_places_skips_places_out_of_train_range(self):
+        seat_map = SeatMap.from_places(2, 2, [(1, 1), (3, 1), (1, 3)])
+
+        self.assertEqual(list(seat_map.taken_places()), [(1, 1)])
+
+    def test_bitmap_is_packed_least_significant_bit_first(self):
+        seat_map = SeatMap.from_places(2, 5, [(1, 1), (2, 4)])
+
+        self.assertEqual(seat_map.to_bytes(), bytes([0b00000001, 0b1]))
+        self.assertEqual(
+            base64.b64decode(seat_map.to_base64()), seat_map.to_bytes()
+        )
+
+    def test_seat_map_restored_from_bytes(self):
+        seat_map = SeatMap.from_places(4, 10, [(4, 10), (2, 3)])
+
+        restored = SeatMap(4, 10, memoryview(seat_map.to_bytes()))
+
+        self.assertEqual(
+            list(restored.taken_places()), [(2, 3), (4, 10)]
+        )
+
+    def test_free_runs(self):
+        seat_map = SeatMap.from_places(2, 5, [(1, 2), (1, 3), (2, 5)])
+
+        self.assertEqual(
+            list(seat_map.free_runs()),
+            [(1, 1, 1), (1, 4, 2), (2, 1, 4)],
+        )
+
+    def test_find_block_prefers_smallest_fitting_run(self):
+        seat_map = SeatMap.from_places(2, 5, [(1, 2), (1, 3), (2, 5)])
+
+        self.assertEqual(seat_map.find_block(2), [(1, 4), (1, 5)])
+        self.assertEqual(seat_map.find_block(3), [(2, 1), (2, 2), (2, 3)])
+
+    def test_find_block_keeps_group_in_one_cargo_when_possible(self):
+        seat_map = SeatMap.from_places(
+            2, 5, [(1, 2), (1, 4), (2, 2), (2, 3)]
+        )
+
+        self.assertEqual(seat_map.find_block(3), [(1, 1), (1, 3), (1, 5)])
+
+    def test_find_block_spreads_group_over_cargos(self):
+        seat_map = SeatMap.from_places(2, 3, [(1, 2), (2, 2)])
+
+        self.assertEqual(
+            seat_map.find_block(4), [(1, 1), (1, 3), (2, 1), (2, 3)]
+        )
+
+    def test_find_block_without_enough_free_seats(self):
+        seat_map = SeatMap.from_places(1, 3, [(1, 2)])
+
+        self.assertIsNone(seat_map.find_block(3))
@@ -0,0 +1,90 @@
+import json
+import re
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from train_station_system.settings import env_flag
+from .models_create_sample import sample_trip
+
+TRIP_URL = reverse("train_station:trip-list")
+
+METRIC = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) queries")?')
+
+
+def metrics(response) -> dict[str, tuple[float, str]]:
+    return {
+        name: (float(duration), queries)
+        for name, duration, queries
+        in METRIC.findall(response["Server-Timing"])
+    }
+
+
+@override_settings(SERVER_TIMING=True, SERVER_TIMING_LOG_RATE=0)
+class ServerTimingTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="main@gmail.com", password="rvtquen"
+        )
+        self.client.force_authenticate(self.user)
+        for name in ("Fast", "Slow", "Night", "Local", "Express"):
+            sample_trip(name)
+
+    def test_header_has_queries_and_durations(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(TRIP_URL)
+
+        timing = metrics(response)
+
+        self.assertEqual(
+            list(timing), ["db", "serialize", "render", "app", "total"]
+        )
+        self.assertEqual(timing["db"][1], "3")
+        self.assertGreater(timing["serialize"][0], 0)
+        self.assertGreater(timing["render"][0], 0)
+        self.assertGreaterEqual(
+            timing["total"][0],
+            sum(timing[name][0] for name in ("db", "serialize", "render")),
+        )
+
+    @override_settings(LIST_PROJECTIONS=False)
+    def test_serializers_are_timed(self):
+        timing = metrics(self.client.get(TRIP_URL))
+
+        self.assertGreater(timing["serialize"][0], 0)
+
+    @override_settings(SERVER_TIMING_LOG_RATE=1)
+    def test_sampled_requests_are_logged(self):
+        with self.assertLogs(
+            "train_station_resource.profiling", "INFO"
+        ) as logs:
+            self.client.get(TRIP_URL)
+
+        line = json.loads(logs.records[0].getMessage())
+
+        self.assertEqual(line["path"], TRIP_URL)
+        self.assertEqual(line["status"], 200)
+        self.assertEqual(line["queries"], 3)
+        self.assertEqual(
+            {"db_ms", "serialize_ms", "render_ms", "app_ms", "total_ms"}
+            - set(line),
+            set(),
+        )
+
+    @override_settings(SERVER_TIMING=False)
+    def test_no_header_when_disabled(self):
+        response = self.client.get(TRIP_URL)
+
+        self.assertNotIn("Server-Timing", response)
+
+    def test_flag_is_off_for_zero_and_false(self):
+        for value, enabled in (
+            ("1", True), ("true", True), ("0", False), ("false", False)
+        ):
+            with mock.patch.dict("os.environ", {"SERVER_TIMING": value}):
+                self.assertIs(env_flag("SERVER_TIMING"), enabled)
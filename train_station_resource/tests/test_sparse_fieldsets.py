@@ -0,0 +1,153 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .models_create_sample import (
+    sample_trip,
+    sample_ticket,
+    sample_crew,
+    sample_order,
+    detail_url,
+)
+
+TRIP_URL = reverse("train_station:trip-list")
+TRAIN_URL = reverse("train_station:train-list")
+ORDER_URL = reverse("train_station:order-list")
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Main@gmail.com", password="rvtquen"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.trip = sample_trip(name="Trip1")
+        self.trip.crew.add(sample_crew(), sample_crew(first_name="Olena"))
+        sample_trip(name="Trip2")
+
+        order = sample_order(self.user)
+        sample_ticket(self.user, self.trip, order=order)
+
+    def assertSameContent(self, url, params):
+        fast = self.client.get(url, params)
+        with override_settings(LIST_PROJECTIONS=False):
+            slow = self.client.get(url, params)
+
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+
+        return fast
+
+    @staticmethod
+    def view_query(res) -> str:
+        return str(res.renderer_context["view"].get_queryset().query)
+
+    def test_trip_list_returns_requested_fields(self):
+        res = self.assertSameContent(
+            TRIP_URL, {"fields": "available_tickets,id,departure_time"}
+        )
+
+        self.assertEqual(
+            list(res.data["results"][0]),
+            ["id", "departure_time", "available_tickets"],
+        )
+
+    def test_trip_list_without_crew_and_route_skips_their_queries(self):
+        params = {"fields": "id,departure_time,arrival_time"}
+
+        # count, page
+        with self.assertNumQueries(2):
+            self.client.get(TRIP_URL, params)
+
+        with override_settings(LIST_PROJECTIONS=False):
+            with self.assertNumQueries(2):
+                res = self.client.get(TRIP_URL, params)
+
+        self.assertNotIn("JOIN", self.view_query(res))
+        self.assertNotIn("available_tickets", self.view_query(res))
+
+    def test_trip_list_includes_full_relations(self):
+        res = self.client.get(
+            TRIP_URL, {"include": "crew,train", "fields": "id"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        trip = next(
+            trip for trip in res.data["results"] if trip["id"] == self.trip.id
+        )
+        self.assertEqual(list(trip), ["id", "crew", "train"])
+        self.assertEqual(
+            {member["first_name"] for member in trip["crew"]},
+            {"MainFirst", "Olena"},
+        )
+        self.assertEqual(trip["train"]["train_type_name"], "Trip1")
+
+    def test_trip_detail_returns_requested_fields(self):
+        res = self.client.get(
+            detail_url("trip", self.trip.id),
+            {"fields": "id,taken_places"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data, {"id": self.trip.id, "taken_places": [
+                {"cargo": 1, "seat": 1}
+            ]}
+        )
+
+    def test_unknown_field_or_relation_is_rejected(self):
+        res = self.client.get(TRIP_URL, {"fields": "id,seat_map"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", res.data)
+
+        res = self.client.get(TRIP_URL, {"include": "tickets"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("include", res.data)
+
+    def test_train_list_without_type_does_not_join_it(self):
+        res = self.client.get(TRAIN_URL, {"fields": "id,name,capacity"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(res.data["results"][0]), [
+            "id", "name", "capacity"
+        ])
+        self.assertNotIn("JOIN", self.view_query(res))
+
+    def test_train_list_includes_train_type(self):
+        res = self.client.get(TRAIN_URL, {"include": "train_type"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {train["train_type"]["name"] for train in res.data["results"]},
+            {"Trip1", "Trip2"},
+        )
+
+    def test_order_list_without_tickets_skips_ticket_queries(self):
+        params = {"fields": "id,created_at"}
+
+        res = self.assertSameContent(ORDER_URL, params)
+
+        # count, page
+        with self.assertNumQueries(2):
+            self.client.get(ORDER_URL, params)
+
+        self.assertEqual(list(res.data["results"][0]), ["id", "created_at"])
+
+    def test_fields_are_ignored_when_creating(self):
+        trip = sample_trip(name="Trip3")
+
+        res = self.client.post(
+            f"{ORDER_URL}?fields=id",
+            {"tickets": [{"cargo": 1, "seat": 1, "trip": trip.id}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIn("tickets", res.data)
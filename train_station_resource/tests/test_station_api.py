@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 
@@ -10,6 +11,8 @@ from .models_create_sample import sample_station
 from train_station_resource.models import Station
 
 STATION_URL = reverse("train_station:station-list")
+NEARBY_URL = reverse("train_station:station-nearby")
+AUTOCOMPLETE_URL = reverse("train_station:station-autocomplete")
 
 
 class UnauthenticatedStationApiTests(TestCase):
@@ -88,3 +91,120 @@ class AdminStationApi(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         self.assertEqual(res.data, serializer.data)
+
+
+class NearbyStationApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Main@gmail.com", password="rvtquen"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.kyiv = sample_station("Kyiv", latitude=50.45, longitude=30.52)
+        self.brovary = sample_station(
+            "Brovary", latitude=50.51, longitude=30.79
+        )
+        self.lviv = sample_station("Lviv", latitude=49.84, longitude=24.03)
+
+    def test_nearby_stations_ordered_by_distance(self):
+        res = self.client.get(
+            NEARBY_URL, {"lat": 50.45, "lon": 30.6, "radius": 100}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [station["name"] for station in res.data], ["Kyiv", "Brovary"]
+        )
+        self.assertAlmostEqual(res.data[0]["distance"], 5.67, places=1)
+
+    def test_nearby_stations_limited_by_k(self):
+        res = self.client.get(
+            NEARBY_URL, {"lat": 50.5, "lon": 30.8, "radius": 1000, "k": 2}
+        )
+
+        self.assertEqual(
+            [station["name"] for station in res.data], ["Brovary", "Kyiv"]
+        )
+
+    def test_nearby_stations_across_antimeridian(self):
+        sample_station("Anadyr", latitude=64.73, longitude=177.51)
+
+        res = self.client.get(
+            NEARBY_URL, {"lat": 64.73, "lon": -179.9, "radius": 200}
+        )
+
+        self.assertEqual(
+            [station["name"] for station in res.data], ["Anadyr"]
+        )
+
+    def test_nearby_stations_see_new_station(self):
+        self.client.get(NEARBY_URL, {"lat": 0, "lon": 0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sample_station("Null Island", latitude=0.1, longitude=0.1)
+
+        res = self.client.get(NEARBY_URL, {"lat": 0, "lon": 0})
+
+        self.assertEqual(
+            [station["name"] for station in res.data], ["Null Island"]
+        )
+
+    def test_nearby_stations_invalid_coordinates(self):
+        res = self.client.get(NEARBY_URL, {"lat": 91, "lon": 0})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("lat", res.data)
+
+
+class StationAutocompleteApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Main@gmail.com", password="rvtquen"
+        )
+        self.client.force_authenticate(self.user)
+
+        for name in ["Kyiv", "Kyiv-Pasazhyrskyi", "Darnytsia Kyiv", "Lviv"]:
+            sample_station(name)
+
+    def autocomplete(self, **params) -> list[str]:
+        res = self.client.get(AUTOCOMPLETE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [station["name"] for station in res.data]
+
+    def test_autocomplete_ranks_exact_then_prefix_then_word(self):
+        self.assertEqual(
+            self.autocomplete(q="Kyiv"),
+            ["Kyiv", "Kyiv-Pasazhyrskyi", "Darnytsia Kyiv"],
+        )
+
+    def test_autocomplete_short_prefix(self):
+        self.assertEqual(
+            self.autocomplete(q="k", limit=2), ["Kyiv", "Kyiv-Pasazhyrskyi"]
+        )
+
+    def test_autocomplete_ignores_case_and_accents(self):
+        sample_station("Kraków Główny")
+        cache.clear()
+
+        self.assertEqual(self.autocomplete(q="KRAKOW"), ["Kraków Główny"])
+
+    def test_autocomplete_finds_similar_names(self):
+        self.assertEqual(self.autocomplete(q="lvivv"), ["Lviv"])
+
+    def test_autocomplete_sees_new_station(self):
+        self.autocomplete(q="odesa")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sample_station("Odesa")
+
+        self.assertEqual(self.autocomplete(q="odesa"), ["Odesa"])
+
+    def test_autocomplete_query_required(self):
+        res = self.client.get(AUTOCOMPLETE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
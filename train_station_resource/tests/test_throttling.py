@@ -0,0 +1,134 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.throttling import SimpleRateThrottle
+
+from train_station_resource.throttling import (
+    ScopedSlidingWindowThrottle,
+    UserSlidingWindowThrottle,
+)
+from .models_create_sample import sample_trip
+
+ORDER_URL = reverse("train_station:order-list")
+STATION_URL = reverse("train_station:station-list")
+
+RATES = {"user": "1222/day", "booking": "2/min"}
+
+
+class FakeView:
+    action = "create"
+    throttle_scopes = {"create": "booking"}
+
+
+class SlidingWindowThrottleTests(TestCase):
+    def setUp(self) -> None:
+        caches["throttle"].clear()
+        self.user = get_user_model().objects.create_user(
+            email="main@gmail.com", password="rvtquen"
+        )
+        self.request = APIRequestFactory().get("/")
+        self.request.user = self.user
+        self.now = 6000.0
+
+    def allow(self, throttle_class=UserSlidingWindowThrottle) -> bool:
+        with mock.patch.object(SimpleRateThrottle, "THROTTLE_RATES", RATES):
+            throttle = throttle_class()
+            throttle.timer = lambda: self.now
+            self.throttle = throttle
+
+            return throttle.allow_request(self.request, FakeView())
+
+    def test_requests_over_limit_are_rejected(self):
+        self.assertTrue(self.allow(ScopedSlidingWindowThrottle))
+        self.assertTrue(self.allow(ScopedSlidingWindowThrottle))
+        self.assertFalse(self.allow(ScopedSlidingWindowThrottle))
+        self.assertEqual(self.throttle.wait(), 60)
+
+    def test_previous_window_is_weighted(self):
+        self.allow(ScopedSlidingWindowThrottle)
+        self.allow(ScopedSlidingWindowThrottle)
+
+        # half of previous window with 2 requests is still counted
+        self.now += 90
+        self.assertTrue(self.allow(ScopedSlidingWindowThrottle))
+        self.assertFalse(self.allow(ScopedSlidingWindowThrottle))
+        self.assertAlmostEqual(self.throttle.wait(), 30)
+
+        self.now += 30
+        self.assertTrue(self.allow(ScopedSlidingWindowThrottle))
+
+    def test_rejected_requests_are_not_counted(self):
+        for _ in range(5):
+            self.allow(ScopedSlidingWindowThrottle)
+
+        self.now += 60
+        self.assertFalse(self.allow(ScopedSlidingWindowThrottle))
+        self.now += 60
+        self.assertTrue(self.allow(ScopedSlidingWindowThrottle))
+
+    def test_memory_per_user_is_fixed(self):
+        for _ in range(100):
+            self.allow()
+
+        keys = [
+            key for key in caches["throttle"]._cache
+            if "throttle_user" in key
+        ]
+        self.assertEqual(len(keys), 1)
+
+    def test_windows_survive_clearing_default_cache(self):
+        self.allow(ScopedSlidingWindowThrottle)
+        self.allow(ScopedSlidingWindowThrottle)
+        cache.clear()
+
+        self.assertFalse(self.allow(ScopedSlidingWindowThrottle))
+
+    def test_view_without_scope_is_not_limited(self):
+        FakeView.action = "list"
+        self.addCleanup(setattr, FakeView, "action", "create")
+
+        for _ in range(5):
+            self.assertTrue(self.allow(ScopedSlidingWindowThrottle))
+
+
+class BookingThrottleApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        caches["throttle"].clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="main@gmail.com", password="rvtquen"
+        )
+        self.client.force_authenticate(self.user)
+        self.trip = sample_trip(name="Trip1")
+
+        patcher = mock.patch.object(
+            SimpleRateThrottle, "THROTTLE_RATES", RATES
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def order(self, seat: int):
+        return self.client.post(
+            ORDER_URL,
+            {"tickets": [{"cargo": 1, "seat": seat, "trip": self.trip.id}]},
+            format="json",
+        )
+
+    def test_booking_is_limited_stricter_than_reading(self):
+        self.assertEqual(self.order(1).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.order(2).status_code, status.HTTP_201_CREATED)
+
+        res = self.order(3)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+
+        for _ in range(5):
+            res = self.client.get(ORDER_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -3,6 +3,7 @@ import os
 
 from PIL import Image
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 
@@ -24,6 +25,7 @@ from train_station_resource.models import Train
 
 TRAIN_URL = reverse("train_station:train-list")
 TRIP_URL = reverse("train_station:trip-list")
+AUTOCOMPLETE_URL = reverse("train_station:train-autocomplete")
 
 
 def upload_train_image_url(train_id: int):
@@ -150,6 +152,20 @@ class AuthenticatedTrainApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_autocomplete_train_names(self):
+        cache.clear()
+        sample_train(name="Intercity Kyiv")
+        sample_train(name="Kyiv Express")
+        sample_train(name="Lviv Express")
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "kyi"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [train["name"] for train in res.data],
+            ["Kyiv Express", "Intercity Kyiv"],
+        )
+
 
 class AdminTrainApi(TestCase):
     def setUp(self) -> None:
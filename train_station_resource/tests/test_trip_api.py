@@ -1,7 +1,11 @@
+import base64
 from datetime import datetime, timedelta
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.db.models import Count, F
 
@@ -19,9 +23,11 @@ from .models_create_sample import (
     sample_route,
     sample_station,
     sample_crew,
+    sample_ticket,
     detail_url,
 )
-from train_station_resource.models import Trip
+from train_station_resource.models import Trip, Order
+from train_station_resource.views import TripViewSet
 
 TRIP_URL = reverse("train_station:trip-list")
 
@@ -124,6 +130,80 @@ class AuthenticatedTripApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializers.data)
 
+    def test_trip_detail_taken_places_match_tickets(self):
+        trip = sample_trip(name="Trip1")
+        sample_ticket(self.user, trip, cargo=2, seat=1)
+        sample_ticket(self.user, trip, cargo=1, seat=3)
+
+        res = self.client.get(detail_url("trip", trip.id))
+
+        self.assertEqual(
+            res.data["taken_places"],
+            [{"cargo": 1, "seat": 3}, {"cargo": 2, "seat": 1}],
+        )
+
+    def test_taken_places_follow_train_layout_change(self):
+        trip = sample_trip(name="Trip1")
+        sample_ticket(self.user, trip, cargo=2, seat=1)
+
+        trip.train.seats_in_cargo = 10
+        trip.train.save()
+        res = self.client.get(detail_url("trip", trip.id))
+
+        self.assertEqual(res.data["taken_places"], [{"cargo": 2, "seat": 1}])
+        self.assertEqual(Trip.objects.get(id=trip.id).seats_sold, 1)
+
+    def test_trip_seat_map(self):
+        trip = sample_trip(name="Trip1")
+        sample_ticket(self.user, trip, cargo=1, seat=2)
+        sample_ticket(self.user, trip, cargo=2, seat=1)
+
+        res = self.client.get(
+            reverse("train_station:trip-seat-map", args=[trip.id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["cargo_num"], 5)
+        self.assertEqual(res.data["seats_in_cargo"], 5)
+        self.assertEqual(res.data["seats_sold"], 2)
+        self.assertEqual(
+            base64.b64decode(res.data["seat_map"]),
+            bytes([0b00100010, 0, 0, 0]),
+        )
+
+    def test_allocate_seats_for_group(self):
+        trip = sample_trip(name="Trip1")
+        sample_ticket(self.user, trip, cargo=1, seat=2)
+
+        res = self.client.post(
+            reverse("train_station:trip-allocate", args=[trip.id]),
+            {"passengers": 3},
+        )
+
+        trip.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(ticket["cargo"], ticket["seat"])
+             for ticket in res.data["tickets"]],
+            [(1, 3), (1, 4), (1, 5)],
+        )
+        self.assertEqual(trip.seats_sold, 4)
+        self.assertEqual(
+            Order.objects.get(id=res.data["id"]).user, self.user
+        )
+
+    def test_allocate_more_seats_than_free(self):
+        train = sample_train(name="Train1", cargo_num=1, seats_in_cargo=2)
+        trip = sample_trip(name="Trip1", train=train)
+
+        res = self.client.post(
+            reverse("train_station:trip-allocate", args=[trip.id]),
+            {"passengers": 3},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
     def test_filter_trip_list_by_train_id(self):
         train1 = sample_train(name="Train1")
 
@@ -179,6 +259,62 @@ class AuthenticatedTripApiTests(TestCase):
         self.assertIn(serializer2.data, res.data["results"])
         self.assertNotIn(serializer3.data, res.data["results"])
 
+    def test_filter_trip_list_by_departure_range(self):
+        trip1 = sample_trip(
+            name="Trip1", departure_time=datetime(2024, 1, 2, 8)
+        )
+        trip2 = sample_trip(
+            name="Trip2", departure_time=datetime(2024, 1, 2, 23, 59)
+        )
+        trip3 = sample_trip(
+            name="Trip3", departure_time=datetime(2024, 1, 3)
+        )
+
+        res = self.client.get(
+            TRIP_URL,
+            {
+                "departure_after": "2024-01-02T08:00:00",
+                "departure_before": "2024-01-03T00:00:00",
+            }
+        )
+        ids = [trip["id"] for trip in res.data["results"]]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(trip1.id, ids)
+        self.assertIn(trip2.id, ids)
+        self.assertNotIn(trip3.id, ids)
+
+    def test_filter_trip_list_by_date(self):
+        trip1 = sample_trip(
+            name="Trip1", departure_time=datetime(2024, 1, 2)
+        )
+        trip2 = sample_trip(
+            name="Trip2", departure_time=datetime(2024, 1, 2, 23, 59)
+        )
+        trip3 = sample_trip(
+            name="Trip3", departure_time=datetime(2024, 1, 3)
+        )
+
+        res = self.client.get(TRIP_URL, {"date": "2024-01-02"})
+        ids = [trip["id"] for trip in res.data["results"]]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(ids), [trip1.id, trip2.id])
+        self.assertNotIn(trip3.id, ids)
+
+    def test_filter_trip_list_by_route_destination(self):
+        trip1 = sample_trip(name="Trip1")
+        trip2 = sample_trip(name="Trip2")
+
+        res = self.client.get(
+            TRIP_URL, {"destination": trip1.route.destination_id}
+        )
+        ids = [trip["id"] for trip in res.data["results"]]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(ids, [trip1.id])
+        self.assertNotIn(trip2.id, ids)
+
     def test_create_trip_forbidden(self):
         res = self.client.post(TRIP_URL)
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -273,6 +409,36 @@ class AdminTripApi(TestCase):
             res.data["train"], trip.train.id,
         )
 
+    def test_put_keeps_seats_booked_after_trip_was_loaded(self):
+        trip = sample_trip(name="Trip1")
+        crew = sample_crew(first_name="Elon", last_name="Mask")
+        get_object = TripViewSet.get_object
+
+        def get_object_then_book(view):
+            instance = get_object(view)
+            # an order commits while the trip is being updated
+            sample_ticket(self.admin, trip, cargo=1, seat=2)
+            return instance
+
+        with mock.patch.object(
+            TripViewSet, "get_object", get_object_then_book
+        ):
+            res = self.client.put(
+                detail_url("trip", trip.id),
+                {
+                    "crew": [crew.id],
+                    "route": trip.route.id,
+                    "train": trip.train.id,
+                    "departure_time": datetime.today(),
+                    "arrival_time": datetime.today() + timedelta(days=1),
+                },
+            )
+
+        trip.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(trip.seats_sold, 1)
+        self.assertTrue(trip.get_seat_map().is_taken(1, 2))
+
     def test_admin_trip_can_make_patch_request(self):
         trip = sample_trip(name="Trip1")
         route = sample_route(
@@ -299,6 +465,26 @@ class AdminTripApi(TestCase):
             res.data["route"], trip.route.id,
         )
 
+    def test_trip_update_response_has_no_internal_columns(self):
+        trip = sample_trip(name="Trip1")
+
+        res = self.client.patch(
+            detail_url("trip", trip.id),
+            {"arrival_time": datetime.today() + timedelta(days=2)},
+        )
+
+        self.assertEqual(
+            set(res.data),
+            {
+                "id",
+                "departure_time",
+                "arrival_time",
+                "route",
+                "train",
+                "crew",
+            },
+        )
+
     def test_admin_can_delete_trip(self):
         trip = sample_trip(name="Trip1")
 
@@ -309,3 +495,90 @@ class AdminTripApi(TestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         with self.assertRaises(Trip.DoesNotExist):
             Trip.objects.get(id=trip.id)
+
+
+class TripCursorPaginationTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="Main@gmail.com", password="rvtquen"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_pages_follow_departure_time_and_id(self):
+        departure = datetime(2099, 1, 1)
+        for index in range(13):
+            sample_trip(
+                name=f"Trip{index}",
+                # pairs of trips share departure time
+                departure_time=departure + timedelta(hours=index // 2),
+            )
+        expected = list(
+            Trip.objects.order_by("departure_time", "id").values_list(
+                "id", flat=True
+            )
+        )
+
+        trip_ids = []
+        url, params = TRIP_URL, {"pagination": "cursor"}
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(url, params)
+            params = None
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", res.data)
+            self.assertFalse(
+                any("COUNT(" in query["sql"] for query in queries)
+            )
+            trip_ids += [trip["id"] for trip in res.data["results"]]
+            url = res.data["next"]
+
+        self.assertEqual(trip_ids, expected)
+
+    def test_cursor_pages_of_equal_departure_times_use_no_offset(self):
+        departure = datetime(2099, 1, 1)
+        for index in range(25):
+            sample_trip(name=f"Trip{index}", departure_time=departure)
+        expected = list(Trip.objects.order_by("id").values_list(
+            "id", flat=True
+        ))
+
+        pages = []
+        url, params = TRIP_URL, {"pagination": "cursor"}
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(url, params)
+            params = None
+
+            self.assertFalse(
+                any("OFFSET" in query["sql"] for query in queries)
+            )
+            pages.append([trip["id"] for trip in res.data["results"]])
+            url = res.data["next"]
+
+        self.assertEqual(sum(pages, []), expected)
+
+        url = res.data["previous"]
+        for page in reversed(pages[:-1]):
+            res = self.client.get(url)
+            self.assertEqual(
+                [trip["id"] for trip in res.data["results"]], page
+            )
+            url = res.data["previous"]
+        self.assertIsNone(url)
+
+    def test_invalid_cursor_returns_not_found(self):
+        res = self.client.get(
+            TRIP_URL,
+            {"pagination": "cursor", "cursor": "cD1bImFiYyIsICIxIl0="},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_pagination_is_default(self):
+        sample_trip(name="Trip1")
+
+        res = self.client.get(TRIP_URL)
+
+        self.assertEqual(res.data["count"], 1)
@@ -0,0 +1,105 @@
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+from .metrics import THROTTLED
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Sliding window counter kept in the throttle cache.
+
+    Requests are counted in fixed windows of the rate duration, the
+    number of requests in the last duration is estimated from the
+    current window count and the previous window count weighted by
+    the part of previous window still inside the last duration. Every
+    client takes two integers in the cache, updated with atomic incr
+    """
+
+    cache = caches["throttle"]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, self.elapsed = divmod(self.now, self.duration)
+        current_key = f"{self.key}:{int(window)}"
+        previous_key = f"{self.key}:{int(window) - 1}"
+
+        self.cache.add(current_key, 0, timeout=self.duration * 2)
+        try:
+            self.current = self.cache.incr(current_key)
+        except ValueError:
+            # evicted between add and incr
+            self.cache.set(current_key, 1, timeout=self.duration * 2)
+            self.current = 1
+        self.previous = self.cache.get(previous_key, 0)
+
+        if self.estimate(self.current) > self.num_requests:
+            # rejected requests do not use up the limit
+            try:
+                self.cache.decr(current_key)
+            except ValueError:
+                pass
+            self.current -= 1
+            THROTTLED.labels(self.scope).inc()
+            return self.throttle_failure()
+
+        return self.throttle_success()
+
+    def estimate(self, current: int) -> float:
+        weight = 1 - self.elapsed / self.duration
+        return self.previous * weight + current
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        """Return seconds until one more request fits the window"""
+        if self.current + 1 > self.num_requests:
+            return self.duration - self.elapsed
+
+        # previous window share that has to slide out of the window
+        excess = self.estimate(self.current + 1) - self.num_requests
+        return excess / self.previous * self.duration
+
+
+class UserSlidingWindowThrottle(SlidingWindowThrottle):
+    """Limit all requests of a user, or of an IP address
+    for anonymous requests"""
+
+    scope = "user"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class ScopedSlidingWindowThrottle(UserSlidingWindowThrottle):
+    """Limit requests of view actions listed in throttle_scopes
+    of the view, or of the whole view with throttle_scope, with
+    the rate of that scope"""
+
+    def __init__(self):
+        # rate is known only when the view is known
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, "throttle_scopes", {}).get(
+            getattr(view, "action", None),
+            getattr(view, "throttle_scope", None),
+        )
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        return super().allow_request(request, view)
@@ -9,6 +9,8 @@ from .views import (
     CrewViewSet,
     TripViewSet,
     OrderViewSet,
+    SeatHoldViewSet,
+    JourneyViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -19,6 +21,8 @@ router.register("trains", TrainViewSet)
 router.register("crews", CrewViewSet)
 router.register("trips", TripViewSet)
 router.register("orders", OrderViewSet)
+router.register("holds", SeatHoldViewSet)
+router.register("journeys", JourneyViewSet, basename="journey")
 
 urlpatterns = [path("", include(router.urls))]
 
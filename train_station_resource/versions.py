@@ -0,0 +1,88 @@
+"""Version counters shared by all processes through the Django cache.
+
+Per-process indexes (timetable, station search) and response caches
+remember the version they were built for and rebuild once it changes.
+Counters start from the current time in nanoseconds, so a counter
+evicted from the cache never comes back with an old value
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+
+def version_key(name: str) -> str:
+    return f"version:{name}"
+
+
+def get_version(name: str) -> int:
+    key = version_key(name)
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def get_versions(*names: str) -> tuple[int, ...]:
+    keys = [version_key(name) for name in names]
+    versions = cache.get_many(keys)
+
+    return tuple(
+        versions[key] if key in versions else get_version(name)
+        for key, name in zip(keys, names)
+    )
+
+
+def bump_version(name: str) -> int:
+    """Increase version counter and return its new value"""
+    key = version_key(name)
+
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+        return cache.incr(key)
+
+
+class VersionedValue:
+    """Value of this process built by loader, built again
+    when shared version counter of the value changes"""
+
+    def __init__(self, name: str, loader) -> None:
+        self.name = name
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.value = None
+        self.version = None
+
+    def get(self):
+        version = get_version(self.name)
+
+        with self.lock:
+            if self.value is None or self.version != version:
+                self.value = self.loader()
+                self.version = version
+
+            return self.value
+
+    def invalidate(self) -> None:
+        bump_version(self.name)
+
+    def update(self, apply) -> None:
+        """Bump version and replace value of this process with
+        apply(value) when it was up to date. apply returns a new value
+        and does not change the given one, which other threads may
+        still read, or None when value has to be rebuilt"""
+        version = bump_version(self.name)
+
+        with self.lock:
+            if self.value is None or self.version != version - 1:
+                return
+
+            value = apply(self.value)
+            if value is not None:
+                self.value = value
+                self.version = version
@@ -1,12 +1,18 @@
-from django.db.models import Count, F
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Max, Prefetch, Q
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 
 from rest_framework import viewsets, status, mixins
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.filters import SearchFilter, OrderingFilter
 
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiParameter,
@@ -15,6 +21,10 @@ from drf_spectacular.utils import (
 
 from .serializers import (
     StationSerializer,
+    AutocompleteQuerySerializer,
+    AutocompleteSerializer,
+    NearbyStationQuerySerializer,
+    NearbyStationSerializer,
     RouteSerializer,
     RouteListSerializer,
     CrewSerializer,
@@ -26,10 +36,44 @@ from .serializers import (
     TripSerializer,
     TripListSerializer,
     TripDetailSerializer,
+    TripSeatMapSerializer,
+    SeatAllocationSerializer,
+    SeatHoldSerializer,
+    SeatHoldCreateSerializer,
     OrderSerializer,
     OrderListSerializer,
+    JourneyQuerySerializer,
+    TicketExportQuerySerializer,
+    JourneySerializer,
+    ShortestRouteQuerySerializer,
+    ShortestRouteSerializer,
 )
 
+from .caching import CachedListMixin
+from .conditional import ConditionalGetMixin
+from .fieldsets import (
+    FIELDS_PARAMETER,
+    INCLUDE_PARAMETER,
+    SparseFieldsetMixin,
+)
+from .filters import TripFilter
+from .exports import export_response
+from .idempotency import IdempotentCreateMixin
+from .projections import (
+    OrderListProjection,
+    ProjectionListMixin,
+    TripListProjection,
+)
+from .paginations import (
+    CursorPaginationMixin,
+    TripCursorPagination,
+    OrderCursorPagination,
+)
+from .geo import get_station_index
+from .journeys import get_timetable
+from .network import get_network
+from .search import station_names, train_names
+from .bookings import allocate_seats, hold_seats, checkout_holds
 from .models import (
     Station,
     Route,
@@ -38,19 +82,73 @@ from .models import (
     Train,
     Trip,
     Order,
+    SeatHold,
 )
 
 
+class AutocompleteMixin:
+    """Add autocomplete action answering from autocomplete_index
+    instead of the database"""
+
+    autocomplete_index = None
+
+    @extend_schema(
+        parameters=[AutocompleteQuerySerializer],
+        responses=AutocompleteSerializer(many=True),
+    )
+    @action(methods=["get"], detail=False)
+    def autocomplete(self, request):
+        """Return names best matching typed text"""
+        query = AutocompleteQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        matches = self.autocomplete_index.get().search(
+            query.validated_data["q"], query.validated_data["limit"]
+        )
+        serializer = AutocompleteSerializer(matches, many=True)
+
+        return Response(serializer.data)
+
+
 class StationViewSet(
+    ConditionalGetMixin,
+    CachedListMixin,
+    AutocompleteMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet,
 ):
     queryset = Station.objects.all()
     serializer_class = StationSerializer
+    list_cache_models = (Station,)
+    conditional_models = (Station,)
+    autocomplete_index = station_names
+
+    @extend_schema(
+        parameters=[NearbyStationQuerySerializer],
+        responses=NearbyStationSerializer(many=True),
+    )
+    @action(methods=["get"], detail=False)
+    def nearby(self, request):
+        """Return up to k stations within radius km of the point
+        ordered by distance"""
+        query = NearbyStationQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        stations = get_station_index().nearby(
+            query.validated_data["lat"],
+            query.validated_data["lon"],
+            query.validated_data["radius"],
+            query.validated_data["k"],
+        )
+        serializer = NearbyStationSerializer(stations, many=True)
+
+        return Response(serializer.data)
 
 
 class RouteViewSet(
+    ConditionalGetMixin,
+    CachedListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet,
@@ -59,6 +157,8 @@ class RouteViewSet(
         "source", "destination"
     )
     serializer_class = RouteSerializer
+    list_cache_models = (Route, Station)
+    conditional_models = (Route, Station)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -66,17 +166,63 @@ class RouteViewSet(
 
         return RouteSerializer
 
+    @extend_schema(
+        parameters=[
+            ShortestRouteQuerySerializer,
+            OpenApiParameter(
+                name="from",
+                description="Source station id",
+                type=int,
+                required=True,
+            ),
+        ],
+        responses=ShortestRouteSerializer,
+    )
+    @action(methods=["get"], detail=False)
+    def shortest(self, request):
+        """Return the shortest chain of routes between two stations"""
+        query = ShortestRouteQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        path = get_network().shortest_path(
+            query.validated_data["from"].id,
+            query.validated_data["to"].id,
+        )
+        if path is None:
+            raise NotFound("There are no routes between these stations")
+
+        stations = Station.objects.in_bulk(path.stations)
+        serializer = ShortestRouteSerializer(
+            {
+                "distance": path.distance,
+                "stations": [
+                    stations[station_id] for station_id in path.stations
+                ],
+                "routes": path.routes,
+            }
+        )
+
+        return Response(serializer.data)
+
 
 class TrainTypeViewSet(
+    ConditionalGetMixin,
+    CachedListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet,
 ):
     queryset = TrainType.objects.all()
     serializer_class = TrainTypeSerializer
+    list_cache_models = (TrainType,)
+    conditional_models = (TrainType,)
 
 
 class TrainViewSet(
+    ConditionalGetMixin,
+    CachedListMixin,
+    AutocompleteMixin,
+    SparseFieldsetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -86,9 +232,12 @@ class TrainViewSet(
         "train_type"
     )
     serializer_class = TrainSerializer
+    list_cache_models = (Train, TrainType)
+    conditional_models = (Train, TrainType)
     filter_backends = [SearchFilter, DjangoFilterBackend]
     search_fields = ["name"]
     filterset_fields = ["train_type"]
+    autocomplete_index = train_names
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -102,6 +251,16 @@ class TrainViewSet(
 
         return TrainSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not (
+            self.field_requested("train_type")
+            or self.field_requested("train_type_name")
+        ):
+            queryset = queryset.select_related(None)
+
+        return queryset
+
     @action(
         methods=["post"],
         detail=True,
@@ -153,45 +312,159 @@ class TrainViewSet(
                         value=3
                     )
                 ]
-            )
+            ),
+            FIELDS_PARAMETER,
+            INCLUDE_PARAMETER,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(parameters=[FIELDS_PARAMETER])
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class CrewViewSet(
+    ConditionalGetMixin,
+    CachedListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet,
 ):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
+    list_cache_models = (Crew,)
+    conditional_models = (Crew,)
 
 
-class TripViewSet(viewsets.ModelViewSet):
-    queryset = Trip.objects.select_related(
-        "train",
-        "route__source",
-        "route__destination",
-    ).prefetch_related(
-        "crew"
-    ).annotate(available_tickets=(
-        F("train__cargo_num") * F("train__seats_in_cargo")
-        - Count("tickets")
-    ))
+class TripViewSet(
+    ConditionalGetMixin,
+    CursorPaginationMixin,
+    ProjectionListMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Trip.objects.all()
     serializer_class = TripSerializer
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ["train", "route__source"]
+    filterset_class = TripFilter
+    cursor_pagination_class = TripCursorPagination
+    conditional_models = (Trip, Route, Station, Train, Crew)
+    object_stamp_field = "updated_at"
+    throttle_scopes = {"allocate": "booking"}
+    list_projection = TripListProjection()
 
     def get_serializer_class(self):
         if self.action == "list":
             return TripListSerializer
         if self.action == "retrieve":
             return TripDetailSerializer
+        if self.action == "seat_map":
+            return TripSeatMapSerializer
+        if self.action == "allocate":
+            return SeatAllocationSerializer
 
         return TripSerializer
 
+    def get_queryset(self):
+        if self.action in ("seat_map", "allocate"):
+            return Trip.objects.select_related("train")
+
+        queryset = super().get_queryset()
+        if self.field_requested("route"):
+            queryset = queryset.select_related(
+                "route__source", "route__destination"
+            )
+        if self.field_included("train"):
+            queryset = queryset.select_related("train__train_type")
+        elif any(self.field_requested(name) for name in (
+            "train", "train_name", "train_image", "train_capacity"
+        )):
+            queryset = queryset.select_related("train")
+        if self.field_requested("crew"):
+            queryset = queryset.prefetch_related("crew")
+        if self.action == "list" and self.field_requested("available_tickets"):
+            queryset = queryset.annotate(available_tickets=(
+                F("train__cargo_num") * F("train__seats_in_cargo")
+                - F("seats_sold")
+            ))
+
+        return queryset
+
+    def get_conditional_models(self):
+        if self.action in ("seat_map", "allocate"):
+            # layout changes of trains are stamped on their trips
+            return (Trip,)
+
+        return super().get_conditional_models()
+
+    def get_object_stamp(self, lookup_value):
+        if self.action not in ("seat_map", "allocate"):
+            return super().get_object_stamp(lookup_value)
+
+        # held seats leave held_map when their holds expire
+        stamps = Trip.objects.filter(pk=lookup_value).annotate(
+            expired_hold=Max(
+                "holds__expires_at",
+                filter=Q(holds__expires_at__lte=timezone.now()),
+            )
+        ).values_list("updated_at", "expired_hold").first()
+        if stamps is None:
+            return None
+
+        return max(stamp for stamp in stamps if stamp is not None)
+
+    def seat_map_resource(self, pk) -> str:
+        return f"{self.basename}:{pk}:seatmap"
+
+    @action(methods=["get"], detail=True, url_path="seatmap")
+    def seat_map(self, request, pk=None):
+        """Return packed occupancy bitmap of trip seats,
+        answers conditional requests with ETag and Last-Modified"""
+        return self.object_conditional_response(
+            request,
+            self.seat_map_response,
+            pk=pk,
+            resource=self.seat_map_resource(pk),
+        )
+
+    def seat_map_response(self, request, pk=None):
+        serializer = self.get_serializer(self.get_object())
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(responses={201: OrderSerializer})
+    @action(
+        methods=["post"],
+        detail=True,
+        permission_classes=[IsAuthenticated],
+    )
+    def allocate(self, request, pk=None):
+        """Order the best free block of seats for a group of passengers,
+        adjacent seats in the same cargo are chosen when possible.
+        With the seat map ETag in If-Match the order is made only
+        while the seat map is unchanged"""
+        return self.object_conditional_response(
+            request,
+            self.allocate_response,
+            pk=pk,
+            resource=self.seat_map_resource(pk),
+        )
+
+    def allocate_response(self, request, pk=None):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        order = allocate_seats(
+            self.get_object(),
+            serializer.validated_data["passengers"],
+            user=request.user,
+        )
+
+        return Response(
+            OrderSerializer(order).data, status=status.HTTP_201_CREATED
+        )
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -229,14 +502,71 @@ class TripViewSet(viewsets.ModelViewSet):
                         value=2
                     )
                 ]
-            )
+            ),
+            OpenApiParameter(
+                name="destination",
+                description="Filter trips by route destination id",
+                type=int,
+                required=False,
+            ),
+            OpenApiParameter(
+                name="departure_after",
+                description="Trips departing at or after this moment",
+                type=OpenApiTypes.DATETIME,
+                required=False,
+                examples=[
+                    OpenApiExample(
+                        "Example1",
+                        description="Departing after noon of 2 Jan",
+                        value="2024-01-02T12:00:00"
+                    )
+                ]
+            ),
+            OpenApiParameter(
+                name="departure_before",
+                description="Trips departing before this moment",
+                type=OpenApiTypes.DATETIME,
+                required=False,
+            ),
+            OpenApiParameter(
+                name="date",
+                description="Trips departing on this day",
+                type=OpenApiTypes.DATE,
+                required=False,
+                examples=[
+                    OpenApiExample(
+                        "Example1",
+                        description="Departing on 2 Jan",
+                        value="2024-01-02"
+                    )
+                ]
+            ),
+            OpenApiParameter(
+                name="pagination",
+                description=(
+                    "Use 'cursor' for cursor pagination, pages are"
+                    " followed through next and previous links"
+                ),
+                type=str,
+                required=False,
+                enum=["cursor"],
+            ),
+            FIELDS_PARAMETER,
+            INCLUDE_PARAMETER,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(parameters=[FIELDS_PARAMETER])
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class OrderViewSet(
+    CursorPaginationMixin,
+    ProjectionListMixin,
+    IdempotentCreateMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet,
@@ -247,6 +577,10 @@ class OrderViewSet(
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ["tickets__trip__route"]
     ordering_fields = ["created_at"]
+    ordering = ["-created_at"]
+    cursor_pagination_class = OrderCursorPagination
+    throttle_scopes = {"create": "booking"}
+    list_projection = OrderListProjection()
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -255,13 +589,19 @@ class OrderViewSet(
         return OrderSerializer
 
     def get_queryset(self):
-        return Order.objects.prefetch_related(
-            "tickets__trip__route__source",
-            "tickets__trip__crew",
-            "tickets__trip__train",
-        ).filter(
-            user=self.request.user
-        )
+        queryset = Order.objects.filter(user=self.request.user)
+        if self.field_requested("tickets"):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "tickets__trip",
+                    queryset=Trip.objects.select_related(
+                        "route__source", "route__destination", "train"
+                    ),
+                ),
+                "tickets__trip__crew",
+            )
+
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -303,8 +643,139 @@ class OrderViewSet(
                         value="-created_at"
                     )
                 ]
-            )
+            ),
+            OpenApiParameter(
+                name="pagination",
+                description=(
+                    "Use 'cursor' for cursor pagination, pages are"
+                    " followed through next and previous links"
+                ),
+                type=str,
+                required=False,
+                enum=["cursor"],
+            ),
+            FIELDS_PARAMETER,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="Idempotency-Key",
+                location=OpenApiParameter.HEADER,
+                description=(
+                    "Unique key of the order, retries with the same key"
+                    " return the first response instead of ordering again"
+                ),
+                type=str,
+                required=False,
+            )
+        ]
+    )
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[TicketExportQuerySerializer],
+        responses={(200, "text/csv"): OpenApiTypes.STR},
+    )
+    @action(
+        methods=["get"],
+        detail=False,
+        permission_classes=[IsAdminUser],
+    )
+    def export(self, request):
+        """Stream every ordered ticket as CSV or NDJSON,
+        one line per ticket ordered by order"""
+        query = TicketExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        filters = dict(query.validated_data)
+
+        return export_response(filters.pop("output"), "tickets", **filters)
+
+
+class SeatHoldViewSet(
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Reserve seats for SEAT_HOLD_TTL while the order is completed,
+    other users can not order or hold these seats meanwhile"""
+    queryset = SeatHold.objects.all()
+    serializer_class = SeatHoldSerializer
+    permission_classes = [IsAuthenticated]
+    throttle_scopes = {"create": "booking", "checkout": "booking"}
+
+    def get_serializer_class(self):
+        if self.action == "create":
+            return SeatHoldCreateSerializer
+
+        return SeatHoldSerializer
+
+    def get_queryset(self):
+        return SeatHold.objects.filter(
+            user=self.request.user,
+            expires_at__gt=timezone.now(),
+        )
+
+    @extend_schema(responses={201: SeatHoldSerializer(many=True)})
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        holds = hold_seats(
+            serializer.validated_data["tickets"], request.user
+        )
+
+        return Response(
+            SeatHoldSerializer(holds, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(request=None, responses={201: OrderSerializer})
+    @action(methods=["post"], detail=False)
+    def checkout(self, request):
+        """Turn all active seat holds of user into order"""
+        order = checkout_holds(request.user)
+
+        return Response(
+            OrderSerializer(order).data, status=status.HTTP_201_CREATED
+        )
+
+
+class JourneyViewSet(viewsets.ViewSet):
+    """Plan journeys with transfers between upcoming trips"""
+
+    @extend_schema(
+        parameters=[
+            JourneyQuerySerializer,
+            OpenApiParameter(
+                name="from",
+                description="Departure station id",
+                type=int,
+                required=True,
+            ),
+        ],
+        responses=JourneySerializer(many=True),
+    )
+    def list(self, request):
+        query = JourneyQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        min_transfer = settings.JOURNEY_MIN_TRANSFER
+        if "min_transfer" in params:
+            min_transfer = timedelta(minutes=params["min_transfer"])
+
+        journeys = get_timetable().journeys(
+            params["from"].id,
+            params["to"].id,
+            params.get("depart_after") or timezone.now(),
+            min_transfer,
+            count=params["k"],
+        )
+
+        return Response(JourneySerializer(journeys, many=True).data)
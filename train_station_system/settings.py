@@ -17,6 +17,17 @@ from datetime import timedelta
 
 dotenv.load_dotenv()
 
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """Read environment variable as a flag, only 1, true, yes and on
+    in any case turn it on, so 0 and false turn it off"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,7 +59,6 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
 
     "drf_spectacular",
-    "debug_toolbar",
     "django_filters",
     "django_dump_load_utf8",
 
@@ -59,7 +69,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "train_station_resource.metrics.MetricsMiddleware",
+    "train_station_resource.profiling.ServerTimingMiddleware",
+    "train_station_resource.nplusone.NPlusOneMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -68,6 +80,11 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# debug_toolbar slows down every request, it is used in development only
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(2, "debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "train_station_system.urls"
 
 TEMPLATES = [
@@ -102,6 +119,59 @@ DATABASES = {
     }
 }
 
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# memory of this process, for values that must not cost a network hop
+CACHES["local"] = {
+    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    "LOCATION": "local",
+}
+
+# Idempotency records have to live for IDEMPOTENCY_KEY_TTL, so they are
+# kept apart from list pages, counters and throttle windows that are
+# culled from a full cache. Without REDIS_URL they are only known to the
+# process that stored them, retries reaching another worker are not
+# recognized, Redis is required for the guarantee with several workers
+if os.environ.get("REDIS_URL"):
+    CACHES["idempotency"] = {
+        **CACHES["default"],
+        "KEY_PREFIX": "idempotency",
+    }
+else:
+    CACHES["idempotency"] = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "idempotency",
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    }
+
+# Sliding window counters of throttles, apart from the default cache so
+# list pages and version counters do not cull them. Without REDIS_URL
+# every process counts its own requests and a client may send the rate
+# to each worker, Redis is required for the limits with several workers
+if os.environ.get("REDIS_URL"):
+    CACHES["throttle"] = {
+        **CACHES["default"],
+        "KEY_PREFIX": "throttle",
+    }
+else:
+    CACHES["throttle"] = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "throttle",
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -158,7 +228,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "train_station_resource.permissions.IsAdminOrIfAuthenticatedReadOnly",
@@ -167,10 +237,12 @@ REST_FRAMEWORK = {
         "train_station_resource.paginations.CustomPagination"
     ),
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.UserRateThrottle"
+        "train_station_resource.throttling.UserSlidingWindowThrottle",
+        "train_station_resource.throttling.ScopedSlidingWindowThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
-        "user": "1222/day"
+        "user": "1222/day",
+        "booking": "60/hour",
     },
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema"
 }
@@ -179,6 +251,95 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=20),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=2),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER": (
+        "user.serializers.UserTokenObtainPairSerializer"
+    ),
+}
+
+# Authenticated users are cached in memory of the process for
+# JWT_USER_CACHE_TTL, with JWT_TRUST_CLAIMS email and is_staff claims
+# of access tokens are trusted and the user is not loaded at all
+JWT_USER_CACHE_TTL = timedelta(minutes=1)
+JWT_TRUST_CLAIMS = env_flag("JWT_TRUST_CLAIMS")
+
+# Time for which seats stay reserved for user completing the order
+SEAT_HOLD_TTL = timedelta(
+    minutes=int(os.environ.get("SEAT_HOLD_TTL_MINUTES", 10))
+)
+
+# Responses of requests with Idempotency-Key header are replayed for
+# IDEMPOTENCY_KEY_TTL, concurrent request with the same key is rejected
+# for IDEMPOTENCY_LOCK_TIMEOUT while the first one is being processed
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+IDEMPOTENCY_LOCK_TIMEOUT = timedelta(minutes=1)
+
+# Default minimum time for changing trains in journey planner
+JOURNEY_MIN_TRANSFER = timedelta(minutes=10)
+
+# Route networks up to this number of stations keep shortest path
+# trees of the ROUTE_NETWORK_TREE_CACHE_SIZE most recently queried
+# source stations, at most 16 bytes per station and tree
+ROUTE_NETWORK_ALL_PAIRS_LIMIT = 2000
+ROUTE_NETWORK_TREE_CACHE_SIZE = 256
+
+# Cached list responses of stations, routes, trains, train types and
+# crews expire after LIST_CACHE_TIMEOUT even when nothing changed
+LIST_CACHE_TIMEOUT = timedelta(hours=1)
+
+# Trip and order lists are built from values() rows without
+# serializers, set to False to serialize model instances instead
+LIST_PROJECTIONS = True
+
+# Ticket exports read EXPORT_CHUNK_SIZE rows at a time
+# from a server side cursor
+EXPORT_CHUNK_SIZE = 2000
+
+# Station and train name autocomplete stops ranking further candidates
+# once AUTOCOMPLETE_TIME_BUDGET is spent and returns best found so far
+AUTOCOMPLETE_TIME_BUDGET = timedelta(milliseconds=20)
+
+# Send Server-Timing headers with database, rendering and total time
+# of every request, SERVER_TIMING_LOG_RATE of requests are also logged
+# as JSON lines by the train_station_resource.profiling logger
+SERVER_TIMING = env_flag("SERVER_TIMING")
+SERVER_TIMING_LOG_RATE = float(
+    os.environ.get("SERVER_TIMING_LOG_RATE", 0.01)
+)
+
+# Warn about statements repeated more than NPLUSONE_THRESHOLD times
+# in one request, naming the serializer field or admin column that ran
+# them, NPLUSONE_RAISE raises NPlusOneError instead and is meant for tests
+NPLUSONE_DETECTION = env_flag("NPLUSONE_DETECTION", DEBUG)
+NPLUSONE_THRESHOLD = 5
+NPLUSONE_RAISE = False
+
+# Count requests, their latency and queries per view and action for
+# /metrics/, with several workers set PROMETHEUS_MULTIPROC_DIR to an
+# empty directory shared by all of them, METRICS=0 turns counting off
+METRICS = env_flag("METRICS", True)
+
+# Bearer token Prometheus scrapes /metrics/ with, without it the
+# endpoint is not served
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "train_station_resource.profiling": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        "train_station_resource.nplusone": {
+            "handlers": ["console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
 }
 
 # Set drf_spectacular settings
@@ -25,6 +25,8 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from train_station_resource.metrics import metrics_view
+
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -46,5 +48,9 @@ urlpatterns = [
         name="swagger"
     ),
 
-    path("__debug__/", include("debug_toolbar.urls")),
+    path("metrics/", metrics_view, name="metrics"),
+
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+if settings.DEBUG:
+    urlpatterns.append(path("__debug__/", include("debug_toolbar.urls")))
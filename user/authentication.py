@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from train_station_resource.versions import bump_version, get_version
+
+VERSION_CLAIM = "user_version"
+
+
+def user_version_name(user_id) -> str:
+    return f"user:{user_id}"
+
+
+def get_user_version(user_id) -> int:
+    return get_version(user_version_name(user_id))
+
+
+def bump_user_version(user_id) -> None:
+    bump_version(user_version_name(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that does not load the user on every request.
+
+    Users are kept in the local cache for JWT_USER_CACHE_TTL under their
+    version, which is bumped when the user is saved or deleted. With
+    JWT_TRUST_CLAIMS the user is built from email and is_staff claims
+    of tokens issued for the current user version without any cache
+    lookup of the user itself
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+
+        version = get_user_version(user_id)
+
+        if (
+            settings.JWT_TRUST_CLAIMS
+            and validated_token.get(VERSION_CLAIM) == version
+        ):
+            return self.user_from_claims(user_id, validated_token)
+
+        local_cache = caches["local"]
+        key = f"jwt_user:{user_id}:{version}"
+
+        user = local_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            local_cache.set(
+                key,
+                user,
+                timeout=settings.JWT_USER_CACHE_TTL.total_seconds(),
+            )
+
+        return user
+
+    @staticmethod
+    def user_from_claims(user_id, validated_token):
+        """Return unsaved user instance, it can be used for
+        permissions and foreign keys but must not be saved"""
+        user = get_user_model()(
+            **{api_settings.USER_ID_FIELD: user_id},
+            email=validated_token.get("email", ""),
+            is_staff=validated_token.get("is_staff", False),
+            is_active=True,
+        )
+        user._state.adding = False
+
+        return user
@@ -1,6 +1,9 @@
 from rest_framework.serializers import ModelSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import get_user_model
 
+from .authentication import VERSION_CLAIM, get_user_version
+
 
 class UserSerializer(ModelSerializer):
     class Meta:
@@ -23,3 +26,16 @@ class UserSerializer(ModelSerializer):
             user.save()
 
         return user
+
+
+class UserTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Add claims trusted by CachedJWTAuthentication to issued tokens"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["email"] = user.email
+        token["is_staff"] = user.is_staff
+        token[VERSION_CLAIM] = get_user_version(user.pk)
+
+        return token
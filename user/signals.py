@@ -0,0 +1,16 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import bump_user_version
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop cached user and trusted claims of issued tokens
+    right away and again after commit"""
+    user_id = instance.pk
+    bump_user_version(user_id)
+    transaction.on_commit(lambda: bump_user_version(user_id))
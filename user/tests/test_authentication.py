@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+TOKEN_URL = reverse("user:token_obtain_pair")
+ME_URL = reverse("user:manage")
+STATION_URL = reverse("train_station:station-list")
+ORDER_URL = reverse("train_station:order-list")
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        caches["local"].clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="main@gmail.com", password="rvtquen1234"
+        )
+        self.authenticate()
+
+    def authenticate(self) -> dict:
+        res = self.client.post(
+            TOKEN_URL, {"email": "main@gmail.com", "password": "rvtquen1234"}
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {res.data['access']}"
+        )
+        return res.data
+
+    def test_token_has_user_claims(self):
+        token = AccessToken(self.authenticate()["access"])
+
+        self.assertEqual(token["email"], "main@gmail.com")
+        self.assertFalse(token["is_staff"])
+        self.assertIn("user_version", token)
+
+    def test_user_is_loaded_once(self):
+        self.client.get(ORDER_URL)
+
+        # only count of user orders, no user query
+        with self.assertNumQueries(1):
+            res = self.client.get(ORDER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(ORDER_URL)
+
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ORDER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get(ORDER_URL)
+        self.user.delete()
+
+        res = self.client.get(ORDER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_updated_user_is_reloaded(self):
+        self.client.get(STATION_URL)
+
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.client.post(
+            STATION_URL, {"name": "Kyiv", "latitude": 1, "longitude": 1}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(JWT_TRUST_CLAIMS=True)
+    def test_trusted_claims_need_no_user_query(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(ORDER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(JWT_TRUST_CLAIMS=True)
+    def test_trusted_claims_user_can_order(self):
+        res = self.client.post(ORDER_URL, {"tickets": []}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tickets", res.data)
+
+    @override_settings(JWT_TRUST_CLAIMS=True)
+    def test_trusted_claims_are_dropped_after_user_change(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        # token still says is_staff false, user is loaded instead
+        res = self.client.post(
+            STATION_URL, {"name": "Kyiv", "latitude": 1, "longitude": 1}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(JWT_TRUST_CLAIMS=True)
+    def test_trusted_claims_of_deactivated_user_are_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ORDER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_manage_view_uses_database_user(self):
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], "main@gmail.com")